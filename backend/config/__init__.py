@@ -2,15 +2,23 @@ from .settings import *
 from .seasons_rounds import (
     SEASONS_CONFIG,
     NON_VOTE_COLUMNS,
+    CHARACTER_COLUMNS,
     get_season_rounds,
+    get_season_schema,
+    get_round_stage,
     get_eliminated_characters,
+    get_elimination_count,
     get_wildcard_rounds
 )
 
 __all__ = [
     'get_season_rounds',
+    'get_season_schema',
+    'get_round_stage',
     'get_wildcard_rounds',
     'get_eliminated_characters',
+    'get_elimination_count',
     'SEASONS_CONFIG',
-    'NON_VOTE_COLUMNS'
+    'NON_VOTE_COLUMNS',
+    'CHARACTER_COLUMNS'
 ]
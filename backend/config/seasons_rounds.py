@@ -1,6 +1,7 @@
 """
 存储每个赛季的投票轮次配置
 """
+import re
 
 SEASONS_CONFIG = {
     "2023": {
@@ -105,7 +106,18 @@ SEASONS_CONFIG = {
             "第一阶段第四轮",
             "第二阶段第四轮",
             "第三阶段第四轮"
-        ]
+        ],
+        # 赛制：各淘汰轮次的淘汰人数（比赛进行前即已确定，未进行的轮次也适用）
+        "elimination_counts": {
+            "预选赛第二轮": 12,
+            "第一阶段第四轮": 20,
+            "第二阶段第四轮": 16,
+            "第三阶段第四轮": 8,
+            "淘汰赛第一轮": 8,
+            "淘汰赛第二轮": 4,
+            "淘汰赛第三轮": 2,
+            "淘汰赛第四轮": 1
+        }
     }
 }
 
@@ -118,6 +130,14 @@ NON_VOTE_COLUMNS = {
     "累计得票数"
 }
 
+# 角色信息列，加载时读取为分类类型（True 表示必需列）
+CHARACTER_COLUMNS = {
+    "角色": True,
+    "作品": True,
+    "CV": False,
+    "头像": False
+}
+
 def get_season_rounds(season: str) -> list:
     """
     获取指定赛季的投票轮次
@@ -142,6 +162,24 @@ def get_eliminated_characters(season: str, round_name: str) -> list:
         raise KeyError(f"赛季配置不存在: {season}")
     return SEASONS_CONFIG[season].get("eliminated_characters", {}).get(round_name, [])
 
+def get_elimination_count(season: str, round_name: str) -> int:
+    """
+    获取指定轮次按赛制的淘汰人数
+    
+    优先取赛制配置（elimination_counts），未配置时取淘汰名单的人数
+    
+    :param season: 赛季，如 "2023"
+    :param round_name: 轮次名称
+    :return: 淘汰人数，不淘汰的轮次为 0
+    :raises: KeyError 如果赛季不存在
+    """
+    if season not in SEASONS_CONFIG:
+        raise KeyError(f"赛季配置不存在: {season}")
+    counts = SEASONS_CONFIG[season].get("elimination_counts", {})
+    if round_name in counts:
+        return counts[round_name]
+    return len(get_eliminated_characters(season, round_name))
+
 def get_wildcard_rounds(season: str) -> list:
     """
     获取指定赛季的外卡赛轮次
@@ -153,3 +191,27 @@ def get_wildcard_rounds(season: str) -> list:
     if season not in SEASONS_CONFIG:
         raise KeyError(f"赛季配置不存在: {season}")
     return SEASONS_CONFIG[season].get("wildcard_rounds", [])
+
+def get_round_stage(round_name: str) -> str:
+    """
+    获取轮次所属的阶段，即去掉末尾的"第N轮"
+    
+    :param round_name: 轮次名称，如 "第一阶段第二轮"
+    :return: 阶段名称，如 "第一阶段"；无法识别时返回轮次名称本身
+    """
+    match = re.match(r'^(.+?)第[一二三四五六七八九十百\d]+轮$', round_name)
+    return match.group(1) if match else round_name
+
+def get_season_schema(season: str) -> dict:
+    """
+    获取指定赛季 CSV 需要读取的列及其类型
+    
+    角色信息列读取为分类类型，投票列读取为 float32，序号、累计得票数等其余列不读取
+    
+    :param season: 赛季，如 "2023"
+    :return: 列名到类型的字典
+    :raises: KeyError 如果赛季不存在
+    """
+    schema = {column: 'category' for column in CHARACTER_COLUMNS}
+    schema.update({column: 'float32' for column in get_season_rounds(season)})
+    return schema
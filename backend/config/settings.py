@@ -5,6 +5,38 @@ class Settings(BaseSettings):
     """应用配置"""
     API_V1_STR: str = "/api/v1"
     LOG_LEVEL: str = "INFO"
+    # 数据目录（为空时使用 backend/data，压测等场景可指向临时目录）
+    DATA_DIR: str = ""
+    # 日志目录（为空时使用 backend/logs）
+    LOG_DIR: str = ""
+    # 服务端渲染：中文字体路径（必须配置，Pillow 默认字体没有中文字形；为空时不接受渲染任务）和并行进程数（0 表示使用全部 CPU）
+    RENDER_FONT_PATH: str = ""
+    RENDER_WORKERS: int = 0
+    # 服务端渲染的上限：画面尺寸、帧率、每轮帧数和总帧数，同时渲染的任务数和排队中的任务数
+    RENDER_MAX_WIDTH: int = 3840
+    RENDER_MAX_HEIGHT: int = 2160
+    RENDER_MAX_FPS: int = 60
+    RENDER_MAX_FRAMES_PER_ROUND: int = 120
+    RENDER_MAX_FRAMES: int = 5000
+    RENDER_MAX_CONCURRENT_JOBS: int = 1
+    RENDER_MAX_QUEUED_JOBS: int = 8
+    # 已结束的渲染任务及其输出文件保留多久（秒）
+    RENDER_JOB_TTL_SECONDS: int = 24 * 3600
+    # 模拟剩余轮次时并行的进程数（0 表示使用全部 CPU）
+    SIMULATION_WORKERS: int = 0
+    # 批量导入赛季压缩包时并行解析的进程数（0 表示使用全部 CPU）
+    INGEST_WORKERS: int = 0
+    # 分块上传：单个文件的大小上限（字节）、分块数上限，以及未完成的会话多久没有新分块后删除（秒）
+    MAX_UPLOAD_SIZE: int = 1024 * 1024 * 1024
+    MAX_UPLOAD_CHUNKS: int = 10000
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600
+    # 批量导入压缩包：压缩包内的条目数上限，单个文件和全部文件解压后的大小上限（字节）
+    ARCHIVE_MAX_MEMBERS: int = 1000
+    ARCHIVE_MAX_MEMBER_SIZE: int = 256 * 1024 * 1024
+    ARCHIVE_MAX_TOTAL_SIZE: int = 1024 * 1024 * 1024
+    # 推送事件：每个连接最多积压的事件数，以及空闲时发送心跳的间隔（秒）
+    EVENT_QUEUE_SIZE: int = 16
+    EVENT_HEARTBEAT_SECONDS: int = 15
 
     class Config:
         case_sensitive = True
@@ -12,6 +44,6 @@ class Settings(BaseSettings):
     def __init__(self, **data):
         super().__init__(**data)
         # 确保日志目录存在
-        os.makedirs(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs'), exist_ok=True)
+        os.makedirs(self.LOG_DIR or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs'), exist_ok=True)
 
 settings = Settings()
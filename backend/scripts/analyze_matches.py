@@ -1,37 +1,31 @@
+import os
+import sys
 import pandas as pd
 from collections import defaultdict
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from src.ranking import rank, ranks_from_order
+
 # 读取Excel文件
 df = pd.read_excel('F:/ISML/ISML2023/all/match_datas.xlsx')
 
 def print_ranked_results(df, column, n=3, ascending=False, format_func=None):
-    """打印排名，相同值获得相同排名，并显示所有并列"""
-    sorted_df = df.sort_values(column, ascending=ascending)
-    
-    # 获取前n个不同的值
-    unique_values = sorted_df[column].unique()[:n]
-    
-    # 获取所有匹配这些值的行
-    results = []
-    current_rank = 1
-    prev_value = None
-    
-    for value in unique_values:
-        # 如果值不同，增加排名
-        if value != prev_value:
-            current_rank = len(results) + 1
-        
-        # 获取所有等于当前值的行
-        matching_rows = sorted_df[sorted_df[column] == value]
-        for row in matching_rows.itertuples():
-            results.append((current_rank, row))
-        
-        prev_value = value
+    """打印排名，相同值获得相同排名（竞争排名），并显示前 n 个不同值的所有并列"""
+    values = df[column].to_numpy(dtype=float)
+    ranks, order = rank(values, 'competition', descending=not ascending)
+    # 密集排名即不同值的序号
+    dense_ranks = ranks_from_order(values, order, 'dense', descending=not ascending)
+
+    rows = list(df.itertuples())
+    results = [(int(ranks[index]), rows[index]) for index in order.tolist() if 0 < dense_ranks[index] <= n]
             
     # 使用format_func格式化输出
     if format_func:
-        for rank, row in results:
-            print(format_func(rank, row))
+        for rank_value, row in results:
+            print(format_func(rank_value, row))
     return results
 
 # 创建包含所有得票数的Series
@@ -0,0 +1,108 @@
+"""
+对比数据加载的耗时和内存
+
+- legacy：原先的加载方式，读取全部列并推断类型，再逐个单元格调用 safe_float_convert 构建 float64 矩阵
+- typed：VoteTracker 当前的加载方式，只读取配置中的列，角色信息为分类类型，票数为 float32
+
+每种方式在独立的子进程中运行，分别报告耗时、加载过程中的峰值内存（tracemalloc）和加载后常驻的数据大小。
+tracemalloc 会明显拖慢 Python 层的分配，因此耗时在另一次不开启 tracemalloc 的运行中测量。
+
+用法：python scripts/benchmark_load_csv.py [--characters 50000] [--csv 已有的赛季文件]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+MODES = ['legacy', 'typed']
+
+
+def run_mode(mode: str, csv_path: str, trace: bool):
+    """在当前进程中按指定方式加载一次，返回测量结果"""
+    import time
+    import tracemalloc
+    import numpy as np
+    import pandas as pd
+    from src.vote_tracker import VoteTracker, safe_float_convert
+    from config.seasons_rounds import get_season_rounds
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if mode == 'legacy':
+        data = pd.read_csv(csv_path)
+        data.columns = [col.replace(' ', '') for col in data.columns]
+        rounds = get_season_rounds(VoteTracker.get_season_from_filename(os.path.basename(csv_path)))
+        votes = np.array(
+            [[safe_float_convert(value) for value in data[col]] for col in rounds],
+            dtype=np.float64
+        ).T
+        retained = int(data.memory_usage(deep=True).sum()) + votes.nbytes
+    else:
+        tracker = VoteTracker(csv_path)
+        retained = int(tracker.data.memory_usage(deep=True).sum()) + tracker._votes.nbytes
+    elapsed = time.perf_counter() - start
+    result = {'mode': mode, 'seconds': elapsed, 'retained_bytes': retained}
+    if trace:
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_subprocess(mode: str, csv_path: str, trace: bool):
+    command = [sys.executable, os.path.abspath(__file__), '--run', mode, '--csv', csv_path]
+    if trace:
+        command.append('--trace')
+    output = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure(mode: str, csv_path: str):
+    """在子进程中测量，避免两种方式互相影响峰值内存"""
+    result = run_subprocess(mode, csv_path, trace=False)
+    result['peak_bytes'] = run_subprocess(mode, csv_path, trace=True)['peak_bytes']
+    return result
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对比数据加载的耗时和内存')
+    parser.add_argument('--characters', type=int, default=50000, help='合成数据的角色数量')
+    parser.add_argument('--csv', help='使用已有的赛季文件代替合成数据')
+    parser.add_argument('--run', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_mode(args.run, args.csv, args.trace)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = args.csv
+        if not csv_path:
+            from scripts.synthetic_season import generate_season_csv
+            csv_path = generate_season_csv(os.path.join(temp_dir, '2023_season.csv'), characters=args.characters)
+        print(f"数据文件: {csv_path}（{format_size(os.path.getsize(csv_path))}）")
+
+        results = {mode: measure(mode, csv_path) for mode in MODES}
+
+    print(f"{'方式':<8}{'耗时':>10}{'峰值内存':>14}{'常驻数据':>14}")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['seconds']:>9.2f}s{format_size(result['peak_bytes']):>16}"
+              f"{format_size(result['retained_bytes']):>16}")
+    legacy, typed = results['legacy'], results['typed']
+    print(f"耗时 {legacy['seconds'] / typed['seconds']:.1f} 倍，峰值内存 {legacy['peak_bytes'] / typed['peak_bytes']:.1f} 倍，"
+          f"常驻数据 {legacy['retained_bytes'] / typed['retained_bytes']:.1f} 倍")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+检查根据淘汰名单计算的最终名次（VoteTracker.get_final_ranks）与官方排名（src/data/rankings.json）一致
+
+有官方排名的赛季接口直接返回官方排名，计算的名次只用于没有官方排名的赛季；
+此检查确认计算规则（淘汰轮次、排位赛票数、累计票数）能还原已有赛季的官方排名。
+有不一致的角色时以非零状态码退出，可直接用于 CI。
+
+用法：python scripts/check_final_ranks.py [--csv data/2023_season.csv]
+"""
+import os
+import sys
+import json
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from src.vote_tracker import VoteTracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查计算的最终名次与官方排名一致")
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'data', '2023_season.csv'), help="赛季数据文件")
+    parser.add_argument('--rankings', default=os.path.join(BACKEND_DIR, 'src', 'data', 'rankings.json'), help="官方排名文件")
+    args = parser.parse_args()
+
+    with open(args.rankings, 'r', encoding='utf-8') as f:
+        official = json.load(f)
+
+    tracker = VoteTracker(args.csv)
+    if tracker.season != official['season']:
+        sys.exit(f"数据文件的赛季 {tracker.season} 与官方排名的赛季 {official['season']} 不一致")
+
+    index = tracker.get_character_index()
+    final_ranks = tracker.get_final_ranks()
+    failures = []
+    for char_key, official_rank in sorted(official['rankings'].items(), key=lambda item: item[1]):
+        row = index.get(char_key)
+        computed = int(final_ranks[row]) if row is not None else None
+        if computed != official_rank:
+            failures.append(f"{char_key}: 官方第 {official_rank} 名，计算为 {computed if computed else '未定'}")
+
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        sys.exit(1)
+    print(f"✓ {len(official['rankings'])} 个官方名次全部一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+检查后端启动耗时
+
+1. 在全新的解释器中导入 src.main，检查导入耗时并确认没有提前导入 pandas 等重量级依赖
+2. 以生产模式启动服务，测量从进程启动到 /ready 返回第一个字节的时间（TTFB），以及到就绪的时间
+
+两项都使用临时的数据目录和日志目录（服务加载的是复制过去的 --csv 文件），不会在 backend/data 中创建 analytics.db，
+也不会追加 backend/logs/app.log。
+
+导入耗时主要来自 fastapi（约 0.6s，其中大部分是 fastapi.openapi.models 的 pydantic 模型）和 pydantic_settings（约 0.2s），
+src 自身的模块只占不到 0.1s；默认 1.0s 的预算覆盖这部分第三方导入，单核机器上余量不大。
+
+任一指标超出预算时以非零状态码退出，可直接用于 CI。
+
+用法：python scripts/check_startup_time.py [--csv data/2023_season.csv] [--import-budget 1.0] [--ttfb-budget 3.0] [--ready-budget 15.0]
+"""
+import os
+import sys
+import time
+import json
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 这些模块应在首次使用时才导入
+DEFERRED_MODULES = ['pandas', 'numpy', 'PIL']
+
+
+def make_env(temp_dir, csv_path):
+    """准备临时数据目录（复制数据文件并写入 .latest），返回子进程的环境变量：数据和日志都写到临时目录"""
+    data_dir = os.path.join(temp_dir, 'data')
+    os.makedirs(data_dir)
+    csv_path = shutil.copy(csv_path, os.path.join(data_dir, os.path.basename(csv_path)))
+    with open(os.path.join(data_dir, '.latest'), 'w') as f:
+        f.write(csv_path)
+    return dict(os.environ, DATA_DIR=data_dir, LOG_DIR=os.path.join(temp_dir, 'logs'))
+
+
+def measure_import_time(env):
+    """在子进程中导入 src.main，返回 (耗时秒数, 被提前导入的模块)"""
+    code = (
+        "import sys, time, json;"
+        "start = time.perf_counter();"
+        "import src.main;"
+        "elapsed = time.perf_counter() - start;"
+        f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))"
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    result = json.loads(output)
+    return result['elapsed'], result['loaded']
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_server_startup(env, timeout):
+    """以生产模式启动服务，返回 (首字节耗时, 就绪耗时)，超时的项为 None"""
+    port = get_free_port()
+    url = f"http://127.0.0.1:{port}/api/v1/ready"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'start.py', '--prod', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    ttfb = ready = None
+    try:
+        while time.perf_counter() - start < timeout and ready is None:
+            try:
+                with urllib.request.urlopen(url, timeout=0.5) as response:
+                    response.read(1)
+                    elapsed = time.perf_counter() - start
+                    ttfb = ttfb or elapsed
+                    ready = elapsed
+            except urllib.error.HTTPError as e:
+                # 503 表示服务已响应但仍在预热
+                e.read(1)
+                ttfb = ttfb or time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return ttfb, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查后端启动耗时")
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'data', '2023_season.csv'), help="启动时加载的数据文件")
+    parser.add_argument('--import-budget', type=float, default=1.0, help="导入 src.main 的耗时预算（秒）")
+    parser.add_argument('--ttfb-budget', type=float, default=3.0, help="进程启动到首字节的耗时预算（秒）")
+    parser.add_argument('--ready-budget', type=float, default=15.0, help="进程启动到就绪的耗时预算（秒）")
+    args = parser.parse_args()
+
+    failures = []
+
+    temp_dir = tempfile.mkdtemp(prefix='check_startup_')
+    try:
+        env = make_env(temp_dir, args.csv)
+        import_time, loaded = measure_import_time(env)
+        ttfb, ready = measure_server_startup(env, timeout=max(args.ttfb_budget, args.ready_budget) + 5)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print(f"导入 src.main 耗时: {import_time:.3f}s（预算 {args.import_budget:.3f}s）")
+    if import_time > args.import_budget:
+        failures.append("导入耗时超出预算")
+    if loaded:
+        failures.append(f"导入 src.main 时提前加载了: {', '.join(loaded)}")
+
+    print(f"进程启动到首字节: {'超时' if ttfb is None else f'{ttfb:.3f}s'}（预算 {args.ttfb_budget:.3f}s）")
+    print(f"进程启动到就绪: {'超时' if ready is None else f'{ready:.3f}s'}（预算 {args.ready_budget:.3f}s）")
+    if ttfb is None or ttfb > args.ttfb_budget:
+        failures.append("首字节耗时超出预算")
+    if ready is None or ready > args.ready_budget:
+        failures.append("就绪耗时超出预算")
+
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        sys.exit(1)
+    print("✓ 启动耗时检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+将所有赛季导出为静态数据包
+
+读取数据集存储中每个赛季的最新版本，把只读接口的响应写为静态文件：
+votes-by-rounds、bootstrap、轮次列表、角色信息、轮次统计、排名走势、区间排名、上卷统计、里程碑和动画帧，
+每个接口按四种过滤组合（是否排除复活赛 / 排位赛）各导出一份。文件以 gzip 压缩并按内容哈希命名，
+manifest.json 记录路由到文件的映射。
+
+前端构建时设置 REACT_APP_STATIC_BUNDLE_URL 为数据包的访问地址，即可不依赖后端运行（上传等写操作不可用）。
+
+用法：python scripts/export_static.py [--output 输出目录] [--workers 4] [--data-dir 数据目录] [--no-compress]
+"""
+import os
+import sys
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config import settings
+from src.dataset_store import DatasetStore
+from src.static_export import export_static_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将所有赛季导出为静态数据包')
+    parser.add_argument('--output', default=os.path.join(BACKEND_DIR, 'data', 'static'), help='输出目录')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数，默认为 CPU 核数')
+    parser.add_argument('--data-dir', default=settings.DATA_DIR or os.path.join(BACKEND_DIR, 'data'), help='数据目录')
+    parser.add_argument('--default-season', help='前端默认显示的赛季，默认为最新的赛季')
+    parser.add_argument('--no-compress', action='store_true', help='不压缩，直接写 JSON 文件')
+    args = parser.parse_args()
+
+    # 工作进程中的接口函数从 settings 读取数据目录
+    settings.DATA_DIR = args.data_dir
+    store = DatasetStore(args.data_dir)
+    start = time.perf_counter()
+    try:
+        result = export_static_bundle(
+            store,
+            args.output,
+            workers=args.workers,
+            compress=not args.no_compress,
+            default_season=args.default_season
+        )
+    except ValueError as e:
+        print(str(e))
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    for season, entry in result['seasons'].items():
+        print(f"{season} 赛季（{entry['version'][:12]}）: {len(entry['routes'])} 个接口")
+    for error in result['errors']:
+        print(f"跳过 {error}")
+    stats = result['stats']
+    print(f"共 {stats['routes']} 个接口，{stats['files']} 个文件，"
+          f"{stats['raw_bytes'] / 1024:.1f} KB → {stats['written_bytes'] / 1024:.1f} KB，"
+          f"{stats['workers']} 个进程，耗时 {elapsed:.2f}s")
+    print(f"已写入 {os.path.abspath(args.output)}")
+
+    if result['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
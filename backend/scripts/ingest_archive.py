@@ -0,0 +1,66 @@
+"""
+批量导入多个赛季的数据文件
+
+从 zip / tar 压缩包或目录中取出所有 <年份>_season.csv，在进程池中并行解析校验，
+一次性写入数据集存储并将每个赛季的最新版本设为导入的文件，再同步到分析数据库（data/analytics.db）。
+还没有当前数据集（data/.latest）时，将最新的赛季设为当前数据集。
+
+数据集清单在服务启动时读取，服务运行中请改用 POST /api/v1/datasets/import，避免清单被覆盖。
+
+用法：python scripts/ingest_archive.py 压缩包或目录 [--workers 4] [--data-dir 数据目录] [--json 结果文件]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config import settings
+from src.dataset_store import DatasetStore
+from src.archive_ingest import ingest_archive
+from src.analytics_store import AnalyticsStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导入多个赛季的数据文件')
+    parser.add_argument('archive', help='zip / tar 压缩包，或包含赛季 CSV 的目录')
+    parser.add_argument('--workers', type=int, default=settings.INGEST_WORKERS or None, help='并行进程数，默认为 CPU 核数')
+    parser.add_argument('--data-dir', default=settings.DATA_DIR or os.path.join(BACKEND_DIR, 'data'), help='数据目录')
+    parser.add_argument('--json', help='将结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    store = DatasetStore(args.data_dir)
+    start = time.perf_counter()
+    result = ingest_archive(args.archive, store, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for item in result['files']:
+        detail = item['error'] or f"赛季 {item['season']}，{item['hash'][:12]}"
+        print(f"{item['status']:<10}{item['filename']:<24}{detail}")
+    print(f"共 {len(result['files'])} 个文件，耗时 {elapsed:.2f}s")
+
+    synced = AnalyticsStore(os.path.join(args.data_dir, 'analytics.db')).sync(store)
+    if synced:
+        print(f"已同步到分析数据库: {', '.join(synced)}")
+
+    latest_path = os.path.join(args.data_dir, '.latest')
+    if result['seasons'] and not os.path.exists(latest_path):
+        season = max(result['seasons'])
+        with open(latest_path, 'w') as f:
+            f.write(store.get_blob_path(result['seasons'][season]))
+        print(f"当前数据集设为 {season} 赛季")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if any(item['status'] == 'failed' for item in result['files']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
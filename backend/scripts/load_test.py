@@ -0,0 +1,303 @@
+"""
+后端压力测试
+
+在临时数据目录中以生产模式启动服务（不影响 backend/data），用多个异步客户端并发回放
+接近真实看板流量的请求组合，报告每个接口的吞吐量和 p50 / p95 / p99 延迟。
+任一接口的延迟超出预算或错误率过高时以非零状态码退出，可直接用于 CI。
+
+请求组合（权重可调）：
+- GET /votes-by-rounds：随机的排除轮次 / 外卡赛 / 排位赛过滤组合
+- POST /votes-by-rounds：同上，部分请求带 top_k / 分页参数
+- GET /characters-info
+- POST /upload-data：在原始数据和修改了一个单元格的版本之间交替上传，触发数据集切换和重新加载
+
+依赖 httpx（pip install httpx）。
+
+用法：
+    python scripts/load_test.py [--duration 30] [--concurrency 20] [--csv data/2023_season.csv]
+    python scripts/load_test.py --budget votes-by-rounds-post:p95=200 --budget characters-info:p99=300
+    python scripts/load_test.py --url http://127.0.0.1:8000/api/v1   # 对已启动的服务压测（默认不上传）
+"""
+import os
+import sys
+import time
+import json
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("需要安装 httpx: pip install httpx")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config.seasons_rounds import get_season_rounds, get_wildcard_rounds
+
+# 各类请求的权重
+DEFAULT_WEIGHTS = {
+    'votes-by-rounds-get': 40,
+    'votes-by-rounds-post': 30,
+    'characters-info': 25,
+    'upload-data': 1
+}
+
+# 默认延迟预算（毫秒）
+DEFAULT_BUDGETS = {
+    'votes-by-rounds-get': {'p95': 250, 'p99': 500},
+    'votes-by-rounds-post': {'p95': 250, 'p99': 500},
+    'characters-info': {'p95': 100, 'p99': 250},
+    'upload-data': {'p95': 3000, 'p99': 5000}
+}
+
+PERCENTILES = ('p50', 'p95', 'p99')
+
+
+def percentile(sorted_values, q):
+    """线性插值的百分位数（与 numpy 默认方式一致）"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Workload:
+    """生成请求参数"""
+
+    def __init__(self, season, csv_path, temp_dir, seed):
+        self.random = random.Random(seed)
+        self.rounds = get_season_rounds(season)
+        self.wildcard_rounds = get_wildcard_rounds(season)
+        self.upload_files = self._prepare_upload_files(csv_path, temp_dir, season)
+        self.upload_count = 0
+
+    @staticmethod
+    def _prepare_upload_files(csv_path, temp_dir, season):
+        """准备两个交替上传的版本：原始数据，以及修改了第一个票数单元格的版本"""
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        header = lines[0].split(',')
+        first_row = lines[1].split(',')
+        vote_index = header.index(get_season_rounds(season)[0])
+        first_row[vote_index] = str(int(float(first_row[vote_index] or 0)) + 1)
+        variant_path = os.path.join(temp_dir, 'variant', f"{season}_season.csv")
+        os.makedirs(os.path.dirname(variant_path), exist_ok=True)
+        with open(variant_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join([lines[0], ','.join(first_row)] + lines[2:]) + '\n')
+        return [variant_path, csv_path]
+
+    def filters(self):
+        """随机的过滤组合：大部分请求不排除轮次，少数排除一到两轮"""
+        excluded = self.random.sample(self.rounds, self.random.choice([0, 0, 0, 1, 2]))
+        return {
+            'excluded_columns': excluded,
+            'exclude_wildcard': self.random.random() < 0.3,
+            'exclude_ranking': self.random.random() < 0.3
+        }
+
+    def request(self, name):
+        """返回 (method, path, kwargs)"""
+        if name == 'votes-by-rounds-get':
+            params = self.filters()
+            return 'GET', '/votes-by-rounds', {'params': {
+                'excluded_columns': params['excluded_columns'],
+                'exclude_wildcard': str(params['exclude_wildcard']).lower(),
+                'exclude_ranking': str(params['exclude_ranking']).lower()
+            }}
+        if name == 'votes-by-rounds-post':
+            body = self.filters()
+            if self.random.random() < 0.3:
+                body.update(top_k=self.random.choice([10, 16, 24]), order_by='cumulative')
+            elif self.random.random() < 0.2:
+                body.update(limit=20)
+            return 'POST', '/votes-by-rounds', {'json': body}
+        if name == 'characters-info':
+            return 'GET', '/characters-info', {}
+        if name == 'upload-data':
+            path = self.upload_files[self.upload_count % len(self.upload_files)]
+            self.upload_count += 1
+            with open(path, 'rb') as f:
+                content = f.read()
+            return 'POST', '/upload-data', {
+                'files': {'file': (os.path.basename(path), content, 'text/csv')},
+                'data': {'original_path': path}
+            }
+        raise ValueError(f"未知的请求类型: {name}")
+
+
+async def worker(client, workload, weights, deadline, results):
+    names = list(weights)
+    weight_values = [weights[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = workload.random.choices(names, weight_values)[0]
+        method, path, kwargs = workload.request(name)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+        results.setdefault(name, []).append((elapsed, ok))
+
+
+async def run_load(base_url, workload, weights, concurrency, duration, warmup):
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        if warmup > 0:
+            await asyncio.gather(*[
+                worker(client, workload, weights, time.perf_counter() + warmup, {}) for _ in range(concurrency)
+            ])
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, workload, weights, start + duration, results) for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_dir, timeout=60):
+    """以生产模式启动服务并等待就绪，返回 (进程, API 地址)"""
+    port = get_free_port()
+    base_url = f"http://127.0.0.1:{port}/api/v1"
+    # 日志也写到临时目录，不追加到 backend/logs
+    env = dict(os.environ, DATA_DIR=data_dir, LOG_DIR=os.path.join(os.path.dirname(data_dir), 'logs'))
+    process = subprocess.Popen(
+        [sys.executable, 'start.py', '--prod', '--host', '127.0.0.1', '--port', str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=0.5):
+                return process, base_url
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"服务在 {timeout} 秒内未就绪")
+
+
+def parse_budgets(values):
+    """解析 --budget 参数，格式为 <请求类型>:<百分位>=<毫秒>"""
+    budgets = {name: dict(budget) for name, budget in DEFAULT_BUDGETS.items()}
+    for value in values or []:
+        try:
+            name, rest = value.split(':', 1)
+            key, limit = rest.split('=', 1)
+            if key not in PERCENTILES:
+                raise ValueError
+            budgets.setdefault(name, {})[key] = float(limit)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"预算格式应为 <请求类型>:<p50|p95|p99>=<毫秒>: {value}")
+    return budgets
+
+
+def summarize(results, elapsed):
+    """计算每类请求的吞吐量和延迟百分位"""
+    summary = {}
+    for name, samples in sorted(results.items()):
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        summary[name] = {
+            'requests': len(samples),
+            'errors': errors,
+            'error_rate': errors / len(samples),
+            'rps': len(samples) / elapsed,
+            **{key: percentile(latencies, int(key[1:])) for key in PERCENTILES}
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后端压力测试')
+    parser.add_argument('--url', help='对已启动的服务压测（如 http://127.0.0.1:8000/api/v1），默认在临时目录中启动服务')
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'data', '2023_season.csv'), help='数据文件')
+    parser.add_argument('--duration', type=float, default=30, help='压测时长（秒）')
+    parser.add_argument('--warmup', type=float, default=3, help='预热时长（秒），不计入统计')
+    parser.add_argument('--concurrency', type=int, default=20, help='并发客户端数')
+    parser.add_argument('--upload-weight', type=float, help='上传请求的权重（对已启动的服务压测时默认为 0）')
+    parser.add_argument('--budget', action='append', help='延迟预算，如 votes-by-rounds-post:p95=200，可重复')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='允许的错误率')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--json', help='将结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    weights = dict(DEFAULT_WEIGHTS)
+    weights['upload-data'] = args.upload_weight if args.upload_weight is not None else (0 if args.url else weights['upload-data'])
+    weights = {name: weight for name, weight in weights.items() if weight > 0}
+
+    from src.vote_tracker import VoteTracker
+    season = VoteTracker.get_season_from_filename(os.path.basename(args.csv))
+
+    temp_dir = tempfile.mkdtemp(prefix='load_test_')
+    process = None
+    try:
+        base_url = args.url
+        if not base_url:
+            # 临时数据目录，上传不会影响 backend/data
+            data_dir = os.path.join(temp_dir, 'data')
+            os.makedirs(data_dir)
+            csv_path = shutil.copy(args.csv, os.path.join(data_dir, os.path.basename(args.csv)))
+            with open(os.path.join(data_dir, '.latest'), 'w') as f:
+                f.write(csv_path)
+            process, base_url = start_server(data_dir)
+
+        workload = Workload(season, args.csv, temp_dir, args.seed)
+        print(f"压测 {base_url}：并发 {args.concurrency}，时长 {args.duration:.0f}s，请求权重 {weights}")
+        results, elapsed = asyncio.run(run_load(base_url, workload, weights, args.concurrency, args.duration, args.warmup))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    summary = summarize(results, elapsed)
+    total = sum(item['requests'] for item in summary.values())
+    print(f"\n共 {total} 个请求，吞吐量 {total / elapsed:.1f} 请求/秒\n")
+    print(f"{'请求类型':<24}{'请求数':>8}{'错误':>6}{'请求/秒':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+
+    failures = []
+    for name, item in summary.items():
+        print(f"{name:<28}{item['requests']:>8}{item['errors']:>8}{item['rps']:>12.1f}"
+              + ''.join(f"{item[key]:>9.1f}ms" for key in PERCENTILES))
+        for key, limit in budgets.get(name, {}).items():
+            if item[key] > limit:
+                failures.append(f"{name} 的 {key} 延迟 {item[key]:.1f}ms 超出预算 {limit:.0f}ms")
+        if item['error_rate'] > args.max_error_rate:
+            failures.append(f"{name} 的错误率 {item['error_rate']:.1%} 超出 {args.max_error_rate:.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'elapsed': elapsed, 'summary': summary, 'budgets': budgets, 'failures': failures}, f,
+                      ensure_ascii=False, indent=2)
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"✗ {failure}")
+        sys.exit(1)
+    print("✓ 延迟预算检查通过")
+
+
+if __name__ == '__main__':
+    main()
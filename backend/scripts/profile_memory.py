@@ -0,0 +1,124 @@
+"""
+按数据规模分析各阶段的内存占用
+
+对每个规模生成一份合成赛季数据，在独立的子进程中依次执行：
+- load：创建 VoteTracker（读取 CSV、构建票数矩阵）
+- query：常见过滤组合的视图、排序、名次矩阵、每轮统计和 top-k 选择
+- serialize：用接口实际使用的 main.build_votes_payload 生成 /votes-by-rounds 的完整响应（缓存在视图中），
+  并像 FastAPI 一样经 jsonable_encoder 和 JSONResponse 编码为响应体
+
+每个阶段用 tracemalloc 报告峰值（阶段内相对阶段开始时的最大增量）和常驻（阶段结束后仍保留的增量），
+并给出阶段结束时 VoteTracker.memory_usage() 的估算值作为对照（即 /memory 接口报告的数值，
+为数据集当前的总占用，包括缓存在视图中的响应数据；应与各阶段常驻增量之和减去编码后的响应体大小接近）。
+
+用法：python scripts/profile_memory.py [--sizes 1000 10000 50000] [--json 结果文件]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+STAGES = ['load', 'query', 'serialize']
+
+
+def profile_size(csv_path: str):
+    """在当前进程中分阶段执行并测量，返回各阶段结果"""
+    import gc
+    import tracemalloc
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from src.vote_tracker import VoteTracker
+    # 在测量开始前导入，导入本身的内存不计入任何阶段
+    from src.main import build_votes_payload
+
+    state = {}
+
+    def load():
+        state['tracker'] = VoteTracker(csv_path)
+
+    def query():
+        tracker = state['tracker']
+        for excluded, exclude_wildcard, exclude_ranking in [([], False, False), ([], True, False), ([], False, True)]:
+            view = tracker.get_vote_view(excluded, exclude_wildcard, exclude_ranking)
+            tracker.get_round_orderings(view, 'cumulative')
+            tracker.get_rank_matrix(view, 'cumulative')
+            tracker.get_round_stats(view)
+            tracker.select_characters(view, order_by='cumulative', top_k=16)
+
+    def serialize():
+        tracker = state['tracker']
+        response = dict(build_votes_payload(tracker, tracker.get_vote_view()))
+        response['version'] = tracker.version
+        state['payload'] = JSONResponse(jsonable_encoder(response)).body
+
+    results = []
+    tracemalloc.start()
+    for name, stage in zip(STAGES, [load, query, serialize]):
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        stage()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        results.append({
+            'stage': name,
+            'peak_bytes': peak - before,
+            'retained_bytes': current - before,
+            'estimated_bytes': state['tracker'].memory_usage()['total_bytes']
+        })
+    tracemalloc.stop()
+    return {'characters': len(state['tracker'].characters), 'payload_bytes': len(state['payload']),
+            'stages': results}
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按数据规模分析各阶段的内存占用')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='合成数据的角色数量')
+    parser.add_argument('--json', help='将结果写入 JSON 文件')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(profile_size(args.run)))
+        return
+
+    from scripts.synthetic_season import generate_season_csv
+
+    reports = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes:
+            csv_path = generate_season_csv(os.path.join(temp_dir, str(size), '2023_season.csv'), characters=size)
+            # 每个规模在独立的子进程中测量，互不影响；导入 src.main 时的数据和日志目录指向临时目录
+            env = dict(os.environ, DATA_DIR=os.path.join(temp_dir, 'data'), LOG_DIR=os.path.join(temp_dir, 'logs'))
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run', csv_path],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            report = json.loads(output)
+            report['file_bytes'] = os.path.getsize(csv_path)
+            reports.append(report)
+
+    print(f"{'角色数':>8}  {'阶段':<10}{'峰值':>12}{'常驻':>12}{'数据集估算（累计）':>16}")
+    for report in reports:
+        for item in report['stages']:
+            print(f"{report['characters']:>10}  {item['stage']:<10}{format_size(item['peak_bytes']):>12}"
+                  f"{format_size(item['retained_bytes']):>12}{format_size(item['estimated_bytes']):>14}")
+        print(f"{'':>10}  文件 {format_size(report['file_bytes'])}，/votes-by-rounds 响应 {format_size(report['payload_bytes'])}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+生成合成的赛季数据文件，用于基准测试和压力测试
+
+列结构与真实数据一致（序号、角色、作品、CV、各投票轮次、累计得票数），投票轮次取自赛季配置。
+每轮随机淘汰一部分角色（之后的轮次为空），少量单元格使用 "a/b" 形式的票数。
+participation 小于 1 时角色还会随机缺席部分轮次，用于生成缺票较多的数据。
+
+用法：python scripts/synthetic_season.py --characters 50000 --output data/bench/2023_season.csv
+"""
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config.seasons_rounds import get_season_rounds
+
+
+def generate_season_csv(output_path: str, season: str = '2023', characters: int = 10000,
+                        series_count: int = None, slash_ratio: float = 0.01, seed: int = 0,
+                        participation: float = 1.0) -> str:
+    """
+    生成合成的赛季 CSV
+
+    :param output_path: 输出路径（文件名需包含 "<赛季>_season" 才能被识别）
+    :param season: 赛季，决定投票轮次
+    :param characters: 角色数量
+    :param series_count: 作品数量，默认约为角色数的三分之一
+    :param slash_ratio: 使用 "a/b" 形式票数的单元格比例
+    :param seed: 随机种子
+    :param participation: 未被淘汰的角色参加每一轮的概率
+    :return: 输出路径
+    """
+    rng = np.random.default_rng(seed)
+    rounds = get_season_rounds(season)
+    series_count = series_count or max(1, characters // 3)
+
+    # 每个角色有一个基础人气，各轮票数在其附近波动
+    popularity = rng.lognormal(mean=7.5, sigma=0.6, size=characters)
+    votes = np.round(popularity[:, None] * rng.uniform(0.6, 1.4, size=(characters, len(rounds))))
+
+    # 每轮淘汰一部分角色，淘汰后的轮次为空
+    survive_rounds = rng.integers(1, len(rounds) + 1, size=characters)
+    votes[np.arange(len(rounds))[None, :] >= survive_rounds[:, None]] = np.nan
+    if participation < 1:
+        votes[rng.random(votes.shape) >= participation] = np.nan
+
+    cells = pd.DataFrame(votes, columns=rounds).astype(object)
+    for column in rounds:
+        column_votes = votes[:, rounds.index(column)]
+        valid = ~np.isnan(column_votes)
+        text = np.where(valid, np.char.mod('%.1f', np.nan_to_num(column_votes)), '')
+        # 少量票数拆分为 "a/b" 形式（两部分之和等于原票数）
+        split = valid & (rng.random(characters) < slash_ratio)
+        first = np.floor(np.nan_to_num(column_votes) / 2)
+        text[split] = [f"{int(a)}/{int(v - a)}" for a, v in zip(first[split], column_votes[split])]
+        cells[column] = text
+
+    data = pd.DataFrame({
+        '序号': np.arange(1, characters + 1),
+        '角色': [f"角色{index:06d}" for index in range(characters)],
+        '作品': [f"作品{index:05d}" for index in rng.integers(0, series_count, size=characters)],
+        'CV': [f"声优{index:05d}" for index in rng.integers(0, series_count, size=characters)],
+    })
+    data = pd.concat([data, cells], axis=1)
+    data['累计得票数'] = np.nansum(votes, axis=1).astype(int)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    data.to_csv(output_path, index=False)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成的赛季数据文件')
+    parser.add_argument('--output', required=True, help='输出路径，文件名需包含 "<赛季>_season"')
+    parser.add_argument('--season', default='2023', help='赛季')
+    parser.add_argument('--characters', type=int, default=10000, help='角色数量')
+    parser.add_argument('--slash-ratio', type=float, default=0.01, help='使用 "a/b" 形式票数的单元格比例')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--participation', type=float, default=1.0, help='未被淘汰的角色参加每一轮的概率')
+    args = parser.parse_args()
+
+    path = generate_season_csv(args.output, args.season, args.characters, slash_ratio=args.slash_ratio, seed=args.seed,
+                               participation=args.participation)
+    print(f"已生成 {args.characters} 个角色的合成数据: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,11 @@
-from .vote_tracker import VoteTracker
 from .logger import logger
 
 __all__ = ['VoteTracker', 'logger']
+
+
+def __getattr__(name):
+    # VoteTracker 依赖 pandas，按需导入以缩短启动时间
+    if name == 'VoteTracker':
+        from .vote_tracker import VoteTracker
+        return VoteTracker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
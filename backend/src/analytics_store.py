@@ -0,0 +1,270 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Optional, Any, TYPE_CHECKING
+from config.seasons_rounds import get_round_stage
+from .logger import logger
+
+if TYPE_CHECKING:
+    from .vote_tracker import VoteTracker
+    from .dataset_store import DatasetStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seasons (
+    season TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    loaded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS characters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    series TEXT NOT NULL,
+    UNIQUE (name, series)
+);
+CREATE INDEX IF NOT EXISTS idx_characters_series ON characters (series);
+CREATE TABLE IF NOT EXISTS rounds (
+    season TEXT NOT NULL,
+    round_ordinal INTEGER NOT NULL,
+    round TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    is_wildcard INTEGER NOT NULL,
+    PRIMARY KEY (season, round_ordinal)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS votes (
+    season TEXT NOT NULL,
+    round_ordinal INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    character_id INTEGER NOT NULL REFERENCES characters (id),
+    votes REAL NOT NULL,
+    PRIMARY KEY (season, round_ordinal, character_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_votes_character ON votes (character_id, season, round_ordinal);
+CREATE INDEX IF NOT EXISTS idx_votes_season_stage ON votes (season, stage);
+"""
+
+# 固定的跨赛季查询：SQL 中的 {where} 替换为按传入参数拼接的过滤条件，参数值全部通过占位符绑定
+QUERIES = {
+    'character_history': {
+        'description': "角色在各赛季各阶段的得票合计、有票轮次数和单轮最高票数",
+        'required': ['character'],
+        'filters': {
+            'character': "c.name = :character",
+            'series': "c.series = :series",
+            'season': "v.season = :season"
+        },
+        'sql': """
+            SELECT v.season, c.name AS character, c.series, v.stage,
+                   ROUND(SUM(v.votes), 2) AS total, COUNT(*) AS rounds, MAX(v.votes) AS best_round_votes,
+                   MAX(v.round_ordinal) AS last_round_ordinal
+            FROM votes v JOIN characters c ON c.id = v.character_id
+            {where}
+            GROUP BY v.season, c.id, v.stage
+            ORDER BY v.season, c.series, MIN(v.round_ordinal)
+        """
+    },
+    'series_totals': {
+        'description': "每个赛季各作品的得票合计和参赛角色数（按合计降序，每个赛季最多 limit 个作品）",
+        'required': [],
+        'filters': {
+            'season': "v.season = :season",
+            'stage': "v.stage = :stage"
+        },
+        'sql': """
+            SELECT season, series, total, characters FROM (
+                SELECT v.season, c.series, ROUND(SUM(v.votes), 2) AS total,
+                       COUNT(DISTINCT v.character_id) AS characters,
+                       ROW_NUMBER() OVER (PARTITION BY v.season ORDER BY SUM(v.votes) DESC) AS position
+                FROM votes v JOIN characters c ON c.id = v.character_id
+                {where}
+                GROUP BY v.season, c.series
+            )
+            WHERE position <= :limit
+            ORDER BY season, position
+        """
+    },
+    'top_characters': {
+        'description': "每个赛季得票合计最高的角色（可限定阶段，每个赛季最多 limit 个角色）",
+        'required': [],
+        'filters': {
+            'season': "v.season = :season",
+            'stage': "v.stage = :stage",
+            'series': "c.series = :series"
+        },
+        'sql': """
+            SELECT season, character, series, total, rounds, position FROM (
+                SELECT v.season, c.name AS character, c.series, ROUND(SUM(v.votes), 2) AS total, COUNT(*) AS rounds,
+                       RANK() OVER (PARTITION BY v.season ORDER BY SUM(v.votes) DESC) AS position
+                FROM votes v JOIN characters c ON c.id = v.character_id
+                {where}
+                GROUP BY v.season, c.id
+            )
+            WHERE position <= :limit
+            ORDER BY season, position, character
+        """
+    },
+    'stage_totals': {
+        'description': "每个赛季各阶段的得票合计、参赛角色数和单轮平均票数",
+        'required': [],
+        'filters': {
+            'season': "v.season = :season"
+        },
+        'sql': """
+            SELECT v.season, v.stage, ROUND(SUM(v.votes), 2) AS total,
+                   COUNT(DISTINCT v.character_id) AS characters, ROUND(AVG(v.votes), 2) AS mean_votes
+            FROM votes v
+            {where}
+            GROUP BY v.season, v.stage
+            ORDER BY v.season, MIN(v.round_ordinal)
+        """
+    },
+    'season_summary': {
+        'description': "每个赛季的角色数、轮次数、得票合计和单轮最高票数",
+        'required': [],
+        'filters': {
+            'season': "v.season = :season"
+        },
+        'sql': """
+            SELECT v.season, s.version, COUNT(DISTINCT v.character_id) AS characters,
+                   COUNT(DISTINCT v.round_ordinal) AS rounds, ROUND(SUM(v.votes), 2) AS total, MAX(v.votes) AS max_round_votes
+            FROM votes v JOIN seasons s ON s.season = v.season
+            {where}
+            GROUP BY v.season
+            ORDER BY v.season
+        """
+    }
+}
+
+
+class AnalyticsStore:
+    """
+    跨赛季分析用的 SQLite 数据库
+
+    每个赛季的最新版本以长表形式保存：votes (赛季, 轮次序号, 阶段, 角色 id, 票数)，只保存有票数的单元格；
+    角色 (角色名, 作品) 在 characters 表中只保存一份，跨赛季共用同一个 id。
+    过滤和聚合都在数据库中完成，不需要把各赛季加载到内存。
+
+    数据库在首次使用时创建；写入时整个赛季在一个事务中替换，读取不受影响（WAL 模式）。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                self._initialized = True
+            connection.row_factory = sqlite3.Row
+            yield connection
+        finally:
+            connection.close()
+
+    def get_versions(self) -> Dict[str, str]:
+        """获取数据库中每个赛季的数据集版本"""
+        with self._connect() as connection:
+            return {row['season']: row['version'] for row in connection.execute("SELECT season, version FROM seasons")}
+
+    def write_season(self, tracker: "VoteTracker"):
+        """
+        以长表形式写入（替换）一个赛季的票数
+
+        :param tracker: 该赛季的数据集，version 为写入的版本
+        """
+        import numpy as np
+
+        votes = tracker.get_vote_view()['votes']
+        rows, round_ordinals = np.nonzero(~np.isnan(votes))
+        stages = [get_round_stage(round_name) for round_name in tracker.vote_columns]
+        wildcard_rounds = set(tracker.wildcard_rounds or [])
+
+        with self._write_lock, self._connect() as connection:
+            with connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO characters (name, series) VALUES (?, ?)",
+                    zip(tracker.characters, tracker.series)
+                )
+                character_ids = {
+                    (row['name'], row['series']): row['id']
+                    for row in connection.execute("SELECT id, name, series FROM characters")
+                }
+                row_ids = [character_ids[key] for key in zip(tracker.characters, tracker.series)]
+
+                connection.execute("DELETE FROM votes WHERE season = ?", (tracker.season,))
+                connection.execute("DELETE FROM rounds WHERE season = ?", (tracker.season,))
+                connection.executemany(
+                    "INSERT INTO rounds (season, round_ordinal, round, stage, is_wildcard) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (tracker.season, ordinal, round_name, stages[ordinal], int(round_name in wildcard_rounds))
+                        for ordinal, round_name in enumerate(tracker.vote_columns)
+                    ]
+                )
+                connection.executemany(
+                    "INSERT INTO votes (season, round_ordinal, stage, character_id, votes) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (tracker.season, ordinal, stages[ordinal], row_ids[row], value)
+                        for row, ordinal, value in zip(rows.tolist(), round_ordinals.tolist(), votes[rows, round_ordinals].tolist())
+                    )
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO seasons (season, version, loaded_at) VALUES (?, ?, ?)",
+                    (tracker.season, tracker.version, datetime.now().isoformat())
+                )
+        logger.info(f"分析数据库已写入 {tracker.season} 赛季（{len(rows)} 条票数）")
+
+    def sync(self, dataset_store: "DatasetStore") -> List[str]:
+        """
+        将数据集存储中每个赛季的最新版本同步到数据库，已是最新版本的赛季跳过
+
+        :return: 本次写入的赛季
+        """
+        from .vote_tracker import VoteTracker
+
+        versions = self.get_versions()
+        synced = []
+        for season, entry in dataset_store.list_seasons().items():
+            file_hash = entry['latest']
+            if not file_hash or versions.get(season) == file_hash:
+                continue
+            try:
+                blob = dataset_store.get_blob(file_hash)
+                tracker = VoteTracker(dataset_store.get_blob_path(file_hash), blob['filename'])
+                tracker.version = file_hash
+                self.write_season(tracker)
+                synced.append(season)
+            except Exception as e:
+                logger.error(f"同步 {season} 赛季到分析数据库失败: {str(e)}")
+        return synced
+
+    def query(self, name: str, params: Dict[str, Any], limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        执行固定的跨赛季查询
+
+        :param name: 查询名称（QUERIES 中的键）
+        :param params: 查询参数，值为 None 的参数不参与过滤
+        :param limit: 每个赛季最多返回的条数（只对分组取前几名的查询有效）
+        :return: 结果行
+        :raises: KeyError 查询不存在
+        :raises: ValueError 缺少必需的参数
+        """
+        if name not in QUERIES:
+            raise KeyError(f"查询不存在: {name}")
+        definition = QUERIES[name]
+        missing = [param for param in definition['required'] if params.get(param) is None]
+        if missing:
+            raise ValueError(f"查询 {name} 缺少参数: {missing}")
+
+        bound = {param: value for param, value in params.items() if value is not None and param in definition['filters']}
+        clauses = [definition['filters'][param] for param in bound]
+        sql = definition['sql'].format(where=f"WHERE {' AND '.join(clauses)}" if clauses else '')
+        bound['limit'] = limit
+        with self._connect() as connection:
+            return [dict(row) for row in connection.execute(sql, bound)]
@@ -0,0 +1,235 @@
+import os
+import re
+import shutil
+import tarfile
+import zipfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+from .logger import logger
+from .dataset_store import DatasetStore, hash_file
+
+# 压缩包中只导入符合赛季命名的 CSV（与 VoteTracker.get_season_from_filename 一致）
+SEASON_FILE_PATTERN = re.compile(r'^(\d{4})_season\.csv$')
+# 流式复制时每次读取的字节数
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def copy_with_limit(source, target, limit: Optional[int], error: str) -> int:
+    """
+    流式复制文件对象，超过 limit 字节时立即停止（不依赖压缩包中声明的大小）
+
+    :param source: 源文件对象
+    :param target: 目标文件对象
+    :param limit: 最多复制的字节数，None 表示不限制
+    :param error: 超出限制时的错误信息
+    :return: 复制的字节数
+    :raises: ValueError 超出限制
+    """
+    copied = 0
+    while True:
+        buffer = source.read(COPY_BUFFER_SIZE)
+        if not buffer:
+            return copied
+        copied += len(buffer)
+        if limit is not None and copied > limit:
+            raise ValueError(error)
+        target.write(buffer)
+
+
+def extract_season_files(archive_path: str, target_dir: str, max_members: Optional[int] = None,
+                         max_member_size: Optional[int] = None,
+                         max_total_size: Optional[int] = None) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]]]:
+    """
+    从 zip / tar 压缩包（或目录）中取出赛季 CSV 文件
+
+    只按文件名（不含目录）匹配 <年份>_season.csv，解压时不使用压缩包内的路径，避免写到目标目录之外。
+    解压时按实际写出的字节数检查单个文件和全部文件的大小上限，条目数超过上限或任一上限被突破时拒绝整个压缩包
+    （已解压的文件由调用方随临时目录一起删除）。
+
+    :param archive_path: 压缩包或目录路径
+    :param target_dir: 解压目录
+    :param max_members: 压缩包内的条目数上限，None 表示不限制（下同）
+    :param max_member_size: 单个文件解压后的大小上限（字节）
+    :param max_total_size: 全部文件解压后的大小上限（字节）
+    :return: ([(文件名, 文件路径), ...], 被跳过的文件 [{'filename', 'status', 'error'}, ...])
+    :raises: ValueError 格式不支持或超出上限
+    """
+    files, skipped = [], []
+    extracted_bytes = 0
+
+    def check_member_count(count: int):
+        if max_members is not None and count > max_members:
+            raise ValueError(f"压缩包中的条目数超过上限 {max_members}")
+
+    def extract(source, filename: str) -> str:
+        nonlocal extracted_bytes
+        limits = [limit for limit in (max_member_size, None if max_total_size is None else max_total_size - extracted_bytes)
+                  if limit is not None]
+        path = os.path.join(target_dir, filename)
+        with open(path, 'wb') as target:
+            extracted_bytes += copy_with_limit(
+                source, target, min(limits) if limits else None,
+                f"{filename} 解压后超过大小上限（单个文件 {max_member_size} 字节，合计 {max_total_size} 字节）"
+            )
+        return path
+
+    def accept(name: str) -> Optional[str]:
+        filename = os.path.basename(name)
+        if not filename or filename.startswith('.'):
+            return None
+        if not SEASON_FILE_PATTERN.match(filename):
+            skipped.append({'filename': name, 'status': 'skipped', 'error': "文件名不是 <年份>_season.csv"})
+            return None
+        if any(existing == filename for existing, _ in files):
+            skipped.append({'filename': name, 'status': 'failed', 'error': f"压缩包中有多个 {filename}"})
+            return None
+        return filename
+
+    if os.path.isdir(archive_path):
+        for name in sorted(os.listdir(archive_path)):
+            path = os.path.join(archive_path, name)
+            if os.path.isfile(path) and accept(name):
+                files.append((name, path))
+    elif zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            members = archive.infolist()
+            check_member_count(len(members))
+            for member in members:
+                filename = None if member.is_dir() else accept(member.filename)
+                if filename:
+                    with archive.open(member) as source:
+                        files.append((filename, extract(source, filename)))
+    elif tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path) as archive:
+            # 逐个读取条目头，条目数超过上限时不再继续（压缩的 tar 没有中央目录，getmembers 会读完整个流）
+            count = 0
+            for member in archive:
+                count += 1
+                check_member_count(count)
+                filename = accept(member.name) if member.isfile() else None
+                if filename:
+                    with archive.extractfile(member) as source:
+                        files.append((filename, extract(source, filename)))
+    else:
+        raise ValueError("不支持的压缩包格式，请使用 zip 或 tar（.tar.gz）")
+
+    return files, skipped
+
+
+def validate_season_file(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在工作进程中计算文件哈希并解析校验（供 ProcessPoolExecutor 调用）
+
+    已入库的文件（哈希在 known_hashes 中）不再解析。
+
+    :param task: {'filename', 'path', 'known_hashes'}
+    :return: {'filename', 'path', 'hash', 'size', 'status', 'season', 'metadata', 'error'}
+    """
+    result = {
+        'filename': task['filename'],
+        'path': task['path'],
+        'hash': None,
+        'size': None,
+        'status': 'failed',
+        'season': None,
+        'metadata': None,
+        'error': None
+    }
+    try:
+        result['hash'] = hash_file(task['path'])
+        result['size'] = os.path.getsize(task['path'])
+        if result['hash'] in task['known_hashes']:
+            result['status'] = 'unchanged'
+            return result
+
+        from .vote_tracker import VoteTracker
+        vote_tracker = VoteTracker(task['path'], task['filename'])
+        result['status'] = 'created'
+        result['season'] = vote_tracker.season
+        result['metadata'] = {
+            'total_characters': len(vote_tracker.data),
+            'vote_rounds': vote_tracker.vote_columns
+        }
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def parse_in_parallel(tasks: List[Dict[str, Any]], workers: int) -> Iterable[Dict[str, Any]]:
+    """按文件并行校验；只有一个文件或一个工作进程时直接在当前进程中执行"""
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        return [validate_season_file(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(validate_season_file, tasks))
+
+
+def ingest_archive(archive_path: str, store: DatasetStore, workers: Optional[int] = None,
+                   limits: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    批量导入压缩包中的多个赛季
+
+    流程：解压出所有 <年份>_season.csv → 在进程池中并行计算哈希并解析校验 →
+    通过校验的文件一次性写入数据集存储（只写一次 manifest），每个赛季的最新版本设为导入的文件。
+    某个文件校验失败不影响其他文件。
+
+    :param archive_path: zip / tar 压缩包或包含 CSV 的目录
+    :param store: 数据集存储
+    :param workers: 并行进程数，默认为 CPU 核数
+    :param limits: 解压上限 {'max_members', 'max_member_size', 'max_total_size'}（见 extract_season_files），默认不限制
+    :return: {
+        'files': 每个文件的结果 [{'filename', 'status': created | unchanged | failed | skipped, 'season', 'hash', 'error', ...}],
+        'seasons': 本次导入后每个赛季的最新版本哈希
+    }
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(store.data_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=store.data_dir) as temp_dir:
+        files, report = extract_season_files(archive_path, temp_dir, **(limits or {}))
+        if not files and not report:
+            raise ValueError("压缩包中没有文件")
+
+        known_hashes = store.list_hashes()
+        tasks = [{'filename': filename, 'path': path, 'known_hashes': known_hashes} for filename, path in files]
+        results = parse_in_parallel(tasks, workers)
+
+        entries, seasons = [], {}
+        for result in results:
+            if result['status'] == 'unchanged':
+                # 已有文件不复制，只设为该赛季的最新版本
+                blob = store.get_blob(result['hash'])
+                result['season'] = blob['season']
+                entries.append({'temp_path': None, 'hash': result['hash'], 'season': blob['season']})
+            elif result['status'] == 'created' and any(entry['hash'] == result['hash'] for entry in entries):
+                # 压缩包中内容相同的文件只保存一份
+                entries.append({'temp_path': None, 'hash': result['hash'], 'season': result['season']})
+            elif result['status'] == 'created':
+                # 从目录导入时不能移动原文件，先复制一份
+                temp_path = os.path.join(temp_dir, f"{result['hash']}.csv")
+                if os.path.dirname(os.path.abspath(result['path'])) == os.path.abspath(temp_dir):
+                    os.replace(result['path'], temp_path)
+                else:
+                    shutil.copyfile(result['path'], temp_path)
+                entries.append({
+                    'temp_path': temp_path,
+                    'hash': result['hash'],
+                    'filename': result['filename'],
+                    'season': result['season'],
+                    'size': result['size'],
+                    'metadata': result['metadata']
+                })
+            if result['season'] and result['status'] != 'failed':
+                seasons[result['season']] = result['hash']
+
+        store.add_many(entries)
+
+    for result in results:
+        if result['status'] == 'failed':
+            logger.warning(f"导入 {result['filename']} 失败: {result['error']}")
+        report.append({key: result[key] for key in ('filename', 'status', 'season', 'hash', 'size', 'metadata', 'error')})
+
+    created = sum(1 for item in report if item['status'] == 'created')
+    logger.info(f"批量导入完成: {len(files)} 个赛季文件，新增 {created} 个，使用 {min(workers, max(len(files), 1))} 个进程")
+    return {'files': report, 'seasons': seasons}
@@ -0,0 +1,352 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Any
+from .logger import logger
+
+# 单个分块的大小上限
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class ChunkedUploadManager:
+    """
+    可续传的分块上传
+
+    流程：initiate 创建会话并预分配文件 → 以任意顺序上传编号分块（到达时校验分块哈希，
+    直接写入文件中对应的偏移位置）→ 查询状态获取缺失的分块 → finalize 完成上传。
+
+    会话目录中 state.json 只在创建时写入一次；每收到一个分块向 chunks.log 追加一行"序号 哈希"，
+    写入量与分块数成正比。服务重启后从这两个文件恢复会话。
+
+    每个会话有自己的锁，不同会话的分块可以并行写入；分块哈希在加锁前计算。
+
+    整个文件的 SHA-256 随分块到达增量计算：按顺序到达的分块直接计入，
+    乱序到达的分块在前面的空缺补齐后从磁盘读一次计入，finalize 时不需要重新读取整个文件。
+    服务重启后增量哈希状态丢失，finalize 时会退回到完整读取一次文件。
+
+    文件大小和分块数有上限，避免一个请求预分配任意大的文件或生成巨大的缺失分块列表；
+    超过 session_ttl_seconds 没有新分块的会话在创建新会话时删除。
+    """
+
+    def __init__(self, upload_dir: str, max_total_size: int, max_chunks: int, session_ttl_seconds: int):
+        """
+        :param upload_dir: 会话目录
+        :param max_total_size: 单个文件的大小上限（字节）
+        :param max_chunks: 单个会话的分块数上限
+        :param session_ttl_seconds: 未完成的会话在最后一次写入后保留的时间
+        """
+        self.upload_dir = upload_dir
+        self.max_total_size = max_total_size
+        self.max_chunks = max_chunks
+        self.session_ttl_seconds = session_ttl_seconds
+        self._lock = threading.Lock()  # 只保护 _sessions 字典本身
+        # upload_id -> {'state', 'received': {序号: 哈希}, 'received_bytes', 'lock',
+        #               'hasher': 增量哈希对象（重启后为 None）, 'next_index': 下一个待计入的分块序号, 'closed'}
+        self._sessions = {}
+
+    def _session_dir(self, upload_id: str) -> str:
+        if not upload_id.isalnum():
+            raise KeyError(f"上传会话不存在: {upload_id}")
+        return os.path.join(self.upload_dir, upload_id)
+
+    def _data_path(self, upload_id: str) -> str:
+        return os.path.join(self._session_dir(upload_id), 'data.part')
+
+    def _log_path(self, upload_id: str) -> str:
+        return os.path.join(self._session_dir(upload_id), 'chunks.log')
+
+    def _chunk_length(self, state: Dict[str, Any], index: int) -> int:
+        offset = index * state['chunk_size']
+        return min(state['chunk_size'], state['total_size'] - offset)
+
+    def _load_session(self, upload_id: str) -> Dict[str, Any]:
+        """从会话目录恢复会话（服务重启后），中断时写了一半的日志行忽略"""
+        state_path = os.path.join(self._session_dir(upload_id), 'state.json')
+        if not os.path.exists(state_path):
+            raise KeyError(f"上传会话不存在: {upload_id}")
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        received = {}
+        if os.path.exists(self._log_path(upload_id)):
+            with open(self._log_path(upload_id), 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[0].isdigit() and len(parts[1]) == 64:
+                        received[int(parts[0])] = parts[1]
+        return {
+            'state': state,
+            'received': received,
+            'received_bytes': sum(self._chunk_length(state, index) for index in received),
+            'lock': threading.Lock(),
+            'hasher': None,
+            'next_index': 0,
+            'closed': False
+        }
+
+    def _get_session(self, upload_id: str) -> Dict[str, Any]:
+        """
+        获取会话（不在内存中时从磁盘恢复）
+
+        :raises: KeyError 如果会话不存在
+        """
+        with self._lock:
+            if upload_id not in self._sessions:
+                self._sessions[upload_id] = self._load_session(upload_id)
+            return self._sessions[upload_id]
+
+    def _close_session(self, upload_id: str, session: Dict[str, Any]):
+        """删除会话（调用方持有会话锁）"""
+        session['closed'] = True
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+        with self._lock:
+            if self._sessions.get(upload_id) is session:
+                del self._sessions[upload_id]
+
+    @staticmethod
+    def _describe(upload_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+        """完整的会话状态，包含已收到和缺失的分块列表"""
+        state, received = session['state'], session['received']
+        return {
+            'upload_id': upload_id,
+            'filename': state['filename'],
+            'total_size': state['total_size'],
+            'chunk_size': state['chunk_size'],
+            'total_chunks': state['total_chunks'],
+            'received_chunks': sorted(received),
+            'missing_chunks': [index for index in range(state['total_chunks']) if index not in received],
+            'received_bytes': session['received_bytes'],
+            'created_at': state['created_at']
+        }
+
+    @staticmethod
+    def _progress(upload_id: str, index: int, session: Dict[str, Any]) -> Dict[str, Any]:
+        """写入分块后的上传进度，只包含计数（完整列表见 get_status）"""
+        state = session['state']
+        received_count = len(session['received'])
+        return {
+            'upload_id': upload_id,
+            'index': index,
+            'total_size': state['total_size'],
+            'total_chunks': state['total_chunks'],
+            'received_count': received_count,
+            'missing_count': state['total_chunks'] - received_count,
+            'received_bytes': session['received_bytes']
+        }
+
+    def initiate(self, filename: str, total_size: int, chunk_size: int, file_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        创建上传会话
+
+        :param filename: 原始文件名
+        :param total_size: 文件总大小
+        :param chunk_size: 分块大小（最后一块可以更小）
+        :param file_sha256: 整个文件的 SHA-256（可选，提供时 finalize 会校验）
+        :return: 会话状态
+        :raises: ValueError 如果参数无效
+        """
+        if total_size <= 0 or total_size > self.max_total_size:
+            raise ValueError(f"文件大小必须在 1 到 {self.max_total_size} 字节之间")
+        if chunk_size <= 0 or chunk_size > MAX_CHUNK_SIZE:
+            raise ValueError(f"分块大小必须在 1 到 {MAX_CHUNK_SIZE} 字节之间")
+        total_chunks = (total_size + chunk_size - 1) // chunk_size
+        if total_chunks > self.max_chunks:
+            raise ValueError(f"分块数不能超过 {self.max_chunks}，请增大分块大小")
+
+        self.expire_sessions()
+
+        upload_id = uuid.uuid4().hex
+        session_dir = self._session_dir(upload_id)
+        os.makedirs(session_dir, exist_ok=True)
+        # 预分配文件，分块直接写入对应偏移
+        with open(self._data_path(upload_id), 'wb') as f:
+            f.truncate(total_size)
+
+        state = {
+            'filename': filename,
+            'total_size': total_size,
+            'chunk_size': chunk_size,
+            'total_chunks': total_chunks,
+            'file_sha256': file_sha256.lower() if file_sha256 else None,
+            'created_at': datetime.now().isoformat()
+        }
+        with open(os.path.join(session_dir, 'state.json'), 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+
+        session = {
+            'state': state,
+            'received': {},
+            'received_bytes': 0,
+            'lock': threading.Lock(),
+            'hasher': hashlib.sha256(),
+            'next_index': 0,
+            'closed': False
+        }
+        with self._lock:
+            self._sessions[upload_id] = session
+        logger.info(f"创建分块上传会话: {upload_id}（{filename}，{total_chunks} 块）")
+        return self._describe(upload_id, session)
+
+    def put_chunk(self, upload_id: str, index: int, data: bytes, chunk_sha256: str) -> Dict[str, Any]:
+        """
+        写入一个分块
+
+        :param upload_id: 会话 ID
+        :param index: 分块序号（从 0 开始）
+        :param data: 分块内容
+        :param chunk_sha256: 分块的 SHA-256，与内容不一致时拒绝写入
+        :return: 上传进度（已收到 / 缺失的分块数和字节数）
+        :raises: KeyError 如果会话不存在
+        :raises: ValueError 如果分块序号、大小或哈希不正确
+        """
+        session = self._get_session(upload_id)
+        state = session['state']
+        if index < 0 or index >= state['total_chunks']:
+            raise ValueError(f"分块序号超出范围: {index}")
+        expected_length = self._chunk_length(state, index)
+        if len(data) != expected_length:
+            raise ValueError(f"分块 {index} 大小不正确: 期望 {expected_length} 字节，实际 {len(data)} 字节")
+        # 哈希在加锁前计算，不阻塞同一会话的其他分块
+        actual_sha256 = hashlib.sha256(data).hexdigest()
+        if actual_sha256 != chunk_sha256.lower():
+            raise ValueError(f"分块 {index} 哈希校验失败")
+
+        with session['lock']:
+            if session['closed']:
+                raise KeyError(f"上传会话不存在: {upload_id}")
+            # 重复上传相同的分块直接视为成功
+            if index in session['received']:
+                return self._progress(upload_id, index, session)
+
+            with open(self._data_path(upload_id), 'r+b') as f:
+                f.seek(index * state['chunk_size'])
+                f.write(data)
+            # 先写数据再记录，日志中出现的分块一定已经写入
+            with open(self._log_path(upload_id), 'a', encoding='utf-8') as f:
+                f.write(f"{index} {actual_sha256}\n")
+
+            session['received'][index] = actual_sha256
+            session['received_bytes'] += len(data)
+            self._advance_hash(upload_id, session, index, data)
+            return self._progress(upload_id, index, session)
+
+    def _advance_hash(self, upload_id: str, session: Dict[str, Any], index: int, data: bytes):
+        """将连续到达的分块计入整个文件的增量哈希（调用方持有会话锁）"""
+        hasher, next_index = session['hasher'], session['next_index']
+        if hasher is None or index != next_index:
+            return
+
+        state, received = session['state'], session['received']
+        hasher.update(data)
+        next_index += 1
+        # 补上之前乱序到达、已写入磁盘的分块
+        if next_index in received:
+            with open(self._data_path(upload_id), 'rb') as f:
+                while next_index in received:
+                    f.seek(next_index * state['chunk_size'])
+                    hasher.update(f.read(self._chunk_length(state, next_index)))
+                    next_index += 1
+        session['next_index'] = next_index
+
+    def get_status(self, upload_id: str) -> Dict[str, Any]:
+        """
+        获取会话状态
+
+        :raises: KeyError 如果会话不存在
+        """
+        session = self._get_session(upload_id)
+        with session['lock']:
+            if session['closed']:
+                raise KeyError(f"上传会话不存在: {upload_id}")
+            return self._describe(upload_id, session)
+
+    def finalize(self, upload_id: str, target_dir: str) -> Dict[str, Any]:
+        """
+        完成上传：确认分块齐全，将文件移动到目标目录并删除会话
+
+        :param upload_id: 会话 ID
+        :param target_dir: 文件移动到的目录（需与会话目录在同一文件系统）
+        :return: {'path', 'filename', 'hash', 'size'}
+        :raises: KeyError 如果会话不存在
+        :raises: ValueError 如果分块不齐全或整个文件的哈希不一致
+        """
+        session = self._get_session(upload_id)
+        state = session['state']
+        with session['lock']:
+            if session['closed']:
+                raise KeyError(f"上传会话不存在: {upload_id}")
+            missing = state['total_chunks'] - len(session['received'])
+            if missing:
+                raise ValueError(f"还有 {missing} 个分块未上传")
+
+            if session['hasher'] is not None and session['next_index'] == state['total_chunks']:
+                file_hash = session['hasher'].hexdigest()
+            else:
+                # 服务重启后没有增量哈希，只能完整读取一次
+                from .dataset_store import hash_file
+                file_hash = hash_file(self._data_path(upload_id))
+
+            if state['file_sha256'] and state['file_sha256'] != file_hash:
+                raise ValueError("文件哈希校验失败")
+
+            os.makedirs(target_dir, exist_ok=True)
+            target_path = os.path.join(target_dir, f"upload_{upload_id}.csv")
+            os.replace(self._data_path(upload_id), target_path)
+            self._close_session(upload_id, session)
+
+        logger.info(f"分块上传完成: {upload_id}（{state['filename']}）")
+        return {'path': target_path, 'filename': state['filename'], 'hash': file_hash, 'size': state['total_size']}
+
+    def expire_sessions(self) -> int:
+        """
+        删除超过保留时间没有新分块的会话
+
+        :return: 删除的会话数
+        """
+        if not os.path.isdir(self.upload_dir):
+            return 0
+        deadline = time.time() - self.session_ttl_seconds
+        expired = []
+        for upload_id in os.listdir(self.upload_dir):
+            session_dir = os.path.join(self.upload_dir, upload_id)
+            # 每收到一个分块都会追加 chunks.log，以它（还没有分块时以 state.json）的修改时间作为最后活动时间
+            try:
+                last_active = max(
+                    os.path.getmtime(os.path.join(session_dir, name))
+                    for name in ('chunks.log', 'state.json', '')
+                    if os.path.exists(os.path.join(session_dir, name))
+                )
+            except (OSError, ValueError):
+                continue
+            if last_active < deadline:
+                expired.append(upload_id)
+
+        for upload_id in expired:
+            with self._lock:
+                session = self._sessions.get(upload_id)
+            if session is None:
+                shutil.rmtree(os.path.join(self.upload_dir, upload_id), ignore_errors=True)
+                continue
+            with session['lock']:
+                if not session['closed']:
+                    self._close_session(upload_id, session)
+        if expired:
+            logger.info(f"删除 {len(expired)} 个过期的分块上传会话")
+        return len(expired)
+
+    def abort(self, upload_id: str):
+        """
+        取消上传并删除会话
+
+        :raises: KeyError 如果会话不存在
+        """
+        session = self._get_session(upload_id)
+        with session['lock']:
+            if session['closed']:
+                raise KeyError(f"上传会话不存在: {upload_id}")
+            self._close_session(upload_id, session)
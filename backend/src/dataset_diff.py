@@ -0,0 +1,97 @@
+import numpy as np
+from typing import List, Dict, Optional, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .vote_tracker import VoteTracker
+
+
+def compute_delta(base: Optional["VoteTracker"], target: "VoteTracker", excluded_columns=None,
+                  exclude_wildcard: bool = False, exclude_ranking: bool = False) -> Dict[str, Any]:
+    """
+    计算两个数据集版本之间的增量
+
+    按 (角色, 作品) 对齐两个版本在同一过滤条件下的票数矩阵，只返回有变化的单元格。
+    赛季或轮次配置不同、或缺少基准版本时无法增量更新，full_refresh 为 True。
+
+    :param base: 基准版本（客户端当前持有的数据），可以为 None
+    :param target: 目标版本
+    :param excluded_columns: 要排除的列名列表（与 get_vote_view 相同）
+    :param exclude_wildcard: 是否排除外卡赛
+    :param exclude_ranking: 是否排除排位赛
+    :return: {
+        'season', 'base_version', 'version', 'full_refresh',
+        'new_rounds': 基准版本中没有任何票数、目标版本中有票数的轮次,
+        'changes': [{'character', 'series', 'votes': {轮次: 票数}}, ...],
+        'added_characters', 'removed_characters': [{'character', 'series'}, ...],
+        'participating_counts': 有变化的轮次参与人数
+    }
+    """
+    delta = {
+        'season': target.season,
+        'base_version': base.version if base is not None else None,
+        'version': target.version,
+        'full_refresh': base is None or base.season != target.season or base.vote_columns != target.vote_columns,
+        'new_rounds': [],
+        'changes': [],
+        'added_characters': [],
+        'removed_characters': [],
+        'participating_counts': {}
+    }
+    if delta['full_refresh']:
+        return delta
+
+    base_view = base.get_vote_view(excluded_columns, exclude_wildcard, exclude_ranking)
+    target_view = target.get_vote_view(excluded_columns, exclude_wildcard, exclude_ranking)
+    vote_rounds = target_view['vote_rounds']
+
+    # 目标版本每一行对应的基准版本行，新增的角色为 -1
+    base_rows = {key: row for row, key in enumerate(zip(base.characters, base.series))}
+    target_keys = list(zip(target.characters, target.series))
+    row_map = np.array([base_rows.pop(key, -1) for key in target_keys], dtype=np.int64)
+    matched = row_map >= 0
+
+    base_votes = np.full(target_view['votes'].shape, np.nan)
+    base_votes[matched] = base_view['votes'][row_map[matched]]
+    target_votes = target_view['votes']
+    changed = ~((base_votes == target_votes) | (np.isnan(base_votes) & np.isnan(target_votes)))
+
+    had_votes = ~np.isnan(base_view['votes']).all(axis=0)
+    has_votes = ~np.isnan(target_votes).all(axis=0)
+    delta['new_rounds'] = [round_name for round_name, old, new in zip(vote_rounds, had_votes, has_votes) if new and not old]
+
+    for row in np.flatnonzero(changed.any(axis=1)).tolist():
+        rounds = np.flatnonzero(changed[row]).tolist()
+        delta['changes'].append({
+            'character': target.characters[row],
+            'series': target.series[row],
+            'votes': dict(zip(
+                [vote_rounds[index] for index in rounds],
+                target.serialize_votes(target_votes[row:row + 1, rounds])[0]
+            ))
+        })
+
+    delta['added_characters'] = [
+        {'character': character, 'series': series}
+        for (character, series), is_matched in zip(target_keys, matched.tolist()) if not is_matched
+    ]
+    delta['removed_characters'] = [{'character': character, 'series': series} for character, series in base_rows]
+    delta['participating_counts'] = {
+        round_name: count
+        for round_name, count in target_view['participating_counts'].items()
+        if base_view['participating_counts'].get(round_name) != count
+    }
+    return delta
+
+
+def summarize_delta(delta: Dict[str, Any]) -> List[str]:
+    """生成增量的简短描述，用于日志"""
+    if delta['full_refresh']:
+        return ['需要完整刷新']
+    summary = []
+    if delta['new_rounds']:
+        summary.append(f"新增轮次: {', '.join(delta['new_rounds'])}")
+    if delta['changes']:
+        summary.append(f"{len(delta['changes'])} 个角色的票数有变化")
+    if delta['added_characters'] or delta['removed_characters']:
+        summary.append(f"新增 {len(delta['added_characters'])} 个角色，移除 {len(delta['removed_characters'])} 个角色")
+    return summary or ['无变化']
@@ -0,0 +1,205 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional, Any, BinaryIO, Tuple
+from .logger import logger
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """计算文件的 SHA-256 哈希值"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def copy_and_hash(source: BinaryIO, target: BinaryIO) -> Tuple[str, int]:
+    """
+    复制文件内容的同时计算 SHA-256，避免写入后再读一遍
+
+    :return: (哈希值, 字节数)
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+        hasher.update(chunk)
+        target.write(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+class DatasetStore:
+    """
+    按内容寻址的数据集存储
+
+    上传的文件以 SHA-256 命名保存在 blobs 目录中，manifest.json 记录每个文件的元数据
+    以及每个赛季的版本历史。判断文件是否已上传只需查一次 manifest，不需要重新计算已有文件的哈希。
+
+    manifest 结构：
+    {
+        "blobs": {哈希: {"filename", "season", "size", "total_characters", "vote_rounds", "ingested_at"}},
+        "seasons": {赛季: {"latest": 哈希, "versions": [哈希, ...]}}
+    }
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.blob_dir = os.path.join(data_dir, 'blobs')
+        self.manifest_path = os.path.join(data_dir, 'manifest.json')
+        self._lock = threading.RLock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"读取数据集清单失败: {str(e)}")
+        return {'blobs': {}, 'seasons': {}}
+
+    def _save_manifest(self):
+        """原子地写入 manifest"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def get_blob_path(self, file_hash: str) -> str:
+        """获取哈希对应的文件路径"""
+        return os.path.join(self.blob_dir, f"{file_hash}.csv")
+
+    def get_blob(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """获取哈希对应的元数据，不存在时返回 None"""
+        with self._lock:
+            blob = self._manifest['blobs'].get(file_hash)
+            return dict(blob, hash=file_hash) if blob else None
+
+    def list_hashes(self) -> set:
+        """获取所有已入库文件的哈希"""
+        with self._lock:
+            return set(self._manifest['blobs'])
+
+    def get_hash_for_path(self, file_path: str) -> Optional[str]:
+        """如果路径指向存储中的文件，返回其哈希"""
+        if os.path.abspath(os.path.dirname(file_path)) != os.path.abspath(self.blob_dir):
+            return None
+        file_hash = os.path.splitext(os.path.basename(file_path))[0]
+        with self._lock:
+            return file_hash if file_hash in self._manifest['blobs'] else None
+
+    def get_original_filename(self, file_path: str) -> Optional[str]:
+        """获取存储中文件的原始文件名（用于识别赛季）"""
+        file_hash = self.get_hash_for_path(file_path)
+        return self.get_blob(file_hash)['filename'] if file_hash else None
+
+    def add(self, temp_path: str, file_hash: str, filename: str, season: str, size: int,
+            metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        将已校验的文件加入存储并设为该赛季的最新版本
+
+        :param temp_path: 临时文件路径，加入后会被移动或删除
+        :param file_hash: 入库时计算好的 SHA-256
+        :param filename: 原始文件名
+        :param season: 赛季
+        :param size: 文件大小
+        :param metadata: 额外的元数据（如角色数量、轮次列表）
+        :return: 文件元数据
+        """
+        return self.add_many([{
+            'temp_path': temp_path,
+            'hash': file_hash,
+            'filename': filename,
+            'season': season,
+            'size': size,
+            'metadata': metadata
+        }])[0]
+
+    def add_many(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量加入文件，只写一次 manifest
+
+        :param entries: [{'temp_path', 'hash', 'filename', 'season', 'size', 'metadata'}, ...]，
+            已入库的文件 temp_path 可以为 None，此时只将其设为该赛季的最新版本
+        :return: 每个文件的元数据
+        """
+        os.makedirs(self.blob_dir, exist_ok=True)
+        results = []
+        with self._lock:
+            for entry in entries:
+                file_hash = entry['hash']
+                blob_path = self.get_blob_path(file_hash)
+                if entry['temp_path'] is None:
+                    pass
+                elif os.path.exists(blob_path):
+                    os.unlink(entry['temp_path'])
+                else:
+                    shutil.move(entry['temp_path'], blob_path)
+
+                if file_hash not in self._manifest['blobs']:
+                    self._manifest['blobs'][file_hash] = {
+                        'filename': entry['filename'],
+                        'season': entry['season'],
+                        'size': entry['size'],
+                        'ingested_at': datetime.now().isoformat(),
+                        **(entry.get('metadata') or {})
+                    }
+                self._set_latest(entry['season'], file_hash)
+                results.append(self.get_blob(file_hash))
+            self._save_manifest()
+        return results
+
+    def _set_latest(self, season: str, file_hash: str):
+        season_entry = self._manifest['seasons'].setdefault(season, {'latest': None, 'versions': []})
+        if file_hash not in season_entry['versions']:
+            season_entry['versions'].append(file_hash)
+        season_entry['latest'] = file_hash
+
+    def activate(self, season: str, file_hash: str) -> Dict[str, Any]:
+        """
+        将赛季的已有版本设为最新版本
+
+        :raises: KeyError 如果赛季或版本不存在
+        """
+        with self._lock:
+            season_entry = self._manifest['seasons'].get(season)
+            if not season_entry or file_hash not in season_entry['versions']:
+                raise KeyError(f"赛季 {season} 不存在版本: {file_hash}")
+            self._set_latest(season, file_hash)
+            self._save_manifest()
+            return self.get_blob(file_hash)
+
+    def get_latest(self, season: str) -> Optional[str]:
+        """获取赛季最新版本的哈希"""
+        with self._lock:
+            return self._manifest['seasons'].get(season, {}).get('latest')
+
+    def list_seasons(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有赛季的最新版本和版本数"""
+        with self._lock:
+            return {
+                season: {'latest': entry['latest'], 'version_count': len(entry['versions'])}
+                for season, entry in self._manifest['seasons'].items()
+            }
+
+    def list_versions(self, season: str) -> List[Dict[str, Any]]:
+        """
+        获取赛季的版本历史（按入库顺序）
+
+        :raises: KeyError 如果赛季不存在
+        """
+        with self._lock:
+            if season not in self._manifest['seasons']:
+                raise KeyError(f"赛季不存在: {season}")
+            season_entry = self._manifest['seasons'][season]
+            return [
+                dict(self.get_blob(file_hash), latest=file_hash == season_entry['latest'])
+                for file_hash in season_entry['versions']
+            ]
@@ -0,0 +1,94 @@
+import json
+import asyncio
+import threading
+from typing import Dict, Any
+from .logger import logger
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """将事件格式化为 Server-Sent Events 消息"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+class EventBus:
+    """
+    推送给前端的事件发布 / 订阅
+
+    每个连接有一个有界的发送队列。发布方只向队列投递、从不等待客户端；
+    某个连接的队列满了（客户端读取太慢）时，丢弃它积压的事件，改为放入一条 resync 事件，
+    客户端收到后重新获取完整数据。这样慢客户端既不会拖住服务端，也不会漏掉数据变化。
+
+    publish 可以在任意线程中调用，事件通过 call_soon_threadsafe 交给订阅者所在的事件循环。
+    """
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._subscribers = {}  # 队列 -> 所属的事件循环
+        self._lock = threading.Lock()
+        self._event_id = 0
+        self.dropped_events = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        """在事件循环中调用，返回该连接的发送队列"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def _next_event(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._event_id += 1
+        return {'id': self._event_id, 'type': event_type, 'data': data}
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        向所有连接发布事件
+
+        :param event_type: 事件类型（SSE 的 event 字段）
+        :param data: 事件数据（可 JSON 序列化）
+        :return: 发布的事件
+        """
+        with self._lock:
+            event = self._next_event(event_type, data)
+            subscribers = list(self._subscribers.items())
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # 事件循环已关闭，连接随之失效
+                self.unsubscribe(queue)
+        logger.info(f"发布事件 {event_type}（#{event['id']}），连接数: {len(subscribers)}")
+        return event
+
+    def _deliver(self, queue: asyncio.Queue, event: Dict[str, Any]):
+        """在订阅者的事件循环中执行：放入事件，队列已满时改为 resync"""
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            dropped = 0
+            while not queue.empty():
+                queue.get_nowait()
+                dropped += 1
+            self.dropped_events += dropped + 1
+            queue.put_nowait({
+                'id': event['id'],
+                'type': 'resync',
+                'data': {'reason': 'queue_full', 'dropped': dropped + 1, 'version': event['data'].get('version')}
+            })
+            logger.warning(f"连接的发送队列已满，丢弃 {dropped + 1} 条事件并要求客户端重新同步")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'connections': len(self._subscribers),
+                'last_event_id': self._event_id,
+                'dropped_events': self.dropped_events
+            }
@@ -4,7 +4,7 @@ import logging.handlers
 from config import settings
 
 # 创建日志目录
-log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+log_dir = settings.LOG_DIR or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
 os.makedirs(log_dir, exist_ok=True)
 
 # 配置日志记录器
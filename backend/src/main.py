@@ -6,37 +6,43 @@ import tempfile
 import logging
 import hashlib
 import json
-from typing import Dict, Any, List, Optional
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile, Response, Body, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from config import settings
-from config.seasons_rounds import get_wildcard_rounds, get_eliminated_characters
-from .vote_tracker import VoteTracker, NON_VOTE_COLUMNS
 from .logger import logger
-import pandas as pd
+from .dataset_store import DatasetStore, copy_and_hash, hash_file
+from .chunked_upload import ChunkedUploadManager, MAX_CHUNK_SIZE
+from .event_bus import EventBus, format_sse
+from .analytics_store import AnalyticsStore, QUERIES
+from .single_flight import SingleFlight
+from .warm_up_scheduler import WarmUpScheduler, WarmUpTasks, PauseWarmUpMiddleware
+
+# pandas / numpy / Pillow 等重量级依赖只在首次使用时导入，避免拖慢进程启动
+if TYPE_CHECKING:
+    from .vote_tracker import VoteTracker
 
 # 添加项目根目录到 Python 路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# 创建 FastAPI 实例
-app = FastAPI(title="动态数据可视化工具")
-
-# 配置 CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # 全局变量
 _characters_data = None
+_characters_data_lock = threading.Lock()
 _vote_tracker = None  # 缓存VoteTracker实例
+_vote_tracker_lock = threading.Lock()
+_render_jobs = None  # 服务端视频渲染任务，首次使用时创建
+_version_trackers = {}  # 按版本哈希缓存的历史版本 VoteTracker（用于版本对比和增量响应）
+MAX_VERSION_TRACKERS = 4
+_readiness = {"ready": False, "stage": "starting", "error": None}  # 启动预热状态
+_rankings = None  # 官方最终排名数据（src/data/rankings.json）
 
 def load_characters_data():
     """加载角色数据到内存"""
@@ -49,14 +55,168 @@ def load_characters_data():
         logger.error(f"加载角色数据失败: {str(e)}")
         _characters_data = {}
 
-# 启动时加载数据
-load_characters_data()
+def get_characters_data() -> Dict[str, Any]:
+    """获取角色数据，首次调用时加载"""
+    if _characters_data is None:
+        with _characters_data_lock:
+            if _characters_data is None:
+                load_characters_data()
+    return _characters_data
+
+def get_official_rankings(season: str) -> Dict[str, int]:
+    """
+    获取赛季的官方最终排名（src/data/rankings.json，角色键到名次），首次调用时读取
+
+    :param season: 赛季，如 "2023"
+    :return: 该赛季的官方排名；没有官方排名的赛季返回空字典
+    """
+    global _rankings
+    if _rankings is None:
+        try:
+            rankings_path = os.path.join(os.path.dirname(__file__), 'data', 'rankings.json')
+            with open(rankings_path, 'r', encoding='utf-8') as f:
+                _rankings = json.load(f)
+        except Exception as e:
+            logger.error(f"读取排名数据失败: {str(e)}")
+            _rankings = {}
+    if _rankings.get('season') != season:
+        return {}
+    return _rankings.get('rankings', {})
+
+def warm_up():
+    """
+    后台预热：导入数据处理依赖、加载角色数据和当前数据集
+    在服务开始接受连接后执行，完成后 /ready 返回就绪
+    """
+    try:
+        _readiness["stage"] = "importing"
+        from . import vote_tracker  # noqa: F401  预先导入 pandas / numpy
+
+        _readiness["stage"] = "loading_characters"
+        get_characters_data()
+
+        _readiness["stage"] = "loading_dataset"
+        vote_tracker = get_vote_tracker()
+
+        # 预先生成默认过滤条件下 /bootstrap 用到的缓存
+        if vote_tracker is not None:
+            _readiness["stage"] = "building_bootstrap"
+            build_characters_info(vote_tracker)
+            build_votes_payload(vote_tracker, vote_tracker.get_vote_view())
+
+        _readiness.update(ready=True, stage="ready")
+        logger.info("后台预热完成")
+
+        # 就绪后在请求空闲时预热其余常用查询，并补齐分析数据库，不影响启动
+        warm_up_scheduler.schedule("startup", build_warm_up_tasks)
+        analytics_store.sync(dataset_store)
+    except Exception as e:
+        logger.error(f"后台预热失败: {str(e)}")
+        _readiness.update(stage="failed", error=str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 预热放到后台线程，不阻塞服务开始接受连接
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
+# 创建 FastAPI 实例
+app = FastAPI(title="动态数据可视化工具", lifespan=lifespan)
+
+# 配置 CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 # 数据文件目录
-DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+DATA_DIR = settings.DATA_DIR or os.path.join(os.path.dirname(__file__), '..', 'data')
 LATEST_FILE_PATH = os.path.join(DATA_DIR, '.latest')
 
-def get_vote_tracker() -> Optional[VoteTracker]:
+# 按内容寻址的数据集存储
+dataset_store = DatasetStore(DATA_DIR)
+
+# 可续传的分块上传
+chunked_uploads = ChunkedUploadManager(
+    os.path.join(DATA_DIR, 'uploads'),
+    settings.MAX_UPLOAD_SIZE,
+    settings.MAX_UPLOAD_CHUNKS,
+    settings.UPLOAD_SESSION_TTL_SECONDS
+)
+
+# 向已连接的前端推送数据集更新
+event_bus = EventBus(settings.EVENT_QUEUE_SIZE)
+
+# 低优先级的后台预热，有请求进行中时暂停
+warm_up_scheduler = WarmUpScheduler()
+app.add_middleware(
+    PauseWarmUpMiddleware,
+    scheduler=warm_up_scheduler,
+    # 长连接和轮询不算作需要让路的请求
+    excluded_paths=(f"{settings.API_V1_STR}/events", f"{settings.API_V1_STR}/ready", f"{settings.API_V1_STR}/warm-up")
+)
+
+# 跨赛季分析用的 SQLite 数据库（每个赛季的最新版本）
+analytics_store = AnalyticsStore(os.path.join(DATA_DIR, 'analytics.db'))
+
+# 合并并发的相同读请求（数据集更新后所有页面会同时重新获取数据）
+request_flights = SingleFlight()
+
+def coalesce(key, compute) -> Response:
+    """
+    合并并发的相同请求：同一个键同时只计算一次，结果只序列化一次，并发的请求共享同一份 JSON
+    
+    :param key: 包含数据集版本和规范化后的请求参数
+    :param compute: 生成响应内容的函数，可以抛出 HTTPException
+    """
+    body = request_flights.do(key, lambda: JSONResponse(content=compute()).body)
+    return Response(content=body, media_type="application/json")
+
+def build_warm_up_tasks() -> WarmUpTasks:
+    """
+    当前数据集的预热任务（在预热线程中调用，首先加载数据集）
+    
+    常用的四种过滤组合（不过滤、排除外卡赛、排除排位赛、两者都排除）的视图、完整投票数据、排序和名次矩阵、
+    每轮统计、阶段 × 作品 × CV 聚合立方体，角色信息，以及区间查询用的前缀和。各结果都缓存在数据集实例中，之后的请求直接使用。
+    """
+    vote_tracker = get_vote_tracker()
+    if vote_tracker is None:
+        return []
+
+    def warm_view(exclude_wildcard: bool, exclude_ranking: bool):
+        view = vote_tracker.get_vote_view(exclude_wildcard=exclude_wildcard, exclude_ranking=exclude_ranking)
+        build_votes_payload(vote_tracker, view)
+        return view
+
+    def warm_derived(exclude_wildcard: bool, exclude_ranking: bool):
+        view = warm_view(exclude_wildcard, exclude_ranking)
+        for order_by in ('cumulative', 'round'):
+            vote_tracker.get_rank_matrix(view, order_by)
+        vote_tracker.get_round_stats(view)
+        vote_tracker.get_rollup_cube(exclude_wildcard, exclude_ranking)
+
+    tasks = [('characters_info', lambda: build_characters_info(vote_tracker))]
+    combinations = [(False, False), (True, False), (False, True), (True, True)]
+    for exclude_wildcard, exclude_ranking in combinations:
+        label = f"wildcard={not exclude_wildcard},ranking={not exclude_ranking}"
+        tasks.append((f"votes_payload[{label}]", lambda ew=exclude_wildcard, er=exclude_ranking: warm_view(ew, er)))
+    for exclude_wildcard, exclude_ranking in combinations:
+        label = f"wildcard={not exclude_wildcard},ranking={not exclude_ranking}"
+        tasks.append((f"rankings[{label}]", lambda ew=exclude_wildcard, er=exclude_ranking: warm_derived(ew, er)))
+    for exclude_ranking in (False, True):
+        tasks.append((f"prefix_sums[ranking={not exclude_ranking}]", lambda er=exclude_ranking: vote_tracker._get_prefix_sums(er)))
+    return tasks
+
+def schedule_analytics_sync():
+    """数据集存储变化后在后台将各赛季的最新版本同步到分析数据库"""
+    threading.Thread(
+        target=analytics_store.sync, args=(dataset_store,), name="analytics-sync", daemon=True
+    ).start()
+
+def get_vote_tracker() -> Optional["VoteTracker"]:
     """获取当前的 VoteTracker 实例"""
     global _vote_tracker
     
@@ -64,26 +224,134 @@ def get_vote_tracker() -> Optional[VoteTracker]:
         # 如果已经有缓存的实例，直接返回
         if _vote_tracker is not None:
             return _vote_tracker
-            
-        # 如果 .latest 文件存在，从中读取最新的 CSV 文件路径
-        if os.path.exists(LATEST_FILE_PATH):
-            with open(LATEST_FILE_PATH, 'r') as f:
-                csv_path = f.read().strip()
-                # 将相对路径转换为绝对路径
-                if not os.path.isabs(csv_path):
-                    csv_path = os.path.abspath(csv_path)
-                if os.path.exists(csv_path):
-                    _vote_tracker = VoteTracker(csv_path)
-                    return _vote_tracker
-                else:
-                    logger.error(f"CSV 文件不存在: {csv_path}")
-        else:
-            logger.error("未找到 .latest 文件")
-        return None
+
+        with _vote_tracker_lock:
+            # 等待锁期间可能已被其他线程创建
+            if _vote_tracker is not None:
+                return _vote_tracker
+
+            from .vote_tracker import VoteTracker
+
+            # 如果 .latest 文件存在，从中读取最新的 CSV 文件路径
+            if os.path.exists(LATEST_FILE_PATH):
+                with open(LATEST_FILE_PATH, 'r') as f:
+                    csv_path = f.read().strip()
+                    # 将相对路径转换为绝对路径
+                    if not os.path.isabs(csv_path):
+                        csv_path = os.path.abspath(csv_path)
+                    if os.path.exists(csv_path):
+                        tracker = VoteTracker(csv_path, dataset_store.get_original_filename(csv_path))
+                        # 存储中的文件以哈希命名，旧的 .latest 可能指向普通文件，需要现算哈希
+                        tracker.version = dataset_store.get_hash_for_path(csv_path) or hash_file(csv_path)
+                        _vote_tracker = tracker
+                        return _vote_tracker
+                    else:
+                        logger.error(f"CSV 文件不存在: {csv_path}")
+            else:
+                logger.error("未找到 .latest 文件")
+            return None
     except Exception as e:
         logger.error(f"获取 VoteTracker 失败: {str(e)}")
         return None
 
+def get_render_jobs():
+    """获取渲染任务管理器，首次调用时创建"""
+    global _render_jobs
+    if _render_jobs is None:
+        from .race_chart_renderer import RenderJobManager
+        _render_jobs = RenderJobManager(
+            os.path.join(DATA_DIR, 'renders'), settings.RENDER_MAX_CONCURRENT_JOBS, settings.RENDER_JOB_TTL_SECONDS
+        )
+    return _render_jobs
+
+@app.get(f"{settings.API_V1_STR}/ready")
+def get_readiness():
+    """就绪检查：后台预热完成前返回 503"""
+    status_code = 200 if _readiness["ready"] else 503
+    return JSONResponse(status_code=status_code, content=_readiness)
+
+@app.get(f"{settings.API_V1_STR}/warm-up")
+def get_warm_up_progress():
+    """获取后台预热进度：状态、当前任务、已完成 / 总任务数、为请求让路的次数"""
+    return warm_up_scheduler.get_progress()
+
+@app.get(f"{settings.API_V1_STR}/events")
+async def stream_events(request: Request):
+    """
+    推送数据集更新（Server-Sent Events）
+    
+    连接后先发送一条 hello 事件，包含当前数据集版本；之后每次发布新版本时发送 dataset 事件，
+    内容为与上一个版本的增量（新增轮次、有变化的票数和参与人数）。
+    客户端读取过慢导致积压时，积压的事件被丢弃并改为发送 resync 事件，客户端应重新获取完整数据。
+    """
+    queue = event_bus.subscribe()
+
+    async def event_stream():
+        try:
+            current_version = _vote_tracker.version if _vote_tracker is not None else None
+            yield format_sse({'id': 0, 'type': 'hello', 'data': {'version': current_version}})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # 心跳注释，保持连接并及时发现断开的客户端
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get(f"{settings.API_V1_STR}/events/stats")
+def get_event_stats():
+    """获取推送连接数和丢弃的事件数"""
+    return event_bus.get_stats()
+
+@app.get(f"{settings.API_V1_STR}/coalescing/stats")
+def get_coalescing_stats():
+    """获取读请求合并的计数：实际计算次数、被合并（等待共享结果）的请求数、失败次数和进行中的计算数"""
+    return request_flights.get_stats()
+
+@app.get(f"{settings.API_V1_STR}/memory")
+def get_memory_usage():
+    """
+    获取已加载的数据集和缓存的估算内存占用，以及进程的常驻内存
+    只统计已加载的对象，不会触发数据集加载
+    """
+    try:
+        from .memory_usage import estimate_size, get_process_memory
+
+        datasets = []
+        trackers = [('current', _vote_tracker)] + [('version', tracker) for tracker in list(_version_trackers.values())]
+        for role, tracker in trackers:
+            if tracker is None or (role == 'version' and tracker is _vote_tracker):
+                continue
+            datasets.append({
+                'role': role,
+                'season': tracker.season,
+                'version': tracker.version,
+                'characters': len(tracker.characters),
+                **tracker.memory_usage()
+            })
+
+        caches = {
+            'characters_data_bytes': estimate_size(_characters_data) if _characters_data is not None else 0
+        }
+        return {
+            'datasets': datasets,
+            'caches': caches,
+            'total_bytes': sum(item['total_bytes'] for item in datasets) + sum(caches.values()),
+            'process': get_process_memory()
+        }
+    except Exception as e:
+        logger.error(f"获取内存占用失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取内存占用失败: {str(e)}")
+
 def save_latest_file_path(file_path: str):
     """保存最新的文件路径"""
     global _vote_tracker
@@ -93,17 +361,85 @@ def save_latest_file_path(file_path: str):
         with open(LATEST_FILE_PATH, 'w') as f:
             f.write(file_path)
         # 清除缓存的VoteTracker实例，这样下次get_vote_tracker会重新创建
+        previous_tracker = _vote_tracker
         _vote_tracker = None
+        # 切换前的版本留在历史版本中，持有旧版本的客户端可以只获取增量
+        remember_dataset_version(previous_tracker)
+        # 在请求空闲时预先加载新数据集并计算常用查询
+        warm_up_scheduler.schedule(dataset_store.get_original_filename(file_path) or os.path.basename(file_path), build_warm_up_tasks)
+        # 有前端连接时在后台加载新数据集并推送增量，不阻塞上传请求
+        if event_bus.has_subscribers():
+            threading.Thread(
+                target=publish_dataset_update, args=(previous_tracker,), name="publish-dataset", daemon=True
+            ).start()
     except Exception as e:
         logger.error(f"保存最新文件路径失败: {str(e)}")
 
-def calculate_file_hash(file_path: str) -> str:
-    """计算文件的 MD5 哈希值"""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+def publish_dataset_update(previous_tracker: Optional["VoteTracker"]):
+    """
+    加载新的当前数据集，计算与上一个版本的增量并推送给已连接的前端
+    
+    :param previous_tracker: 切换前的 VoteTracker（未加载过时为 None，此时只通知完整刷新）
+    """
+    try:
+        from .dataset_diff import compute_delta, summarize_delta
+
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            return
+        if previous_tracker is not None and previous_tracker.version == vote_tracker.version:
+            return
+
+        delta = compute_delta(previous_tracker, vote_tracker)
+        event_bus.publish('dataset', delta)
+        logger.info(f"推送数据集更新 {vote_tracker.version[:12]}: {'；'.join(summarize_delta(delta))}")
+    except Exception as e:
+        logger.error(f"推送数据集更新失败: {str(e)}")
+
+def ingest_dataset(temp_path: str, filename: str, file_hash: str, size: int) -> Dict[str, Any]:
+    """
+    将上传的文件校验后加入数据集存储，并设为当前数据集
+    
+    :param temp_path: 已写入磁盘的临时文件，处理后会被移动或删除
+    :param filename: 原始文件名（用于识别赛季）
+    :param file_hash: 写入时计算好的 SHA-256
+    :param size: 文件大小
+    :return: {'status': 'unchanged' | 'activated' | 'created', 'blob': 文件元数据}
+    """
+    from .vote_tracker import VoteTracker
+
+    # 已入库的文件只需查一次 manifest
+    blob = dataset_store.get_blob(file_hash)
+    if blob is not None:
+        os.unlink(temp_path)
+        status = 'unchanged' if dataset_store.get_latest(blob['season']) == file_hash else 'activated'
+        if status == 'activated':
+            dataset_store.activate(blob['season'], file_hash)
+            schedule_analytics_sync()
+        save_latest_file_path(dataset_store.get_blob_path(file_hash))
+        return {'status': status, 'blob': blob}
+
+    try:
+        # 检查文件是否有效
+        vote_tracker = VoteTracker(temp_path, filename)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+    blob = dataset_store.add(
+        temp_path,
+        file_hash,
+        filename,
+        vote_tracker.season,
+        size,
+        metadata={
+            'total_characters': len(vote_tracker.data),
+            'vote_rounds': vote_tracker.vote_columns
+        }
+    )
+    save_latest_file_path(dataset_store.get_blob_path(file_hash))
+    schedule_analytics_sync()
+    return {'status': 'created', 'blob': blob}
 
 @app.post(f"{settings.API_V1_STR}/upload-data")
 async def upload_data(
@@ -118,157 +454,317 @@ async def upload_data(
     :return: 上传结果信息
     """
     try:
-        # 创建数据目录（如果不存在）
         os.makedirs(DATA_DIR, exist_ok=True)
-        
-        # 使用原始文件名
         filename = file.filename
-        target_path = os.path.join(DATA_DIR, filename)
-        
-        # 如果上传的就是目标文件，直接使用它
-        if os.path.abspath(original_path) == os.path.abspath(target_path):
-            logger.info(f"直接使用文件: {filename}")
-            vote_tracker = VoteTracker(target_path)
-            save_latest_file_path(target_path)
-            return {
-                "message": "直接使用上传的文件",
-                "filename": filename,
-                "project_path": target_path,
-                "total_characters": len(vote_tracker.data),
-                "vote_rounds": vote_tracker.vote_columns
-            }
-        
-        # 先将上传的文件保存到临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
+
+        # 写入临时文件的同时计算哈希
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', dir=DATA_DIR) as temp_file:
+            file_hash, size = copy_and_hash(file.file, temp_file)
             temp_path = temp_file.name
-        
-        try:
-            # 检查文件是否有效
-            vote_tracker_temp = VoteTracker(temp_path, filename)
-            
-            # 如果目标文件已存在，比较文件内容
-            if os.path.exists(target_path):
-                old_hash = calculate_file_hash(target_path)
-                new_hash = calculate_file_hash(temp_path)
-                
-                if old_hash == new_hash:
-                    # 文件内容相同，使用已有文件
-                    os.unlink(temp_path)
-                    logger.info(f"文件内容未变化: {filename}")
-                    save_latest_file_path(target_path)
-                    return {
-                        "message": "文件内容未变化，继续使用已有文件",
-                        "filename": filename,
-                        "project_path": target_path,
-                        "total_characters": len(vote_tracker_temp.data),
-                        "vote_rounds": vote_tracker_temp.vote_columns
-                    }
-                else:
-                    # 文件内容不同，覆盖旧文件
-                    logger.info(f"更新文件: {filename}")
-                    shutil.move(temp_path, target_path)
-            else:
-                # 目标文件不存在，直接移动临时文件
-                logger.info(f"新增文件: {filename}")
-                shutil.move(temp_path, target_path)
-            
-            # 保存最新文件路径
-            save_latest_file_path(target_path)
-            
-            # 使用新文件创建 VoteTracker
-            vote_tracker = VoteTracker(target_path)
-            
-            return {
-                "message": "文件上传成功",
-                "filename": filename,
-                "project_path": target_path,
-                "total_characters": len(vote_tracker.data),
-                "vote_rounds": vote_tracker.vote_columns,
-                "file_hash": calculate_file_hash(target_path)
-            }
-            
-        except Exception as e:
-            # 清理临时文件
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            raise e
-            
+
+        result = ingest_dataset(temp_path, filename, file_hash, size)
+        blob = result['blob']
+        messages = {
+            'unchanged': "文件内容未变化，继续使用已有文件",
+            'activated': "文件与已有版本相同，已切换到该版本",
+            'created': "文件上传成功"
+        }
+        logger.info(f"{messages[result['status']]}: {filename} ({file_hash})")
+
+        return {
+            "message": messages[result['status']],
+            "filename": filename,
+            "project_path": dataset_store.get_blob_path(file_hash),
+            "season": blob['season'],
+            "total_characters": blob['total_characters'],
+            "vote_rounds": blob['vote_rounds'],
+            "file_hash": file_hash
+        }
+
     except Exception as e:
         logger.error(f"文件上传失败: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post(f"{settings.API_V1_STR}/upload")
-async def upload_data(
+async def upload_legacy(
     file: UploadFile = File(...), 
     original_path: str = Form(...)
 ):
     """
-    处理文件上传
+    处理文件上传（旧接口，与 /upload-data 共用同一个数据集存储）
     
     :param file: 上传的文件
     :param original_path: 原始文件路径
     :return: 上传结果信息
     """
     try:
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
-            temp_path = temp_file.name
-
-        # 计算上传文件的哈希值
-        new_hash = calculate_file_hash(temp_path)
-        
-        # 检查文件是否已经上传过
-        latest_file = os.path.join(DATA_DIR, 'latest.csv')
-        if os.path.exists(latest_file):
-            old_hash = calculate_file_hash(latest_file)
-            if new_hash == old_hash:
-                os.unlink(temp_path)  # 删除临时文件
-                return JSONResponse(
-                    status_code=200,
-                    content={
-                        "message": "文件内容未变化，无需重新上传",
-                        "status": "unchanged"
-                    }
-                )
-
-        # 确保数据目录存在
         os.makedirs(DATA_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', dir=DATA_DIR) as temp_file:
+            file_hash, size = copy_and_hash(file.file, temp_file)
+            temp_path = temp_file.name
 
-        # 移动文件到数据目录
-        shutil.move(temp_path, latest_file)
-        
-        # 保存最新文件路径
-        save_latest_file_path(latest_file)
+        result = ingest_dataset(temp_path, file.filename, file_hash, size)
+        if result['status'] == 'unchanged':
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": "文件内容未变化，无需重新上传",
+                    "status": "unchanged"
+                }
+            )
 
         return JSONResponse(
             status_code=200,
             content={
                 "message": "文件上传成功",
                 "status": "success",
-                "file_path": latest_file
+                "file_path": dataset_store.get_blob_path(file_hash)
             }
         )
 
     except Exception as e:
-        # 确保清理临时文件
-        if 'temp_path' in locals():
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-        
         logger.error(f"文件上传失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
     finally:
         file.file.close()
 
+class UploadInitRequest(BaseModel):
+    filename: str
+    total_size: int
+    chunk_size: int
+    sha256: Optional[str] = None
+
+@app.post(f"{settings.API_V1_STR}/uploads")
+def initiate_upload(request: UploadInitRequest):
+    """创建分块上传会话"""
+    try:
+        return chunked_uploads.initiate(request.filename, request.total_size, request.chunk_size, request.sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.put(f"{settings.API_V1_STR}/uploads/{{upload_id}}/chunks/{{index}}")
+async def upload_chunk(upload_id: str, index: int, request: Request):
+    """
+    上传一个分块，请求体为分块的原始字节
+    
+    需要在 X-Chunk-SHA256 请求头中提供分块的 SHA-256，校验失败的分块不会写入。
+    返回已收到 / 缺失的分块数和已收到的字节数，缺失分块的列表通过 GET /uploads/{upload_id} 获取。
+    """
+    chunk_sha256 = request.headers.get('X-Chunk-SHA256')
+    if not chunk_sha256:
+        raise HTTPException(status_code=400, detail="缺少 X-Chunk-SHA256 请求头")
+    content_length = request.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail=f"分块大小不能超过 {MAX_CHUNK_SIZE} 字节")
+    data = await request.body()
+    try:
+        # 哈希校验和文件写入放到线程池，不阻塞事件循环
+        return await run_in_threadpool(chunked_uploads.put_chunk, upload_id, index, data, chunk_sha256)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get(f"{settings.API_V1_STR}/uploads/{{upload_id}}")
+def get_upload_status(upload_id: str):
+    """获取分块上传状态（已收到和缺失的分块）"""
+    try:
+        return chunked_uploads.get_status(upload_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+@app.post(f"{settings.API_V1_STR}/uploads/{{upload_id}}/complete")
+def complete_upload(upload_id: str):
+    """完成分块上传，组装好的文件进入与 /upload-data 相同的入库流程"""
+    try:
+        uploaded = chunked_uploads.finalize(upload_id, DATA_DIR)
+        result = ingest_dataset(uploaded['path'], uploaded['filename'], uploaded['hash'], uploaded['size'])
+        blob = result['blob']
+        return {
+            "message": "文件内容未变化，继续使用已有文件" if result['status'] == 'unchanged' else "文件上传成功",
+            "filename": uploaded['filename'],
+            "project_path": dataset_store.get_blob_path(uploaded['hash']),
+            "season": blob['season'],
+            "total_characters": blob['total_characters'],
+            "vote_rounds": blob['vote_rounds'],
+            "file_hash": uploaded['hash']
+        }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except Exception as e:
+        logger.error(f"完成分块上传失败: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete(f"{settings.API_V1_STR}/uploads/{{upload_id}}")
+def abort_upload(upload_id: str):
+    """取消分块上传"""
+    try:
+        chunked_uploads.abort(upload_id)
+        return {"upload_id": upload_id, "status": "aborted"}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+def build_votes_payload(vote_tracker: "VoteTracker", view: Dict[str, Any], rows=None,
+                        round_indices: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    生成 /votes-by-rounds 格式的投票数据
+    
+    不指定行和轮次时返回全部角色的全部轮次，结果缓存在视图中
+    
+    :param vote_tracker: VoteTracker 实例
+    :param view: get_vote_view 返回的视图
+    :param rows: 要返回的角色行号（按顺序）
+    :param round_indices: 要返回的轮次在视图中的下标
+    :return: {'votes_data', 'vote_rounds', 'participating_counts'}，votes_data 中的每一项带有作品名，
+        与 (角色, 作品) 一起唯一确定一个角色（增量更新按它匹配）
+    """
+    is_full = rows is None and round_indices is None
+    if is_full and 'votes_payload' in view:
+        return view['votes_payload']
+
+    vote_rounds = view['vote_rounds']
+    if rows is None:
+        rows = vote_tracker.select_characters(view)['rows']
+    if round_indices is None:
+        round_indices = list(range(len(vote_rounds)))
+    projected_rounds = [vote_rounds[i] for i in round_indices]
+
+    votes = vote_tracker.serialize_votes(view['votes'][rows][:, round_indices])
+
+    # 处理数据：去掉作品名
+    processed_data = []
+    for row, row_votes in zip(rows.tolist(), votes):
+        # 从角色名中提取纯角色名（如果包含作品名）
+        character = vote_tracker.characters[row]
+        if " (" in character:
+            character = character.split(" (")[0]
+
+        processed_data.append({
+            "character": character,
+            "series": vote_tracker.series[row],
+            "rounds": dict(zip(projected_rounds, row_votes))
+        })
+
+    # 使用已计算好的参与人数
+    participating_counts = {round_name: view['participating_counts'][round_name] for round_name in projected_rounds}
+
+    payload = {
+        "votes_data": processed_data,
+        "vote_rounds": projected_rounds,
+        "participating_counts": participating_counts
+    }
+    if is_full:
+        view['votes_payload'] = payload
+    return payload
+
+def build_votes_delta(vote_tracker: "VoteTracker", view: Dict[str, Any], base_version: str, excluded_columns=None,
+                      exclude_wildcard: bool = False, exclude_ranking: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    生成相对客户端已有版本的 /votes-by-rounds 增量，结果按基准版本缓存在视图中
+    
+    :param base_version: 客户端持有的数据集版本
+    :return: {'delta': True, 'vote_rounds', ...compute_delta 的结果}；
+        基准版本已不在历史版本中或无法增量更新时返回 None，此时应返回完整数据
+    """
+    cache_key = ('votes_delta', base_version)
+    if cache_key in view:
+        return view[cache_key]
+
+    base = vote_tracker if base_version == vote_tracker.version else _version_trackers.get(base_version)
+    if base is None:
+        return None
+
+    from .dataset_diff import compute_delta
+    delta = compute_delta(base, vote_tracker, excluded_columns, exclude_wildcard, exclude_ranking)
+    if delta['full_refresh']:
+        return None
+    view[cache_key] = {'delta': True, 'vote_rounds': view['vote_rounds'], **delta}
+    return view[cache_key]
+
+def build_votes_by_rounds_response(vote_tracker: "VoteTracker", excluded_columns: List[str], exclude_wildcard: bool,
+                                   exclude_ranking: bool, top_k: Optional[int], order_by: Optional[str],
+                                   as_of_round: Optional[str], characters: List[str], rounds: List[str],
+                                   cursor: Optional[str], limit: Optional[int], base_version: Optional[str]) -> Dict[str, Any]:
+    """
+    生成 /votes-by-rounds 的响应（参数含义见接口说明）
+    
+    :raises: HTTPException 参数无效
+    """
+    if order_by is not None and order_by not in ('cumulative', 'round'):
+        raise HTTPException(status_code=400, detail=f"不支持的排序方式: {order_by}")
+
+    view = vote_tracker.get_vote_view(
+        excluded_columns=excluded_columns,
+        exclude_wildcard=exclude_wildcard,
+        exclude_ranking=exclude_ranking
+    )
+    vote_rounds = view['vote_rounds']
+    if not vote_rounds:
+        logger.warning('【get_votes_by_rounds】没有找到任何投票列')
+        return {"votes_data": [], "vote_rounds": [], "participating_counts": {}}
+
+    # 轮次投影
+    unknown_rounds = [round_name for round_name in rounds if round_name not in vote_rounds]
+    if unknown_rounds:
+        raise HTTPException(status_code=400, detail=f"轮次不存在或已被排除: {unknown_rounds}")
+    round_indices = [vote_rounds.index(round_name) for round_name in rounds] if rounds else list(range(len(vote_rounds)))
+    projected_rounds = [vote_rounds[i] for i in round_indices]
+
+    # 分页游标即排序结果中的偏移量
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的分页游标: {cursor}")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail=f"无效的分页游标: {cursor}")
+
+    if order_by is None and (top_k is not None or limit is not None or cursor):
+        order_by = 'cumulative'
+    try:
+        selection = vote_tracker.select_characters(
+            view,
+            order_by=order_by,
+            as_of_round=as_of_round,
+            characters=characters,
+            top_k=top_k,
+            offset=offset,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = selection['rows']
+
+    if order_by is None and not characters and not rounds:
+        if base_version:
+            delta = build_votes_delta(
+                vote_tracker, view, base_version, excluded_columns, exclude_wildcard, exclude_ranking
+            )
+            if delta is not None:
+                return delta
+        # 全部角色、全部轮次：使用视图中缓存的完整结果
+        response = dict(build_votes_payload(vote_tracker, view))
+    else:
+        response = build_votes_payload(vote_tracker, view, rows, round_indices)
+    response["version"] = vote_tracker.version
+    if limit is not None or cursor:
+        next_offset = offset + len(rows)
+        response["total"] = selection['total']
+        response["next_cursor"] = str(next_offset) if next_offset < selection['total'] else None
+    return response
+
 class VoteRoundsRequest(BaseModel):
     excluded_columns: Optional[List[str]] = []
     exclude_wildcard: bool = False
     exclude_ranking: bool = False
+    top_k: Optional[int] = Field(None, ge=1)
+    order_by: Optional[str] = None
+    as_of_round: Optional[str] = None
+    characters: Optional[List[str]] = None
+    rounds: Optional[List[str]] = None
+    cursor: Optional[str] = None
+    limit: Optional[int] = Field(None, ge=1)
+    base_version: Optional[str] = None
 
 @app.get(f"{settings.API_V1_STR}/votes-by-rounds")
 @app.post(f"{settings.API_V1_STR}/votes-by-rounds")
@@ -276,58 +772,59 @@ def get_votes_by_rounds(
     request: VoteRoundsRequest = None,
     excluded_columns: List[str] = Query([]),  
     exclude_wildcard: bool = Query(False),
-    exclude_ranking: bool = Query(False)
+    exclude_ranking: bool = Query(False),
+    top_k: Optional[int] = Query(None, ge=1, description="只返回排序后的前 k 名"),
+    order_by: Optional[str] = Query(None, description="排序方式：cumulative（累计票数）或 round（当轮票数）"),
+    as_of_round: Optional[str] = Query(None, description="排序依据的轮次，默认最后一轮"),
+    characters: List[str] = Query([], description="只返回这些角色"),
+    rounds: List[str] = Query([], description="只返回这些轮次"),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    limit: Optional[int] = Query(None, ge=1, description="每页数量"),
+    base_version: Optional[str] = Query(None, description="客户端已有的数据集版本，返回相对该版本的增量")
 ):
-    """获取每轮投票数据"""
+    """
+    获取每轮投票数据
+    
+    不带任何查询参数时返回全部角色的全部轮次；
+    指定 top_k / limit / cursor / order_by 时按预先计算的每轮排序返回，
+    characters 过滤角色，rounds 只投影指定轮次。
+    
+    获取全部角色、全部轮次时可以传入 base_version：该版本仍在服务端的历史版本中时
+    只返回变化的轮次、票数和参与人数（delta 为 True，格式与数据集更新推送相同），否则返回完整数据。
+    响应中的 version 为当前数据集版本。
+    
+    同一数据集版本、相同参数的并发请求只计算一次并共享结果。
+    """
     try:
         # 如果是 POST 请求，使用请求体中的参数
         if request:
             excluded_columns = request.excluded_columns
             exclude_wildcard = request.exclude_wildcard
             exclude_ranking = request.exclude_ranking
+            top_k = request.top_k
+            order_by = request.order_by
+            as_of_round = request.as_of_round
+            characters = request.characters or []
+            rounds = request.rounds or []
+            cursor = request.cursor
+            limit = request.limit
+            base_version = request.base_version
 
         vote_tracker = get_vote_tracker()
         if vote_tracker is None:
             raise HTTPException(status_code=400, detail="请先上传数据文件")
-            
-        result = vote_tracker.get_votes_by_rounds(
-            excluded_columns=excluded_columns,
-            exclude_wildcard=exclude_wildcard,
-            exclude_ranking=exclude_ranking
-        )
-
-        # 处理数据：去掉作品名
-        processed_data = []
-        for char_data in result['votes_data']:
-            # 从角色名中提取纯角色名（如果包含作品名）
-            character = char_data["character"]
-            if " (" in character:
-                character = character.split(" (")[0]
-                
-            # 将votes列表转换为rounds字典
-            rounds_data = {}
-            for i, vote in enumerate(char_data["votes"]):
-                if i < len(result['vote_rounds']):
-                    round_name = result['vote_rounds'][i]
-                    rounds_data[round_name] = vote
-
-            processed_data.append({
-                "character": character,
-                "rounds": rounds_data
-            })
-
-        # 使用已处理好的轮次列表
-        vote_rounds = result['vote_rounds']
 
-        # 使用已计算好的参与人数
-        participating_counts = result['participating_counts']
-
-        return {
-            "votes_data": processed_data,
-            "vote_rounds": vote_rounds,
-            "participating_counts": participating_counts
-        }
+        key = (
+            'votes-by-rounds', vote_tracker.version, tuple(sorted(excluded_columns or [])), bool(exclude_wildcard),
+            bool(exclude_ranking), top_k, order_by, as_of_round, tuple(characters), tuple(rounds), cursor, limit, base_version
+        )
+        return coalesce(key, lambda: build_votes_by_rounds_response(
+            vote_tracker, excluded_columns, exclude_wildcard, exclude_ranking, top_k, order_by,
+            as_of_round, characters, rounds, cursor, limit, base_version
+        ))
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取投票数据失败: {str(e)}")
         raise HTTPException(
@@ -366,6 +863,35 @@ def get_current_season():
         logger.error(f"获取当前赛季失败: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_characters_info(vote_tracker: "VoteTracker") -> List[Dict[str, Any]]:
+    """
+    获取带排名和头像的角色信息（按数据集缓存）
+    
+    :raises: ValueError 如果数据文件缺少角色信息
+    """
+    if '_characters_info' in vote_tracker._view_cache:
+        return vote_tracker._view_cache['_characters_info']
+
+    # 获取角色基本信息（与数据集的行一一对应）
+    characters_info = vote_tracker.get_characters_info()
+    official_rankings = get_official_rankings(vote_tracker.season)
+    final_ranks = [None] * len(characters_info) if official_rankings else vote_tracker.get_final_ranks().tolist()
+    characters_data = get_characters_data()
+
+    # 将排名和头像信息添加到角色信息中
+    for char_info, final_rank in zip(characters_info, final_ranks):
+        char_key = vote_tracker.character_key(char_info['character'], char_info['ip'])
+        
+        # 有官方排名的赛季使用官方排名；否则使用根据当前数据和淘汰名单计算的最终名次，尚未决出时为 None
+        char_info['rank'] = official_rankings.get(char_key) if official_rankings else (final_rank or None)
+        
+        # 从全局角色数据中获取头像
+        if characters_data and char_key in characters_data:
+            char_info['avatar'] = characters_data[char_key].get('avatar')
+
+    vote_tracker._view_cache['_characters_info'] = characters_info
+    return characters_info
+
 @app.get(f"{settings.API_V1_STR}/characters-info")
 def get_characters_info():
     """获取角色信息"""
@@ -374,35 +900,645 @@ def get_characters_info():
         if not vote_tracker:
             raise HTTPException(status_code=500, detail="数据未初始化")
 
-        # 获取角色基本信息
-        characters_info = vote_tracker.get_characters_info()
-        if not characters_info:
-            raise HTTPException(status_code=404, detail="未找到角色信息")
+        def compute():
+            characters_info = build_characters_info(vote_tracker)
+            if not characters_info:
+                raise HTTPException(status_code=404, detail="未找到角色信息")
+            return characters_info
+
+        return coalesce(('characters-info', vote_tracker.version), compute)
+
+    except Exception as e:
+        logger.error(f"获取角色信息失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get(f"{settings.API_V1_STR}/characters/{{character_key:path}}")
+def get_character_detail(
+    character_key: str,
+    tie_method: str = Query('competition', description="并列处理方式：competition（1224）、dense（1223）或 ordinal（1234）"),
+    excluded_columns: List[str] = Query([]),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False)
+):
+    """
+    获取单个角色的详细数据：每轮票数、累计票数、名次、百分位、淘汰轮次和角色信息
+
+    角色以 角色名@作品名 表示（即 characters-info 中的 character@ip）。
+    通过按数据集缓存的角色索引直接定位行，只读取预先计算的矩阵中的一行。
+    """
+    try:
+        from .ranking import TIE_METHODS
+        if tie_method not in TIE_METHODS:
+            raise HTTPException(status_code=400, detail=f"不支持的并列处理方式: {tie_method}")
+
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+
+        row = vote_tracker.get_character_index().get(character_key)
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"角色不存在: {character_key}")
+
+        view = vote_tracker.get_vote_view(
+            excluded_columns=excluded_columns,
+            exclude_wildcard=exclude_wildcard,
+            exclude_ranking=exclude_ranking
+        )
+        detail = vote_tracker.get_character_detail(row, view, tie_method)
+        official_rankings = get_official_rankings(vote_tracker.season)
+        if official_rankings:
+            detail['final_rank'] = official_rankings.get(character_key)
+        return {
+            "version": vote_tracker.version,
+            "key": character_key,
+            "avatar": build_characters_info(vote_tracker)[row].get('avatar'),
+            "vote_rounds": view['vote_rounds'],
+            "tie_method": tie_method,
+            **detail
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取角色详情失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取角色详情失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/bootstrap")
+def get_bootstrap(
+    excluded_columns: List[str] = Query([]),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False)
+):
+    """
+    一次性获取页面首次渲染需要的全部数据
+    
+    相当于 /current-season、/vote-rounds、/characters-info 和 /votes-by-rounds 的合并，
+    所有内容取自同一个数据集实例，不会因中途上传新文件而不一致。
+    角色信息和投票数据都使用按数据集缓存的结果，并发的相同请求只计算一次。
+    """
+    try:
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+
+        def compute():
+            view = vote_tracker.get_vote_view(
+                excluded_columns=excluded_columns,
+                exclude_wildcard=exclude_wildcard,
+                exclude_ranking=exclude_ranking
+            )
+            return {
+                "version": vote_tracker.version,
+                "season": vote_tracker.season,
+                "all_vote_rounds": vote_tracker.get_vote_rounds(),
+                "characters_info": build_characters_info(vote_tracker),
+                **build_votes_payload(vote_tracker, view)
+            }
+
+        key = ('bootstrap', vote_tracker.version, tuple(sorted(excluded_columns)), exclude_wildcard, exclude_ranking)
+        return coalesce(key, compute)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取初始化数据失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取初始化数据失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/bump-chart")
+def get_bump_chart(
+    characters: List[str] = Query([], description="只返回这些角色，默认全部"),
+    order_by: str = Query('cumulative', description="排名依据：cumulative（累计票数）或 round（当轮票数）"),
+    tie_method: str = Query('competition', description="并列处理方式：competition（1224）、dense（1223）或 ordinal（1234）"),
+    excluded_columns: List[str] = Query([]),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False)
+):
+    """
+    获取角色的名次轨迹（用于名次变化图）
+    
+    名次默认为竞争排名（同票同名次），当轮无票时名次为 null；
+    名次变化为上一轮名次减本轮名次，正数表示上升。
+    """
+    try:
+        if order_by not in ('cumulative', 'round'):
+            raise HTTPException(status_code=400, detail=f"不支持的排序方式: {order_by}")
+        from .ranking import TIE_METHODS
+        if tie_method not in TIE_METHODS:
+            raise HTTPException(status_code=400, detail=f"不支持的并列处理方式: {tie_method}")
+
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+
+        view = vote_tracker.get_vote_view(
+            excluded_columns=excluded_columns,
+            exclude_wildcard=exclude_wildcard,
+            exclude_ranking=exclude_ranking
+        )
+        rows = vote_tracker.find_character_rows(characters)
+        trajectories = vote_tracker.get_rank_trajectories(view, rows, order_by, tie_method)
+
+        return {
+            "vote_rounds": view['vote_rounds'],
+            "order_by": order_by,
+            "tie_method": tie_method,
+            "trajectories": trajectories
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取名次轨迹失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取名次轨迹失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/round-stats")
+def get_round_stats(
+    percentiles: List[float] = Query([10, 25, 50, 75, 90], description="需要计算的百分位数"),
+    top_k: int = Query(5, ge=1, description="前 k 名占比中的 k"),
+    excluded_columns: List[str] = Query([]),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False)
+):
+    """获取每轮票数分布统计（总票数、平均数、中位数、百分位数、基尼系数、前 k 名占比）"""
+    try:
+        if any(q < 0 or q > 100 for q in percentiles):
+            raise HTTPException(status_code=400, detail="百分位数必须在 0 到 100 之间")
+
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+
+        view = vote_tracker.get_vote_view(
+            excluded_columns=excluded_columns,
+            exclude_wildcard=exclude_wildcard,
+            exclude_ranking=exclude_ranking
+        )
+        return {
+            "vote_rounds": view['vote_rounds'],
+            "stats": vote_tracker.get_round_stats(view, percentiles=percentiles, top_k=top_k)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取轮次统计失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取轮次统计失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/round-range")
+def get_round_range(
+    start_round: str = Query(..., description="起始轮次（包含）"),
+    end_round: str = Query(..., description="结束轮次（包含）"),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False),
+    top_k: Optional[int] = Query(None, ge=1, description="只返回区间合计的前 k 名"),
+    tie_method: str = Query('competition', description="并列处理方式：competition（1224）、dense（1223）或 ordinal（1234）")
+):
+    """
+    获取两个轮次之间（包含两端）每个角色的得票合计、有票轮次数和名次
+    
+    用于阶段合计（如第一阶段第一轮到第一阶段第四轮）或只统计淘汰赛等场景，结果按名次排序。
+    """
+    try:
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
 
-        # 读取排名数据
         try:
-            with open('src/data/rankings.json', 'r', encoding='utf-8') as f:
-                rankings_data = json.load(f)
-                rankings = rankings_data['rankings']
-        except Exception as e:
-            logger.error(f"读取排名数据失败: {str(e)}")
-            rankings = {}
+            result = vote_tracker.get_round_range(start_round, end_round, exclude_wildcard, exclude_ranking, tie_method)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        # 将排名和头像信息添加到角色信息中
-        for char_info in characters_info:
-            char_name = char_info['character']
-            char_ip = char_info['ip']
-            char_key = f"{char_name}@{char_ip}"
-            
-            # 从排名数据中获取排名
-            char_info['rank'] = rankings.get(char_key)
-            
-            # 从全局角色数据中获取头像
-            if _characters_data and char_key in _characters_data:
-                char_info['avatar'] = _characters_data[char_key].get('avatar')
+        rows = result['order'][:top_k] if top_k is not None else result['order']
+        totals = vote_tracker.serialize_votes(result['totals'][rows][None, :])[0]
+        return {
+            "start_round": start_round,
+            "end_round": end_round,
+            "rounds": result['rounds'],
+            "characters": [
+                {
+                    'character': vote_tracker.characters[row],
+                    'series': vote_tracker.series[row],
+                    'total': total,
+                    'vote_count': int(result['counts'][row]),
+                    'rank': int(result['ranks'][row])
+                }
+                for row, total in zip(rows.tolist(), totals)
+            ]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取区间票数失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取区间票数失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/rollup")
+def get_rollup(
+    group_by: Optional[str] = Query(None, description="分组维度：stage（阶段）、series（作品）或 cv，默认不分组"),
+    stage: Optional[str] = Query(None, description="只统计该阶段，如 第二阶段"),
+    series: Optional[str] = Query(None, description="只统计该作品"),
+    cv: Optional[str] = Query(None, description="只统计该 CV"),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False),
+    top_k: Optional[int] = Query(None, ge=1, description="按作品 / CV 分组时只返回合计的前 k 名")
+):
+    """
+    按阶段、作品、CV 切片和上卷的得票合计、有票轮次数和角色数
+    
+    例如 group_by=series&stage=第二阶段 返回第二阶段各作品的得票合计。
+    结果取自按数据集版本构建一次的预聚合立方体，不需要获取全部角色数据在前端分组。
+    按作品 / CV 分组时按合计降序排列并给出名次（竞争排名），按阶段分组时按阶段顺序排列。
+    """
+    try:
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
 
-        return characters_info
+        cube = vote_tracker.get_rollup_cube(exclude_wildcard, exclude_ranking)
+        try:
+            rows = cube.query(stage=stage, series=series, cv=cv, group_by=group_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if group_by in ('series', 'cv') and rows:
+            import numpy as np
+            from .ranking import rank
+            totals = np.array([row['total'] for row in rows])
+            ranks, order = rank(totals, 'competition', tie_breakers=(np.arange(len(rows)),))
+            rows = [{**rows[index], 'rank': int(ranks[index])} for index in order.tolist()[:top_k]]
 
+        return {
+            "version": vote_tracker.version,
+            "group_by": group_by,
+            "filters": {"stage": stage, "series": series, "cv": cv},
+            "stages": cube.stages,
+            "rows": rows
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"获取角色信息失败: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"获取聚合数据失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取聚合数据失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/projection")
+def get_projection(
+    as_of_round: Optional[str] = Query(None, description="从该轮结束时开始模拟，默认为最后一个有票数的轮次"),
+    simulations: int = Query(10000, ge=100, le=200000, description="模拟次数"),
+    seed: int = Query(0, ge=0, description="随机数种子，相同的种子结果相同"),
+    max_positions: int = Query(16, ge=1, le=100, description="返回前多少个名次的概率")
+):
+    """
+    蒙特卡洛模拟剩余轮次，返回仍未被淘汰的角色的最终名次概率（按期望名次排序）
+    
+    默认参数的结果按数据集版本缓存，其他参数每次重新模拟。
+    """
+    try:
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+
+        try:
+            return vote_tracker.get_projection(as_of_round, simulations, seed, max_positions)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"模拟剩余轮次失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"模拟剩余轮次失败: {str(e)}")
+
+# 里程碑检测的默认参数，只有默认参数的检测结果缓存在视图中
+MILESTONE_TOP_N = 3
+MILESTONE_CUMULATIVE_STEP = 10000
+
+@app.get(f"{settings.API_V1_STR}/milestones")
+def get_milestones(
+    until_round: Optional[str] = Query(None, description="只返回到该轮次为止的里程碑"),
+    top_n: int = Query(MILESTONE_TOP_N, ge=1, le=10, description="每类记录保留的名次数"),
+    cumulative_step: int = Query(MILESTONE_CUMULATIVE_STEP, ge=1000, description="累计票数门槛的间隔（不小于 1000）"),
+    excluded_columns: List[str] = Query([]),
+    exclude_wildcard: bool = Query(False),
+    exclude_ranking: bool = Query(False)
+):
+    """
+    获取自动检测的赛季记录和里程碑
+    
+    返回格式与 seasonsConfig.json 中的 milestones 相同：{轮次: [{character, text}, ...]}。
+    如果数据目录中存在 <赛季>_matches.csv，还会检测单场票差和倍杀记录。
+    默认参数的检测器缓存在视图中，其他参数每次请求重新检测，避免任意参数组合撑大缓存。
+    """
+    try:
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+
+        view = vote_tracker.get_vote_view(
+            excluded_columns=excluded_columns,
+            exclude_wildcard=exclude_wildcard,
+            exclude_ranking=exclude_ranking
+        )
+        if until_round is not None and until_round not in view['vote_rounds']:
+            raise HTTPException(status_code=400, detail=f"轮次不存在或已被排除: {until_round}")
+
+        # 对阵数据文件更新后需要重新检测
+        matches_path = os.path.join(DATA_DIR, f"{vote_tracker.season}_matches.csv")
+        matches_mtime = os.path.getmtime(matches_path) if os.path.exists(matches_path) else None
+        is_default = top_n == MILESTONE_TOP_N and cumulative_step == MILESTONE_CUMULATIVE_STEP
+        cached = view.get('milestones') if is_default else None
+        if cached is not None and cached[0] == matches_mtime:
+            detector = cached[1]
+        else:
+            from .milestone_detector import MilestoneDetector, load_matches
+            detector = MilestoneDetector(
+                view,
+                vote_tracker.characters,
+                matches=load_matches(matches_path),
+                top_n=top_n,
+                cumulative_step=cumulative_step
+            )
+            if is_default:
+                view['milestones'] = (matches_mtime, detector)
+        return detector.get_milestones(until_round)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取里程碑失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取里程碑失败: {str(e)}")
+
+class RenderJobRequest(BaseModel):
+    excluded_columns: Optional[List[str]] = []
+    exclude_wildcard: bool = False
+    exclude_ranking: bool = False
+    # 下限需容纳图表配置中的边距（左右 250px、上下 100px）
+    width: int = Field(1920, ge=640, le=settings.RENDER_MAX_WIDTH)
+    height: int = Field(1080, ge=360, le=settings.RENDER_MAX_HEIGHT)
+    fps: int = Field(30, ge=1, le=settings.RENDER_MAX_FPS)
+    frames_per_round: int = Field(30, ge=1, le=settings.RENDER_MAX_FRAMES_PER_ROUND)
+    output_format: str = 'gif'
+
+@app.post(f"{settings.API_V1_STR}/render-jobs")
+def create_render_job(request: RenderJobRequest):
+    """
+    创建服务端累计票数动画渲染任务，任务在后台执行
+    
+    需要配置中文字体 RENDER_FONT_PATH（Pillow 默认字体没有中文字形，角色名会显示为方框），未配置时返回 503。
+    """
+    try:
+        if not settings.RENDER_FONT_PATH or not os.path.isfile(settings.RENDER_FONT_PATH):
+            raise HTTPException(status_code=503, detail="服务端渲染需要配置中文字体（RENDER_FONT_PATH）")
+
+        vote_tracker = get_vote_tracker()
+        if vote_tracker is None:
+            raise HTTPException(status_code=400, detail="请先上传数据文件")
+        if get_render_jobs().count_active_jobs() >= settings.RENDER_MAX_QUEUED_JOBS:
+            raise HTTPException(status_code=429, detail="排队中的渲染任务过多，请稍后再试")
+
+        view = vote_tracker.get_vote_view(
+            excluded_columns=request.excluded_columns,
+            exclude_wildcard=request.exclude_wildcard,
+            exclude_ranking=request.exclude_ranking
+        )
+        frame_count = len(view['vote_rounds']) * request.frames_per_round
+        if frame_count > settings.RENDER_MAX_FRAMES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"总帧数 {frame_count} 超过上限 {settings.RENDER_MAX_FRAMES}，请减少每轮帧数"
+            )
+        from .race_chart_renderer import build_frames, load_chart_config
+        chart_config = load_chart_config(vote_tracker.season)
+        frames = build_frames(view, vote_tracker.characters, chart_config, request.frames_per_round)
+        return get_render_jobs().start_job(
+            frames,
+            chart_config,
+            width=request.width,
+            height=request.height,
+            fps=request.fps,
+            output_format=request.output_format
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"创建渲染任务失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"创建渲染任务失败: {str(e)}")
+
+@app.get(f"{settings.API_V1_STR}/render-jobs/{{job_id}}")
+def get_render_job(job_id: str):
+    """获取渲染任务状态"""
+    job = get_render_jobs().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"渲染任务不存在: {job_id}")
+    return job
+
+@app.get(f"{settings.API_V1_STR}/render-jobs/{{job_id}}/output")
+def download_render_output(job_id: str):
+    """下载渲染结果"""
+    job = get_render_jobs().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"渲染任务不存在: {job_id}")
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"渲染任务尚未完成: {job['status']}")
+    output_path = get_render_jobs().get_output_path(job_id)
+    return FileResponse(output_path, filename=job['output_filename'])
+
+def load_dataset_version(file_hash: str) -> "VoteTracker":
+    """
+    加载数据集的指定版本（带缓存，用于版本对比）
+    
+    :raises: KeyError 如果版本不存在
+    """
+    if _vote_tracker is not None and _vote_tracker.version == file_hash:
+        return _vote_tracker
+    if file_hash in _version_trackers:
+        return _version_trackers[file_hash]
+
+    blob = dataset_store.get_blob(file_hash)
+    if blob is None:
+        raise KeyError(f"数据集版本不存在: {file_hash}")
+
+    from .vote_tracker import VoteTracker
+    tracker = VoteTracker(dataset_store.get_blob_path(file_hash), blob['filename'])
+    tracker.version = file_hash
+    remember_dataset_version(tracker)
+    return tracker
+
+def remember_dataset_version(tracker: Optional["VoteTracker"]):
+    """将数据集加入历史版本，超过 MAX_VERSION_TRACKERS 个时丢弃最早加入的版本"""
+    if tracker is None or tracker.version is None:
+        return
+    _version_trackers.pop(tracker.version, None)
+    if len(_version_trackers) >= MAX_VERSION_TRACKERS:
+        _version_trackers.pop(next(iter(_version_trackers)))
+    _version_trackers[tracker.version] = tracker
+
+@app.get(f"{settings.API_V1_STR}/analytics")
+def list_analytics_queries():
+    """获取可用的跨赛季查询及其参数"""
+    return {
+        name: {
+            'description': definition['description'],
+            'required': definition['required'],
+            'params': list(definition['filters'])
+        }
+        for name, definition in QUERIES.items()
+    }
+
+@app.get(f"{settings.API_V1_STR}/analytics/{{query_name}}")
+def run_analytics_query(
+    query_name: str,
+    character: Optional[str] = Query(None, description="角色名"),
+    series: Optional[str] = Query(None, description="作品名"),
+    season: Optional[str] = Query(None, description="赛季"),
+    stage: Optional[str] = Query(None, description="阶段，如 第一阶段、淘汰赛"),
+    limit: int = Query(20, ge=1, le=1000, description="每个赛季最多返回的条数（series_totals / top_characters）")
+):
+    """
+    执行固定的跨赛季查询（见 /analytics），过滤和聚合在 SQLite 中完成
+    
+    数据库中为每个赛季的最新版本；上传或切换版本后在后台同步，结果可能稍有延迟。
+    """
+    try:
+        rows = analytics_store.query(
+            query_name,
+            {'character': character, 'series': series, 'season': season, 'stage': stage},
+            limit=limit
+        )
+        return {"query": query_name, "seasons": analytics_store.get_versions(), "rows": rows}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"执行跨赛季查询失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"执行跨赛季查询失败: {str(e)}")
+
+@app.post(f"{settings.API_V1_STR}/datasets/import")
+def import_datasets(file: UploadFile = File(...)):
+    """
+    批量导入多个赛季：上传包含 <年份>_season.csv 的 zip / tar 压缩包，
+    各文件在进程池中并行解析校验后一次性入库，返回每个文件的结果
+    
+    压缩包大小不能超过 MAX_UPLOAD_SIZE；解压时限制条目数、单个文件和全部文件解压后的大小（ARCHIVE_MAX_*）。
+    """
+    from .archive_ingest import ingest_archive, copy_with_limit
+
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.archive', dir=DATA_DIR) as temp_file:
+            archive_path = temp_file.name
+        try:
+            with open(archive_path, 'wb') as temp_file:
+                try:
+                    copy_with_limit(file.file, temp_file, settings.MAX_UPLOAD_SIZE,
+                                    f"压缩包大小不能超过 {settings.MAX_UPLOAD_SIZE} 字节")
+                except ValueError as e:
+                    raise HTTPException(status_code=413, detail=str(e))
+            result = ingest_archive(archive_path, dataset_store, settings.INGEST_WORKERS or None, {
+                'max_members': settings.ARCHIVE_MAX_MEMBERS,
+                'max_member_size': settings.ARCHIVE_MAX_MEMBER_SIZE,
+                'max_total_size': settings.ARCHIVE_MAX_TOTAL_SIZE
+            })
+        finally:
+            os.unlink(archive_path)
+        schedule_analytics_sync()
+
+        # 当前数据集所在的赛季被导入了新版本时切换到新版本；还没有当前数据集时使用最新的赛季
+        current_path = None
+        if os.path.exists(LATEST_FILE_PATH):
+            with open(LATEST_FILE_PATH, 'r') as f:
+                current_path = f.read().strip()
+        current_hash = dataset_store.get_hash_for_path(current_path) if current_path else None
+        current_season = dataset_store.get_blob(current_hash)['season'] if current_hash else None
+        if current_season in result['seasons']:
+            if result['seasons'][current_season] != current_hash:
+                save_latest_file_path(dataset_store.get_blob_path(result['seasons'][current_season]))
+        elif result['seasons'] and (current_path is None or not os.path.exists(current_path)):
+            save_latest_file_path(dataset_store.get_blob_path(result['seasons'][max(result['seasons'])]))
+
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"批量导入失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"批量导入失败: {str(e)}")
+
+    finally:
+        file.file.close()
+
+@app.get(f"{settings.API_V1_STR}/datasets")
+def list_datasets():
+    """获取所有赛季的最新版本和版本数"""
+    return dataset_store.list_seasons()
+
+@app.get(f"{settings.API_V1_STR}/datasets/{{season}}/versions")
+def list_dataset_versions(season: str):
+    """获取赛季的版本历史"""
+    try:
+        return dataset_store.list_versions(season)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+@app.post(f"{settings.API_V1_STR}/datasets/{{season}}/versions/{{file_hash}}/activate")
+def activate_dataset_version(season: str, file_hash: str):
+    """将赛季的某个历史版本设为当前数据集"""
+    try:
+        blob = dataset_store.activate(season, file_hash)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    save_latest_file_path(dataset_store.get_blob_path(file_hash))
+    schedule_analytics_sync()
+    return blob
+
+@app.get(f"{settings.API_V1_STR}/datasets/{{season}}/compare")
+def compare_dataset_versions(
+    season: str,
+    base: str = Query(..., description="对比基准版本的哈希"),
+    target: Optional[str] = Query(None, description="对比目标版本的哈希，默认为最新版本")
+):
+    """对比同一赛季两个版本的每轮票数，返回有变化的角色"""
+    try:
+        target = target or dataset_store.get_latest(season)
+        for file_hash in (base, target):
+            blob = dataset_store.get_blob(file_hash) if file_hash else None
+            if blob is None or blob['season'] != season:
+                raise HTTPException(status_code=404, detail=f"赛季 {season} 不存在版本: {file_hash}")
+
+        base_tracker = load_dataset_version(base)
+        target_tracker = load_dataset_version(target)
+        base_data = {
+            (item['character'], item['series']): dict(zip(base_tracker.vote_columns, item['votes']))
+            for item in base_tracker.get_votes_by_rounds()['votes_data']
+        }
+
+        changes = []
+        for item in target_tracker.get_votes_by_rounds()['votes_data']:
+            key = (item['character'], item['series'])
+            old_rounds = base_data.pop(key, {})
+            changed_rounds = {
+                round_name: {'base': old_rounds.get(round_name), 'target': vote}
+                for round_name, vote in zip(target_tracker.vote_columns, item['votes'])
+                if old_rounds.get(round_name) != vote
+            }
+            if changed_rounds:
+                changes.append({'character': item['character'], 'series': item['series'], 'rounds': changed_rounds})
+
+        return {
+            "base": base,
+            "target": target,
+            "changed_characters": changes,
+            "removed_characters": [{'character': character, 'series': series} for character, series in base_data]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"对比数据集版本失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"对比数据集版本失败: {str(e)}")
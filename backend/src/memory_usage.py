@@ -0,0 +1,66 @@
+import os
+import sys
+from typing import Dict, Optional, Any
+
+
+def estimate_size(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    估算对象及其引用的内存占用（字节）
+
+    numpy 数组按 nbytes、DataFrame / Series 按 memory_usage(deep=True) 计算，
+    容器和普通对象递归累加。seen 记录已计算过的对象，多个视图共享的数组只计算一次。
+
+    :param obj: 要估算的对象
+    :param seen: 已计算过的对象 id 集合，跨多次调用共享时可避免重复计算
+    :return: 估算的字节数
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    # 延迟判断类型，避免为了估算内存而导入 numpy / pandas
+    module = type(obj).__module__.split('.')[0]
+    if module == 'numpy' and hasattr(obj, 'nbytes'):
+        # 切片等视图与其底层数组共享内存，只计算底层数组
+        base = getattr(obj, 'base', None)
+        if base is not None and hasattr(base, 'nbytes'):
+            return estimate_size(base, seen)
+        return int(obj.nbytes)
+    if module == 'pandas' and hasattr(obj, 'memory_usage'):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+
+    # 缓存字典可能正被其他线程修改：先复制一份快照再递归，避免迭代时字典大小变化
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, seen) + estimate_size(value, seen) for key, value in list(obj.items()))
+    elif isinstance(obj, (list, set)):
+        size += sum(estimate_size(item, seen) for item in list(obj))
+    elif isinstance(obj, (tuple, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+
+def get_process_memory() -> Dict[str, Optional[int]]:
+    """
+    获取进程的常驻内存和峰值常驻内存（字节），无法获取的项为 None
+    """
+    rss = peak_rss = None
+    try:
+        # Linux：/proc/self/statm 第二项为常驻页数
+        with open('/proc/self/statm', 'r') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 以字节为单位，Linux 以 KB 为单位
+        peak_rss = peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    return {'rss_bytes': rss, 'peak_rss_bytes': peak_rss}
@@ -0,0 +1,188 @@
+import os
+import math
+import threading
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Optional, Any
+from .logger import logger
+
+# 名次序数词，用于生成"最高 / 第二高 / 第三高"之类的描述
+ORDINALS = ['最', '第二', '第三', '第四', '第五', '第六', '第七', '第八', '第九', '第十']
+
+# 对阵数据文件中需要的列：轮次、双方角色及得票数（与 scripts/analyze_matches.py 使用的列名一致）
+MATCH_COLUMNS = ['轮次', '角色A', '得票数', '角色B', '得票数.1']
+
+
+def format_votes(value: float) -> str:
+    """格式化票数，整数不显示小数部分"""
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+def load_matches(matches_path: str) -> Optional[pd.DataFrame]:
+    """
+    加载对阵数据
+
+    :param matches_path: 对阵数据 CSV 路径
+    :return: 对阵数据，文件不存在或缺少必要列时返回 None
+    """
+    if not os.path.exists(matches_path):
+        return None
+    try:
+        matches = pd.read_csv(matches_path)
+        matches.columns = [col.replace(' ', '') for col in matches.columns]
+        missing_columns = [col for col in MATCH_COLUMNS if col not in matches.columns]
+        if missing_columns:
+            logger.warning(f"对阵数据缺少以下列，忽略对阵记录: {missing_columns}")
+            return None
+        return matches[MATCH_COLUMNS]
+    except Exception as e:
+        logger.error(f"加载对阵数据失败: {str(e)}")
+        return None
+
+
+class MilestoneDetector:
+    """
+    按轮次增量扫描投票数据，自动检测赛季记录和里程碑
+
+    检测内容：
+    - 单轮最高得票（前 top_n 名）
+    - 首位累计得票突破整数门槛的角色
+    - 单场最小票差、单场最大倍杀（需要对阵数据）
+
+    每类记录维护一个升序的"当前最佳"数组，新一轮的候选值通过 searchsorted
+    得到在赛季记录中的名次，因此每轮只处理该轮新增的数据。
+    检测器缓存在视图中供并发请求共享，扫描状态的读写都在锁内进行。
+    """
+
+    def __init__(self, view: Dict[str, Any], characters: List[str], matches: Optional[pd.DataFrame] = None,
+                 top_n: int = 3, cumulative_step: int = 10000):
+        """
+        :param view: VoteTracker.get_vote_view 返回的视图
+        :param characters: 角色名列表，与视图中的行对应
+        :param matches: 对阵数据（可选）
+        :param top_n: 每类记录保留的名次数
+        :param cumulative_step: 累计票数门槛的间隔
+        """
+        self.vote_rounds = view['vote_rounds']
+        self.votes = view['votes']
+        self.cumulative = view['cumulative']
+        self.characters = characters
+        self.matches = matches
+        self.top_n = min(top_n, len(ORDINALS))
+        self.cumulative_step = cumulative_step
+
+        self._lock = threading.Lock()
+        self._processed_rounds = 0
+        self._milestones = {}
+        # 各类记录的当前最佳值，统一存为"越小越好"的升序数组
+        self._best_round_votes = np.empty(0)
+        self._best_gaps = np.empty(0)
+        self._best_ratios = np.empty(0)
+
+        # 全员累计票数的每轮最大值单调不减，可直接 searchsorted 出每个门槛首次被突破的轮次
+        if self.cumulative.size and cumulative_step > 0:
+            season_max = self.cumulative.max(axis=0)
+            self._thresholds = np.arange(1, math.floor(season_max[-1] / cumulative_step) + 1) * cumulative_step
+            self._threshold_rounds = np.searchsorted(season_max, self._thresholds, side='left')
+        else:
+            self._thresholds = np.empty(0)
+            self._threshold_rounds = np.empty(0, dtype=int)
+
+    def _rank_candidates(self, best: np.ndarray, candidates: np.ndarray):
+        """
+        计算候选值在赛季记录中的名次
+
+        :param best: 当前记录（升序，越小越好）
+        :param candidates: 本轮候选值（越小越好）
+        :return: (进入前 top_n 的 (候选下标, 名次) 列表, 更新后的记录)
+        """
+        if candidates.size == 0:
+            return [], best
+        order = np.argsort(candidates, kind='stable')
+        # 与已有记录同值时，已有记录名次在前
+        ranks = np.searchsorted(best, candidates[order], side='right') + np.arange(len(order))
+        entered = [(int(index), int(rank)) for index, rank in zip(order, ranks) if rank < self.top_n]
+        updated = np.sort(np.concatenate([best, candidates]))[:self.top_n]
+        return entered, updated
+
+    def _process_round(self, round_index: int) -> List[Dict[str, str]]:
+        """处理一轮数据，返回该轮产生的里程碑"""
+        round_name = self.vote_rounds[round_index]
+        milestones = []
+
+        # 单轮最高得票
+        round_votes = self.votes[:, round_index]
+        rows = np.flatnonzero(np.nan_to_num(round_votes, nan=0.0) > 0)
+        entered, self._best_round_votes = self._rank_candidates(self._best_round_votes, -round_votes[rows])
+        for index, rank in entered:
+            row = rows[index]
+            milestones.append({
+                'character': f"赛季记录-本赛季单轮{ORDINALS[rank]}高得票",
+                'text': f"{self.characters[row]}({format_votes(round_votes[row])}票)"
+            })
+
+        # 累计票数门槛
+        prev_cumulative = self.cumulative[:, round_index - 1] if round_index > 0 else np.zeros(len(self.characters))
+        for threshold in self._thresholds[self._threshold_rounds == round_index]:
+            # 同一轮有多个角色突破时，只记录累计票数最高的一位
+            crossed = np.flatnonzero((self.cumulative[:, round_index] >= threshold) & (prev_cumulative < threshold))
+            row = crossed[np.argmax(self.cumulative[crossed, round_index])]
+            milestones.append({
+                'character': f"赛季记录-本赛季首位累计得票突破{format_votes(threshold)}票",
+                'text': f"{self.characters[row]}(累计{format_votes(self.cumulative[row, round_index])}票)"
+            })
+
+        # 对阵记录
+        if self.matches is not None:
+            round_matches = self.matches[self.matches['轮次'] == round_name]
+            votes_a = pd.to_numeric(round_matches['得票数'], errors='coerce').to_numpy(dtype=float)
+            votes_b = pd.to_numeric(round_matches['得票数.1'], errors='coerce').to_numpy(dtype=float)
+            valid = ~(np.isnan(votes_a) | np.isnan(votes_b))
+            names_a = round_matches['角色A'].to_numpy()[valid]
+            names_b = round_matches['角色B'].to_numpy()[valid]
+            votes_a, votes_b = votes_a[valid], votes_b[valid]
+
+            gaps = np.abs(votes_a - votes_b)
+            entered, self._best_gaps = self._rank_candidates(self._best_gaps, gaps)
+            for index, rank in entered:
+                milestones.append({
+                    'character': f"赛季记录-本赛季单场{ORDINALS[rank]}小票差",
+                    'text': f"{names_a[index]}{format_votes(votes_a[index])} VS "
+                            f"{format_votes(votes_b[index])}{names_b[index]}(票差:{format_votes(gaps[index])}票)"
+                })
+
+            has_loser_votes = np.minimum(votes_a, votes_b) > 0
+            ratios = np.maximum(votes_a, votes_b)[has_loser_votes] / np.minimum(votes_a, votes_b)[has_loser_votes]
+            ratio_rows = np.flatnonzero(has_loser_votes)
+            entered, self._best_ratios = self._rank_candidates(self._best_ratios, -ratios)
+            for index, rank in entered:
+                row = ratio_rows[index]
+                a_wins = votes_a[row] >= votes_b[row]
+                winner, loser = (names_a[row], names_b[row]) if a_wins else (names_b[row], names_a[row])
+                milestones.append({
+                    'character': f"赛季记录-本赛季单场{ORDINALS[rank]}大倍杀",
+                    'text': f"{winner} VS {loser}({ratios[index]:.2f}倍倍杀)"
+                })
+
+        return milestones
+
+    def get_milestones(self, until_round: Optional[str] = None) -> Dict[str, List[Dict[str, str]]]:
+        """
+        获取里程碑，只处理尚未扫描过的轮次
+
+        :param until_round: 扫描到该轮次为止，默认扫描全部轮次
+        :return: 轮次名称到里程碑列表的字典，格式与 seasonsConfig.json 中的 milestones 相同
+        """
+        last_index = len(self.vote_rounds) if until_round is None else self.vote_rounds.index(until_round) + 1
+        with self._lock:
+            while self._processed_rounds < last_index:
+                round_milestones = self._process_round(self._processed_rounds)
+                if round_milestones:
+                    self._milestones[self.vote_rounds[self._processed_rounds]] = round_milestones
+                self._processed_rounds += 1
+
+            return {
+                round_name: milestones
+                for round_name, milestones in self._milestones.items()
+                if self.vote_rounds.index(round_name) < last_index
+            }
@@ -0,0 +1,317 @@
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from config import settings
+from .logger import logger
+from .ranking import rank_order
+
+# 前端图表配置目录（与前端共用同一份布局和配色）
+FRONTEND_CONFIG_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'frontend', 'src', 'config'
+)
+
+
+def load_chart_config(season: str) -> Dict[str, Any]:
+    """
+    读取前端的全局图表配置和赛季配置
+
+    :param season: 赛季，如 "2023"
+    :return: {'global': globalChartConfig.json 内容, 'season': 该赛季的配置}
+    """
+    with open(os.path.join(FRONTEND_CONFIG_DIR, 'globalChartConfig.json'), 'r', encoding='utf-8') as f:
+        global_config = json.load(f)
+    with open(os.path.join(FRONTEND_CONFIG_DIR, 'seasonsConfig.json'), 'r', encoding='utf-8') as f:
+        season_config = json.load(f)['seasons'].get(season, {})
+    return {'global': global_config, 'season': season_config}
+
+
+def _to_int32(value: int) -> int:
+    """按 JavaScript ToInt32 规则截断为 32 位有符号整数"""
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value >= 0x80000000 else value
+
+
+def character_color_index(character: str, color_count: int) -> int:
+    """
+    与前端 getCharacterColor 相同的颜色分配：
+    对 UTF-16 编码单元计算 charCode + ((acc << 5) - acc)，只有移位运算截断为 32 位
+    """
+    code_units = np.frombuffer(character.encode('utf-16-le'), dtype='<u2')
+    value = 0
+    for unit in code_units.tolist():
+        value = unit + (_to_int32(_to_int32(value) << 5) - value)
+    return abs(value) % color_count
+
+
+def get_stage_color(round_name: str, season_config: Dict[str, Any]) -> str:
+    """根据轮次名称匹配阶段颜色"""
+    for stage in season_config.get('stageColors', []):
+        if re.search(stage['pattern'], round_name):
+            return stage['color']
+    return '#333'
+
+
+def build_frames(view: Dict[str, Any], characters: List[str], chart_config: Dict[str, Any],
+                 frames_per_round: int = 10) -> List[Dict[str, Any]]:
+    """
+    根据投票视图生成每一帧的绘制数据
+
+    相邻两轮之间对累计票数做线性插值，每帧按插值后的票数重新排序并取前 maxDisplay 名。
+
+    :param view: VoteTracker.get_vote_view 返回的视图
+    :param characters: 角色名列表
+    :param chart_config: load_chart_config 的返回值
+    :param frames_per_round: 每轮的帧数
+    :return: 帧数据列表（只包含可序列化的基础类型，便于发送到子进程）
+    """
+    vote_rounds = view['vote_rounds']
+    cumulative = view['cumulative']
+    max_display = chart_config['global']['limits']['maxDisplay']
+    safe_colors = chart_config['season'].get('colors', {}).get('safe') or [{'light': '#2196F3'}]
+    colors = [safe_colors[character_color_index(character, len(safe_colors))]['light'] for character in characters]
+    name_order = np.argsort(np.argsort(np.array(characters, dtype=str), kind='stable'), kind='stable')
+
+    frames = []
+    for round_index, round_name in enumerate(vote_rounds):
+        previous = cumulative[:, round_index - 1] if round_index > 0 else np.zeros(len(characters))
+        current = cumulative[:, round_index]
+        for step in range(1, frames_per_round + 1):
+            values = previous + (current - previous) * (step / frames_per_round)
+            # 与前端一致：按票数降序，同票按角色名排序
+            top_rows = rank_order(values, tie_breakers=(name_order,))[:max_display]
+            frames.append({
+                'index': len(frames),
+                'round': round_name,
+                'stage_color': get_stage_color(round_name, chart_config['season']),
+                'participating_count': view['participating_counts'].get(round_name),
+                'bars': [(characters[row], float(values[row]), colors[row]) for row in top_rows.tolist()]
+            })
+    return frames
+
+
+def _load_font(size: int):
+    """加载 RENDER_FONT_PATH 配置的中文字体（创建任务前已检查配置）"""
+    return ImageFont.truetype(settings.RENDER_FONT_PATH, size)
+
+
+def render_frame(task: Dict[str, Any]) -> str:
+    """
+    绘制单帧并保存为 PNG（在子进程中执行）
+
+    :param task: {'frame', 'layout', 'width', 'height', 'output_path'}
+    :return: 输出文件路径
+    """
+    frame, layout = task['frame'], task['layout']
+    width, height = task['width'], task['height']
+    margin = layout['margin']
+    axis_color = layout['axis_color']
+    plot_width = width - margin['left'] - margin['right']
+    plot_height = height - margin['top'] - margin['bottom']
+
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    label_font = _load_font(layout['label_font_size'])
+    title_font = _load_font(layout['title_font_size'])
+
+    bars = frame['bars']
+    max_value = max((value for _, value, _ in bars), default=0) or 1
+    band = plot_height / max(layout['max_display'], 1)
+    bar_height = band * 0.8
+
+    for rank, (character, value, color) in enumerate(bars):
+        top = margin['top'] + rank * band + (band - bar_height) / 2
+        right = margin['left'] + plot_width * value / max_value
+        draw.rectangle([margin['left'], top, right, top + bar_height], fill=color)
+        draw.text((margin['left'] - 10, top + bar_height / 2), character, fill=axis_color, font=label_font, anchor='rm')
+        draw.text((right + 5, top + bar_height / 2), f"{round(value):,}", fill='#333', font=label_font, anchor='lm')
+
+    draw.line([margin['left'], margin['top'], margin['left'], margin['top'] + plot_height], fill=axis_color, width=2)
+    draw.text((width - margin['right'], height - margin['bottom'] / 2), layout['x_label'], fill=axis_color, font=label_font, anchor='rm')
+    title = frame['round']
+    if frame['participating_count'] is not None:
+        title = f"{title}（剩余角色数：{frame['participating_count']}）"
+    draw.text((width - margin['right'], margin['top'] + plot_height * 0.75), title, fill=frame['stage_color'], font=title_font, anchor='rm')
+
+    image.save(task['output_path'], 'PNG')
+    return task['output_path']
+
+
+class RenderJobManager:
+    """
+    后台渲染任务管理
+
+    每个任务在独立线程中运行，帧的绘制分发到进程池并行执行，
+    全部完成后编码为动画 GIF 或打包为 PNG 序列，随后删除 PNG 帧。
+    同时渲染的任务数不超过 max_concurrent_jobs，其余任务排队（状态为 queued）。
+    已结束的任务及其输出文件在 job_ttl_seconds 后删除。
+    """
+
+    def __init__(self, render_dir: str, max_concurrent_jobs: int = 1, job_ttl_seconds: int = 24 * 3600):
+        """
+        :param render_dir: 渲染输出目录
+        :param max_concurrent_jobs: 同时渲染的任务数（每个任务都会占满进程池）
+        :param job_ttl_seconds: 已结束的任务保留多久（秒）
+        """
+        self.render_dir = render_dir
+        self.job_ttl_seconds = job_ttl_seconds
+        self._jobs = {}
+        self._output_paths = {}  # job_id -> 输出文件路径（不对外返回）
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max(1, max_concurrent_jobs))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务状态"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_output_path(self, job_id: str) -> Optional[str]:
+        """获取已完成任务的输出文件路径"""
+        with self._lock:
+            return self._output_paths.get(job_id)
+
+    def count_active_jobs(self) -> int:
+        """排队中和进行中的任务数"""
+        with self._lock:
+            return sum(job['status'] not in ('completed', 'failed') for job in self._jobs.values())
+
+    def _update_job(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def expire_jobs(self) -> int:
+        """
+        删除结束超过保留时间的任务及其目录（包括之前的进程留下的目录）
+
+        :return: 删除的任务数
+        """
+        if not os.path.isdir(self.render_dir):
+            return 0
+        deadline = time.time() - self.job_ttl_seconds
+        expired = 0
+        with self._lock:
+            for job_id in os.listdir(self.render_dir):
+                job = self._jobs.get(job_id)
+                if job is not None and job['status'] not in ('completed', 'failed'):
+                    continue
+                job_dir = os.path.join(self.render_dir, job_id)
+                # 任务结束时写入输出文件、删除帧目录，以任务目录的修改时间作为结束时间
+                try:
+                    finished_at = os.path.getmtime(job_dir)
+                except OSError:
+                    continue
+                if finished_at < deadline:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+                    self._jobs.pop(job_id, None)
+                    self._output_paths.pop(job_id, None)
+                    expired += 1
+        if expired:
+            logger.info(f"删除 {expired} 个过期的渲染任务")
+        return expired
+
+    def start_job(self, frames: List[Dict[str, Any]], chart_config: Dict[str, Any], width: int = 1920,
+                  height: int = 1080, fps: int = 30, output_format: str = 'gif') -> Dict[str, Any]:
+        """
+        创建并启动渲染任务
+
+        :param frames: build_frames 生成的帧数据
+        :param chart_config: load_chart_config 的返回值
+        :param width: 画面宽度
+        :param height: 画面高度
+        :param fps: 帧率（GIF 每帧时长按此换算）
+        :param output_format: 'gif' 输出动画 GIF，'frames' 输出 PNG 序列压缩包
+        :return: 任务状态
+        :raises: ValueError 输出格式不支持或没有可渲染的帧
+        """
+        if output_format not in ('gif', 'frames'):
+            raise ValueError(f"不支持的输出格式: {output_format}")
+        if not frames:
+            raise ValueError("没有可渲染的帧")
+        self.expire_jobs()
+
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.render_dir, job_id)
+        os.makedirs(os.path.join(job_dir, 'frames'), exist_ok=True)
+
+        global_config = chart_config['global']
+        layout = {
+            'margin': global_config['layout']['margin'],
+            'max_display': global_config['limits']['maxDisplay'],
+            'axis_color': global_config['style']['axis']['color'],
+            'label_font_size': int(global_config['style']['axis']['fontSize'].rstrip('px')),
+            'title_font_size': int(global_config['style']['fontSize'].rstrip('px')) * 2,
+            'x_label': global_config['labels']['xAxis']
+        }
+        tasks = [{
+            'frame': frame,
+            'layout': layout,
+            'width': width,
+            'height': height,
+            'output_path': os.path.join(job_dir, 'frames', f"frame_{frame['index']:05d}.png")
+        } for frame in frames]
+
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'total_frames': len(tasks),
+                'rendered_frames': 0,
+                'output_format': output_format,
+                'output_filename': None,
+                'error': None,
+                'created_at': datetime.now().isoformat()
+            }
+
+        thread = threading.Thread(
+            target=self._run_job,
+            args=(job_id, job_dir, tasks, fps, output_format),
+            daemon=True
+        )
+        thread.start()
+        return self.get_job(job_id)
+
+    def _run_job(self, job_id: str, job_dir: str, tasks: List[Dict[str, Any]], fps: int, output_format: str):
+        """在后台线程中执行渲染任务"""
+        with self._slots:
+            self._render(job_id, job_dir, tasks, fps, output_format)
+
+    def _render(self, job_id: str, job_dir: str, tasks: List[Dict[str, Any]], fps: int, output_format: str):
+        try:
+            self._update_job(job_id, status='rendering')
+            workers = settings.RENDER_WORKERS or os.cpu_count() or 1
+            frame_paths = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                for frame_path in executor.map(render_frame, tasks, chunksize=chunksize):
+                    frame_paths.append(frame_path)
+                    self._update_job(job_id, rendered_frames=len(frame_paths))
+
+            self._update_job(job_id, status='encoding')
+            if output_format == 'gif':
+                output_path = os.path.join(job_dir, 'race_chart.gif')
+                images = (Image.open(path) for path in frame_paths)
+                first = next(images)
+                first.save(output_path, save_all=True, append_images=images, duration=int(1000 / fps), loop=0)
+            else:
+                output_path = shutil.make_archive(os.path.join(job_dir, 'race_chart_frames'), 'zip', os.path.join(job_dir, 'frames'))
+            # 帧已编码进输出文件，不再需要
+            shutil.rmtree(os.path.join(job_dir, 'frames'), ignore_errors=True)
+
+            with self._lock:
+                self._output_paths[job_id] = output_path
+            self._update_job(job_id, status='completed', output_filename=os.path.basename(output_path))
+            logger.info(f"渲染任务完成: {job_id}，共 {len(frame_paths)} 帧")
+        except Exception as e:
+            logger.error(f"渲染任务失败: {job_id}, {str(e)}")
+            shutil.rmtree(os.path.join(job_dir, 'frames'), ignore_errors=True)
+            self._update_job(job_id, status='failed', error=str(e) or type(e).__name__)
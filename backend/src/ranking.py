@@ -0,0 +1,89 @@
+import numpy as np
+from typing import Sequence, Tuple, Union
+
+# 并列处理方式：competition 竞争排名（1224），dense 密集排名（1223），ordinal 序数排名（1234，并列按次要排序键区分）
+TIE_METHODS = ('competition', 'dense', 'ordinal')
+
+Metrics = Union[np.ndarray, Sequence[np.ndarray]]
+
+
+def _sort_keys(metrics: Metrics, descending: Union[bool, Sequence[bool]]) -> list:
+    """把指标转为升序排序键，空值（NaN）排在最后"""
+    if isinstance(metrics, np.ndarray):
+        metrics = [metrics]
+    if isinstance(descending, bool):
+        descending = [descending] * len(metrics)
+    keys = []
+    for values, is_descending in zip(metrics, descending):
+        values = np.asarray(values, dtype=np.float64)
+        keys.append(np.where(np.isnan(values), np.inf, -values if is_descending else values))
+    return keys
+
+
+def rank_order(metrics: Metrics, descending: Union[bool, Sequence[bool]] = True,
+               tie_breakers: Sequence[np.ndarray] = ()) -> np.ndarray:
+    """
+    按指标排序，返回名次顺序
+
+    :param metrics: 一个指标数组，或按优先级排列的多个同形状指标数组；二维时每一行单独排序
+    :param descending: 是否降序（可以为每个指标分别指定）
+    :param tie_breakers: 所有指标都相等时依次使用的次要排序键（升序，可广播到指标的形状），如角色名顺序
+    :return: 与指标同形状的下标数组，沿最后一维按名次排列
+    """
+    keys = _sort_keys(metrics, descending)
+    shape = keys[0].shape
+    breakers = [np.broadcast_to(breaker, shape) for breaker in tie_breakers]
+    # lexsort 以最后一个键为主键
+    return np.lexsort(tuple(reversed(breakers)) + tuple(reversed(keys)), axis=-1)
+
+
+def ranks_from_order(metrics: Metrics, order: np.ndarray, method: str = 'competition',
+                     descending: Union[bool, Sequence[bool]] = True) -> np.ndarray:
+    """
+    由 rank_order 的结果计算名次
+
+    所有指标都相等的角色为并列，按 method 处理；次要排序键只决定 ordinal 下并列者的先后。
+    主指标为空值的位置名次为 0。
+
+    :return: 与指标同形状的名次数组（int32）
+    :raises: ValueError 不支持的并列处理方式
+    """
+    if method not in TIE_METHODS:
+        raise ValueError(f"不支持的并列处理方式: {method}")
+
+    keys = _sort_keys(metrics, descending)
+    shape = keys[0].shape
+    positions = np.broadcast_to(np.arange(1, shape[-1] + 1, dtype=np.int32), shape)
+    if method == 'ordinal':
+        sorted_ranks = positions
+    else:
+        is_new_value = np.zeros(shape, dtype=bool)
+        is_new_value[..., :1] = True
+        for key in keys:
+            sorted_key = np.take_along_axis(key, order, axis=-1)
+            is_new_value[..., 1:] |= sorted_key[..., 1:] != sorted_key[..., :-1]
+        if method == 'competition':
+            sorted_ranks = np.maximum.accumulate(np.where(is_new_value, positions, 0), axis=-1)
+        else:
+            sorted_ranks = np.cumsum(is_new_value, axis=-1, dtype=np.int32)
+
+    ranks = np.empty(shape, dtype=np.int32)
+    np.put_along_axis(ranks, order, sorted_ranks.astype(np.int32, copy=False), axis=-1)
+    ranks[np.isinf(keys[0])] = 0
+    return ranks
+
+
+def rank(metrics: Metrics, method: str = 'competition', descending: Union[bool, Sequence[bool]] = True,
+         tie_breakers: Sequence[np.ndarray] = ()) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按指标计算名次
+
+    :param metrics: 一个指标数组，或按优先级排列的多个同形状指标数组；二维时每一行单独排名
+    :param method: 并列处理方式（TIE_METHODS）
+    :param descending: 是否降序（可以为每个指标分别指定）
+    :param tie_breakers: 所有指标都相等时依次使用的次要排序键（升序）
+    :return: (名次, 名次顺序)，名次中主指标为空值的位置为 0
+    :raises: ValueError 不支持的并列处理方式
+    """
+    order = rank_order(metrics, descending, tie_breakers)
+    return ranks_from_order(metrics, order, method, descending), order
@@ -0,0 +1,152 @@
+import numpy as np
+from typing import List, Dict, Optional, Any, Sequence
+
+# 缺少 CV 的角色归入该值
+UNKNOWN_CV = '未知'
+# 可用于切片和分组的维度
+DIMENSIONS = ('stage', 'series', 'cv')
+
+
+def _group_sum(values: np.ndarray, group_ids: np.ndarray, group_count: int) -> np.ndarray:
+    """按列分组求和：values 为 (行数, 列数)，返回 (行数, 分组数)"""
+    return np.stack([np.bincount(group_ids, weights=row, minlength=group_count) for row in values])
+
+
+class RollupCube:
+    """
+    阶段 × 作品 × CV 的预聚合立方体
+
+    度量为得票合计（total）、有票的 (角色, 轮次) 数（vote_count）和有票的角色数（characters）。
+    每个角色只属于一个 (作品, CV) 组合，立方体只保存实际出现的组合（不超过角色数），
+    并预先汇总出按作品、按 CV 和全部的上卷结果；每张表的第 0 行为全部阶段，第 i 行为第 i 个阶段。
+    切片和上卷查询都只是数组下标访问。
+
+    角色数按角色去重：同一角色在多个阶段有票时，全部阶段一行中只计一次。
+    """
+
+    def __init__(self, votes: np.ndarray, round_stages: Sequence[str], series: Sequence[str], cvs: Sequence[Optional[str]]):
+        """
+        :param votes: 角色 × 轮次 的票数矩阵，空值为 NaN
+        :param round_stages: 每一轮所属的阶段
+        :param series: 每个角色的作品
+        :param cvs: 每个角色的 CV，缺失为 None
+        """
+        self.stages = list(dict.fromkeys(round_stages))
+        stage_of_round = np.array([self.stages.index(stage) for stage in round_stages], dtype=np.int64)
+
+        # 角色 × 阶段 的合计和有票轮次数，第 0 列为全部阶段
+        has_votes = ~np.isnan(votes)
+        stage_count = len(self.stages)
+        character_totals = np.zeros((stage_count + 1, votes.shape[0]))
+        character_counts = np.zeros((stage_count + 1, votes.shape[0]))
+        for stage_index in range(stage_count):
+            columns = stage_of_round == stage_index
+            character_totals[stage_index + 1] = np.where(has_votes[:, columns], votes[:, columns], 0.0).sum(axis=1)
+            character_counts[stage_index + 1] = has_votes[:, columns].sum(axis=1)
+        character_totals[0] = character_totals[1:].sum(axis=0)
+        character_counts[0] = character_counts[1:].sum(axis=0)
+        measures = np.stack([character_totals, character_counts, (character_counts > 0).astype(np.float64)])
+
+        # (作品, CV) 组合
+        self.series_labels, series_codes = np.unique(np.array(series, dtype=object).astype(str), return_inverse=True)
+        cv_values = np.array([UNKNOWN_CV if cv is None or cv != cv or cv == '' else str(cv) for cv in cvs], dtype=str)
+        self.cv_labels, cv_codes = np.unique(cv_values, return_inverse=True)
+        self.series_labels = self.series_labels.tolist()
+        self.cv_labels = self.cv_labels.tolist()
+        pair_codes, group_ids = np.unique(series_codes * len(self.cv_labels) + cv_codes, return_inverse=True)
+        self.group_series = pair_codes // len(self.cv_labels)
+        self.group_cv = pair_codes % len(self.cv_labels)
+        group_count = len(pair_codes)
+
+        # 每张表形状为 (度量, 阶段 + 1, 分组)
+        groups = np.stack([_group_sum(measure, group_ids, group_count) for measure in measures])
+        self._tables = {
+            'group': groups,
+            'series': np.stack([_group_sum(table, self.group_series, len(self.series_labels)) for table in groups]),
+            'cv': np.stack([_group_sum(table, self.group_cv, len(self.cv_labels)) for table in groups]),
+            'all': groups.sum(axis=2, keepdims=True)
+        }
+        self._series_index = {label: index for index, label in enumerate(self.series_labels)}
+        self._cv_index = {label: index for index, label in enumerate(self.cv_labels)}
+        self._group_index = {(int(s), int(c)): g for g, (s, c) in enumerate(zip(self.group_series, self.group_cv))}
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(table.nbytes for table in self._tables.values()))
+
+    def _select(self, series: Optional[str], cv: Optional[str], group_by: Optional[str]):
+        """
+        确定查询使用的表和列
+
+        :return: (表, 列下标数组, 每列的分组标签)
+        """
+        series_code = self._series_index.get(series, -1) if series is not None else None
+        cv_code = self._cv_index.get(cv, -1) if cv is not None else None
+        if series_code == -1 or cv_code == -1:
+            return self._tables['all'], np.empty(0, dtype=np.int64), []
+
+        if group_by == 'series' and cv_code is None:
+            columns = np.arange(len(self.series_labels)) if series_code is None else np.array([series_code])
+            return self._tables['series'], columns, [self.series_labels[i] for i in columns.tolist()]
+        if group_by == 'cv' and series_code is None:
+            columns = np.arange(len(self.cv_labels)) if cv_code is None else np.array([cv_code])
+            return self._tables['cv'], columns, [self.cv_labels[i] for i in columns.tolist()]
+        if group_by in ('series', 'cv'):
+            # 另一个维度有过滤条件：取满足条件的 (作品, CV) 组合
+            mask = np.ones(len(self.group_series), dtype=bool)
+            if series_code is not None:
+                mask &= self.group_series == series_code
+            if cv_code is not None:
+                mask &= self.group_cv == cv_code
+            columns = np.flatnonzero(mask)
+            labels = self.series_labels if group_by == 'series' else self.cv_labels
+            codes = self.group_series if group_by == 'series' else self.group_cv
+            return self._tables['group'], columns, [labels[i] for i in codes[columns].tolist()]
+
+        # 不按作品 / CV 分组：单个单元格
+        if series_code is not None and cv_code is not None:
+            group = self._group_index.get((series_code, cv_code))
+            columns = np.array([group]) if group is not None else np.empty(0, dtype=np.int64)
+            return self._tables['group'], columns, [None] * len(columns)
+        if series_code is not None:
+            return self._tables['series'], np.array([series_code]), [None]
+        if cv_code is not None:
+            return self._tables['cv'], np.array([cv_code]), [None]
+        return self._tables['all'], np.array([0]), [None]
+
+    def query(self, stage: Optional[str] = None, series: Optional[str] = None, cv: Optional[str] = None,
+              group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        切片 / 上卷查询
+
+        :param stage: 只统计该阶段，None 为全部阶段
+        :param series: 只统计该作品，None 为全部作品
+        :param cv: 只统计该 CV，None 为全部 CV
+        :param group_by: 按 stage / series / cv 分组，None 为不分组（返回一行）
+        :return: [{'stage' | 'series' | 'cv': 分组值（分组时）, 'total', 'vote_count', 'characters'}]，
+            分组值不存在的组合不返回
+        :raises: ValueError 阶段不存在或不支持的分组维度
+        """
+        if group_by is not None and group_by not in DIMENSIONS:
+            raise ValueError(f"不支持的分组维度: {group_by}")
+        if stage is not None and stage not in self.stages:
+            raise ValueError(f"阶段不存在: {stage}")
+
+        table, columns, labels = self._select(series, cv, group_by)
+        if group_by == 'stage':
+            stage_rows = [self.stages.index(stage) + 1] if stage is not None else list(range(1, len(self.stages) + 1))
+            values = table[:, stage_rows][:, :, columns].sum(axis=2)
+            labels = [self.stages[row - 1] for row in stage_rows]
+        else:
+            values = table[:, self.stages.index(stage) + 1 if stage is not None else 0, columns]
+
+        # 分组时去掉没有票数的分组
+        kept = np.flatnonzero(values[1] > 0) if group_by is not None else np.arange(len(labels))
+        rows = []
+        for index, total, vote_count, characters in zip(kept.tolist(), *values[:, kept].tolist()):
+            row = {group_by: labels[index]} if group_by is not None else {}
+            row.update(total=round(total, 2), vote_count=int(vote_count), characters=int(characters))
+            rows.append(row)
+        if group_by is None and not rows:
+            rows.append({'total': 0.0, 'vote_count': 0, 'characters': 0})
+        return rows
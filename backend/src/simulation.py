@@ -0,0 +1,252 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Any, TYPE_CHECKING
+from config.seasons_rounds import get_eliminated_characters, get_elimination_count
+
+if TYPE_CHECKING:
+    from .vote_tracker import VoteTracker
+
+# 每个分块最多模拟的 (次数 × 角色数) 单元格，控制单个分块的内存；分块只由模拟次数和角色数决定，与进程数无关
+CHUNK_CELLS = 2_000_000
+# 估计每个角色的票数波动时，向全体平均波动收缩的先验轮次数（轮次少的角色更多地参考全体）
+PRIOR_ROUNDS = 3
+# 对数票数波动的先验标准差；全体平均波动同样按 PRIOR_ROUNDS 轮向它收缩，已完成的轮次很少时不会低估波动
+LOG_SIGMA_PRIOR = 0.25
+
+
+def build_projection_model(tracker: "VoteTracker", as_of_index: int) -> Dict[str, Any]:
+    """
+    根据已完成的轮次建立模拟的初始状态和票数模型
+
+    赛制取自赛季配置：各轮的淘汰人数见 get_elimination_count（未进行的轮次还没有淘汰名单，只能按赛制取人数）；
+    未配置人数的淘汰赛轮次淘汰剩余人数的一半，为两两对决。
+    已完成的轮次（as_of_index 及之前）按配置中的实际名单淘汰，之后的轮次由模拟决定。
+
+    票数模型：log(票数) = 角色水平 + 轮次效应 + 噪声。轮次效应为该轮全体角色对数票数的均值，
+    角色水平为去除轮次效应后的均值，噪声的标准差按角色估计并向全体收缩，全体的标准差再向 LOG_SIGMA_PRIOR 收缩。
+    之后轮次的轮次效应取最后一个已完成的非外卡轮次。
+
+    :param tracker: 数据集
+    :param as_of_index: 最后一个已完成轮次的序号
+    :return: 模型（只包含 numpy 数组和基本类型，可传给工作进程）。
+        已被淘汰的角色名次都在仍未被淘汰的角色（contenders）之后，模拟只涉及后者，各数组均只包含这些角色
+    """
+    vote_rounds = tracker.vote_columns
+    wildcard_rounds = set(tracker.wildcard_rounds or [])
+    votes = tracker.get_vote_view()['votes']
+    character_count = len(tracker.characters)
+    rows = {key: row for row, key in enumerate(zip(tracker.characters, tracker.series))}
+
+    # 拟合票数模型
+    observed = votes[:, :as_of_index + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_votes = np.where(observed > 0, np.log(np.where(observed > 0, observed, 1.0)), np.nan)
+    has_votes = ~np.isnan(log_votes)
+    round_counts = has_votes.sum(axis=0)
+    round_effects = np.where(round_counts > 0, np.nansum(log_votes, axis=0) / np.maximum(round_counts, 1), 0.0)
+    residuals = log_votes - round_effects[None, :]
+    counts = has_votes.sum(axis=1)
+    levels = np.nansum(residuals, axis=1) / np.maximum(counts, 1)
+    deviations = np.where(has_votes, residuals - levels[:, None], 0.0)
+    squared = (deviations ** 2).sum(axis=1)
+    degrees_of_freedom = int(counts.sum() - (counts > 0).sum())
+    prior_weight = PRIOR_ROUNDS * character_count
+    pooled_variance = (squared.sum() + prior_weight * LOG_SIGMA_PRIOR ** 2) / (degrees_of_freedom + prior_weight)
+    sigmas = np.sqrt((squared + PRIOR_ROUNDS * pooled_variance) / (np.maximum(counts - 1, 0) + PRIOR_ROUNDS))
+    if (counts > 0).any():
+        levels[counts == 0] = levels[counts > 0].min()
+    regular_rounds = [index for index in range(as_of_index + 1) if vote_rounds[index] not in wildcard_rounds and round_counts[index]]
+    future_effect = round_effects[regular_rounds[-1]] if regular_rounds else 0.0
+
+    # 按配置重放已完成轮次的淘汰，得到初始状态
+    filled = np.nan_to_num(votes, nan=0.0)
+    alive = np.ones(character_count, dtype=bool)
+    cumulative = filled[:, :as_of_index + 1].sum(axis=1)
+    stage_totals = np.zeros(character_count)
+    steps = []
+    remaining = character_count
+    for index, round_name in enumerate(vote_rounds):
+        is_knockout = '淘汰赛' in round_name
+        is_wildcard = round_name in wildcard_rounds
+        eliminated = [rows[key] for key in (
+            (char['character'], char['series']) for char in get_eliminated_characters(tracker.season, round_name)
+        ) if key in rows]
+        if index > as_of_index:
+            eliminate = get_elimination_count(tracker.season, round_name)
+            if not eliminate and is_knockout:
+                eliminate = remaining // 2
+            eliminate = min(eliminate, max(remaining - 1, 0))
+            remaining -= eliminate
+            steps.append({
+                'round': round_name,
+                'knockout': is_knockout,
+                'wildcard': is_wildcard,
+                'eliminate': eliminate
+            })
+            continue
+
+        if not is_wildcard:
+            stage_totals += filled[:, index]
+        eliminated = [row for row in eliminated if alive[row]]
+        if eliminated:
+            alive[eliminated] = False
+            stage_totals[:] = 0
+        remaining = int(alive.sum())
+
+    contenders = np.flatnonzero(alive)
+    return {
+        'contenders': contenders,
+        'levels': (levels + future_effect)[contenders],
+        'sigmas': sigmas[contenders],
+        'cumulative': cumulative[contenders],
+        'stage_totals': stage_totals[contenders],
+        'steps': steps
+    }
+
+
+def simulate_chunk(task: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    批量模拟剩余轮次（供 ProcessPoolExecutor 调用），每次模拟为矩阵中的一行
+
+    - 普通轮次：票数计入累计票数和本阶段票数（外卡轮次不计入本阶段票数）
+    - 淘汰轮次：本阶段票数最少的 k 个角色被淘汰
+    - 淘汰赛轮次：淘汰人数为剩余人数一半时，按累计票数排种子（第 1 对最后 1、第 2 对倒数第 2 ……），
+      当轮票数高者晋级（同票时种子靠前者晋级）；否则当轮票数最少的 k 个角色被淘汰
+    - 全部轮次结束后仍未被淘汰的角色按累计票数排定剩余名次
+
+    :param task: {'model', 'simulations', 'seed', 'max_positions'}
+    :return: {'counts': 角色 × 名次（前 max_positions 名）的次数, 'position_sums': 每个角色的名次之和}（只包含 contenders）
+    """
+    model = task['model']
+    simulations = task['simulations']
+    max_positions = task['max_positions']
+    rng = np.random.default_rng(task['seed'])
+
+    character_count = len(model['levels'])
+    alive = np.ones((simulations, character_count), dtype=bool)
+    positions = np.zeros((simulations, character_count), dtype=np.int32)
+    cumulative = np.tile(model['cumulative'], (simulations, 1))
+    stage_totals = np.tile(model['stage_totals'], (simulations, 1))
+    sim_rows = np.arange(simulations)[:, None]
+
+    for step in model['steps']:
+        votes = np.exp(model['levels'] + model['sigmas'] * rng.standard_normal((simulations, character_count)))
+        votes[~alive] = 0.0
+        cumulative += votes
+        if not step['wildcard']:
+            stage_totals += votes
+
+        k = step['eliminate']
+        remaining = int(alive[0].sum())
+        k = min(k, remaining - 1)
+        if k <= 0:
+            continue
+
+        if step['knockout'] and 2 * k == remaining:
+            seeds = np.argsort(np.where(alive, -cumulative, np.inf), axis=1)[:, :remaining]
+            top, bottom = seeds[:, :k], seeds[:, remaining - 1:k - 1:-1]
+            top_votes = np.take_along_axis(votes, top, axis=1)
+            bottom_votes = np.take_along_axis(votes, bottom, axis=1)
+            losers = np.where(top_votes >= bottom_votes, bottom, top)
+            scores = np.minimum(top_votes, bottom_votes)
+        else:
+            values = votes if step['knockout'] else stage_totals
+            candidates = np.where(alive, values, np.inf)
+            losers = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(values, losers, axis=1)
+
+        # 同一轮淘汰的角色按票数从高到低排定名次
+        losers = np.take_along_axis(losers, np.argsort(-scores, axis=1, kind='stable'), axis=1)
+        positions[sim_rows, losers] = remaining - k + 1 + np.arange(k)[None, :]
+        alive[sim_rows, losers] = False
+        if not step['knockout']:
+            stage_totals[:] = 0.0
+
+    remaining = int(alive[0].sum())
+    if remaining:
+        order = np.argsort(np.where(alive, -cumulative, np.inf), axis=1)[:, :remaining]
+        positions[sim_rows, order] = 1 + np.arange(remaining)[None, :]
+
+    in_range = positions <= max_positions
+    characters = np.broadcast_to(np.arange(character_count), positions.shape)[in_range]
+    counts = np.bincount(
+        characters * max_positions + positions[in_range] - 1, minlength=character_count * max_positions
+    ).reshape(character_count, max_positions)
+    return {'counts': counts, 'position_sums': positions.sum(axis=0, dtype=np.int64)}
+
+
+def project_finishing_positions(tracker: "VoteTracker", as_of_round: Optional[str] = None, simulations: int = 10000,
+                                seed: int = 0, max_positions: int = 16, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    蒙特卡洛模拟剩余轮次，估计每个角色的最终名次分布
+
+    模拟次数按 CHUNK_CELLS 分块，各分块的随机数种子由 seed 派生，分块在进程池中并行执行；
+    同样的 seed 和模拟次数在任意进程数下结果相同。
+
+    :param tracker: 数据集
+    :param as_of_round: 从该轮结束时开始模拟，默认为最后一个有票数的轮次
+    :param simulations: 模拟次数
+    :param seed: 随机数种子
+    :param max_positions: 返回前多少个名次的概率
+    :param workers: 并行进程数，默认为 CPU 核数
+    :return: {
+        'season', 'version', 'as_of_round', 'simulated_rounds', 'simulations', 'seed',
+        'characters': [{'character', 'series', 'expected_position', 'win_probability', 'positions': [第 1..max_positions 名的概率]}]
+            （只包含该轮结束时仍未被淘汰的角色，按期望名次排列）
+    }
+    :raises: ValueError 轮次不存在或还没有任何轮次有票数
+    """
+    vote_rounds = tracker.vote_columns
+    if as_of_round is None:
+        has_votes = ~np.isnan(tracker.get_vote_view()['votes']).all(axis=0)
+        if not has_votes.any():
+            raise ValueError("还没有任何轮次有票数，无法模拟")
+        as_of_index = int(np.flatnonzero(has_votes)[-1])
+    elif as_of_round in vote_rounds:
+        as_of_index = vote_rounds.index(as_of_round)
+    else:
+        raise ValueError(f"轮次不存在: {as_of_round}")
+
+    model = build_projection_model(tracker, as_of_index)
+    character_count = len(model['contenders'])
+    max_positions = max(1, min(max_positions, character_count))
+
+    chunk_size = max(1, min(simulations, CHUNK_CELLS // max(character_count, 1)))
+    chunk_sizes = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [
+        {'model': model, 'simulations': size, 'seed': chunk_seed, 'max_positions': max_positions}
+        for size, chunk_seed in zip(chunk_sizes, seeds)
+    ]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1 or not model['steps']:
+        results = [simulate_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(simulate_chunk, tasks))
+
+    counts = sum(result['counts'] for result in results)
+    expected = sum(result['position_sums'] for result in results) / simulations
+    contenders = model['contenders']
+    order = np.lexsort((tracker._name_order[contenders], expected))
+
+    return {
+        'season': tracker.season,
+        'version': tracker.version,
+        'as_of_round': vote_rounds[as_of_index],
+        'simulated_rounds': [step['round'] for step in model['steps']],
+        'simulations': simulations,
+        'seed': seed,
+        'characters': [
+            {
+                'character': tracker.characters[row],
+                'series': tracker.series[row],
+                'expected_position': round(float(expected[index]), 2),
+                'win_probability': round(float(counts[index, 0] / simulations), 4),
+                'positions': [round(float(value), 4) for value in counts[index] / simulations]
+            }
+            for index, row in zip(order.tolist(), contenders[order].tolist())
+        ]
+    }
@@ -0,0 +1,75 @@
+import threading
+from typing import Callable, Dict, Hashable, Any
+
+
+class _Call:
+    """一次进行中的计算"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求
+
+    同一个键同时只执行一次计算：计算进行中到达的相同请求等待这次计算完成并共享它的结果
+    （或它抛出的异常），不会各自在线程池中重复计算。计算完成后键即被移除，结果不会被保留，
+    之后的请求重新执行（结果的缓存由 VoteTracker 的视图缓存负责）。
+
+    键应包含数据集版本和规范化后的请求参数，数据集更新后的请求不会拿到旧版本的结果。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行 fn，或等待同一个键正在进行的计算
+
+        :param key: 请求的键
+        :param fn: 计算函数，只在没有相同的计算进行中时调用
+        :return: fn 的结果（并发的相同请求得到同一个对象，调用方不应修改）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,254 @@
+import os
+import re
+import gzip
+import json
+import hashlib
+import inspect
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Any, Tuple
+from config.seasons_rounds import get_round_stage
+from .logger import logger
+
+# 导出的过滤组合：(exclude_wildcard, exclude_ranking)
+EXPORT_FILTERS = [(False, False), (True, False), (False, True), (True, True)]
+# 每轮导出的动画帧数（前端在两轮之间自行插值）
+EXPORT_FRAMES_PER_ROUND = 1
+
+# 每个工作进程中已加载的数据集，按版本缓存
+_trackers = {}
+
+
+def route_key(path: str, params: Dict[str, Any]) -> str:
+    """
+    生成数据包清单中的路由键，前端按同样的规则查找
+
+    值为 None / False / 空字符串 / 空列表的参数省略，其余按参数名排序；
+    布尔值写为 true，列表展开为多个同名参数。
+
+    :param path: 接口路径（不含 /api/v1 前缀），如 "votes-by-rounds"
+    :param params: 查询参数
+    """
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if value is None or value is False or value == '' or value == []:
+            continue
+        for item in (value if isinstance(value, list) else [value]):
+            parts.append(f"{name}={'true' if item is True else item}")
+    return f"{path}?{'&'.join(parts)}" if parts else path
+
+
+def call_endpoint(endpoint, **params) -> bytes:
+    """
+    直接调用接口函数并按 FastAPI 的方式序列化响应
+
+    未指定的参数使用接口声明的默认值（Query(...) 中的默认值）。
+
+    :return: 响应的 JSON 字节
+    :raises: HTTPException 接口返回的错误
+    """
+    from fastapi import params as fastapi_params
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, Response
+
+    kwargs = {}
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        default = parameter.default
+        if isinstance(default, fastapi_params.Param):
+            default = default.default
+        kwargs[name] = params.get(name, default)
+    result = endpoint(**kwargs)
+    if isinstance(result, Response):
+        return result.body
+    return JSONResponse(content=jsonable_encoder(result)).body
+
+
+def build_routes(tracker) -> List[Tuple[Optional[Tuple[bool, bool]], str, Dict[str, Any]]]:
+    """
+    列出一个赛季要导出的全部只读接口
+
+    :return: [(过滤组合（与过滤条件无关的接口为 None）, 接口路径, 查询参数), ...]
+    """
+    # 按阶段划分的轮次区间，加上整个赛季
+    stage_ranges = {}
+    for round_name in tracker.vote_columns:
+        stage = get_round_stage(round_name)
+        stage_ranges.setdefault(stage, [round_name, round_name])[1] = round_name
+    ranges = list(stage_ranges.values())
+    if tracker.vote_columns:
+        ranges.append([tracker.vote_columns[0], tracker.vote_columns[-1]])
+
+    routes = [
+        (None, 'current-season', {}),
+        (None, 'vote-rounds', {}),
+        (None, 'characters-info', {})
+    ]
+    for combination in EXPORT_FILTERS:
+        exclude_wildcard, exclude_ranking = combination
+        filters = {'exclude_wildcard': exclude_wildcard, 'exclude_ranking': exclude_ranking}
+        routes += [
+            (combination, 'votes-by-rounds', filters),
+            (combination, 'bootstrap', filters),
+            (combination, 'round-stats', filters),
+            (combination, 'milestones', filters),
+            (combination, 'frames', filters),
+            (combination, 'bump-chart', filters),
+            (combination, 'bump-chart', {**filters, 'order_by': 'round'}),
+            (combination, 'rollup', filters)
+        ]
+        routes += [(combination, 'rollup', {**filters, 'group_by': dimension}) for dimension in ('stage', 'series', 'cv')]
+        routes += [
+            (combination, 'round-range', {**filters, 'start_round': start, 'end_round': end})
+            for start, end in ranges
+        ]
+    return routes
+
+
+def _render_route(tracker, path: str, params: Dict[str, Any]) -> bytes:
+    """生成一个接口的响应（当前数据集需已设为 tracker）"""
+    from . import main
+
+    if path == 'frames':
+        # 动画帧没有对应的只读接口，格式与渲染任务使用的帧相同
+        from .race_chart_renderer import build_frames, load_chart_config
+        view = tracker.get_vote_view(exclude_wildcard=params['exclude_wildcard'], exclude_ranking=params['exclude_ranking'])
+        frames = build_frames(view, tracker.characters, load_chart_config(tracker.season), EXPORT_FRAMES_PER_ROUND)
+        return json.dumps(frames, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    endpoints = {
+        'current-season': main.get_current_season,
+        'vote-rounds': main.get_vote_rounds,
+        'characters-info': main.get_characters_info,
+        'votes-by-rounds': main.get_votes_by_rounds,
+        'bootstrap': main.get_bootstrap,
+        'round-stats': main.get_round_stats,
+        'milestones': main.get_milestones,
+        'bump-chart': main.get_bump_chart,
+        'rollup': main.get_rollup,
+        'round-range': main.get_round_range
+    }
+    return call_endpoint(endpoints[path], **params)
+
+
+def _write_file(output_dir: str, path: str, body: bytes, compress: bool) -> str:
+    """按内容哈希命名写入文件，内容相同的响应只保存一份；返回相对于输出目录的路径"""
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    slug = re.sub(r'[^a-z0-9-]', '', path)
+    filename = f"{slug}.{digest}.json.gz" if compress else f"{slug}.{digest}.json"
+    relative_path = f"files/{filename}"
+    target = os.path.join(output_dir, 'files', filename)
+    if not os.path.exists(target):
+        data = gzip.compress(body, compresslevel=9, mtime=0) if compress else body
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, target)
+    return relative_path
+
+
+def export_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    导出一个赛季的一组接口（供 ProcessPoolExecutor 调用）
+
+    :param task: {'season', 'version', 'path', 'filename', 'combination', 'output_dir', 'compress'}
+    :return: {'season', 'routes': {路由键: 文件}, 'errors': [...], 'raw_bytes', 'files'}
+    """
+    from . import main
+    from .vote_tracker import VoteTracker
+
+    tracker = _trackers.get(task['version'])
+    if tracker is None:
+        tracker = VoteTracker(task['path'], task['filename'])
+        tracker.version = task['version']
+        _trackers[task['version']] = tracker
+    # 接口函数通过 get_vote_tracker() 读取当前数据集
+    main._vote_tracker = tracker
+
+    result = {'season': task['season'], 'routes': {}, 'errors': [], 'raw_bytes': 0}
+    for combination, path, params in build_routes(tracker):
+        if combination != task['combination']:
+            continue
+        key = route_key(path, params)
+        try:
+            body = _render_route(tracker, path, params)
+        except Exception as e:
+            detail = getattr(e, 'detail', None) or str(e)
+            result['errors'].append(f"{task['season']} {key}: {detail}")
+            continue
+        result['routes'][key] = _write_file(task['output_dir'], path, body, task['compress'])
+        result['raw_bytes'] += len(body)
+    return result
+
+
+def export_static_bundle(dataset_store, output_dir: str, workers: Optional[int] = None, compress: bool = True,
+                         default_season: Optional[str] = None) -> Dict[str, Any]:
+    """
+    将数据集存储中每个赛季的最新版本导出为静态数据包
+
+    每个赛季的每个过滤组合为一个任务，在进程池中并行执行。
+    输出目录中 manifest.json 记录每个赛季的路由键到文件的映射，文件按内容哈希命名，可以长期缓存。
+
+    :param dataset_store: 数据集存储
+    :param output_dir: 输出目录
+    :param workers: 并行进程数，默认为 CPU 核数
+    :param compress: 是否以 gzip 压缩文件
+    :param default_season: 前端默认显示的赛季，默认为最新的赛季
+    :return: 清单内容，另含 'errors' 和 'stats'
+    """
+    os.makedirs(os.path.join(output_dir, 'files'), exist_ok=True)
+    seasons = {
+        season: entry['latest']
+        for season, entry in sorted(dataset_store.list_seasons().items())
+        if entry['latest']
+    }
+    if not seasons:
+        raise ValueError("数据集存储中没有任何赛季")
+
+    tasks = []
+    for season, file_hash in seasons.items():
+        blob = dataset_store.get_blob(file_hash)
+        for combination in [None] + EXPORT_FILTERS:
+            tasks.append({
+                'season': season,
+                'version': file_hash,
+                'path': dataset_store.get_blob_path(file_hash),
+                'filename': blob['filename'],
+                'combination': combination,
+                'output_dir': output_dir,
+                'compress': compress
+            })
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        results = [export_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(export_task, tasks))
+
+    manifest = {
+        'generated_at': datetime.now().isoformat(),
+        'encoding': 'gzip' if compress else 'identity',
+        'default_season': default_season if default_season in seasons else max(seasons),
+        'seasons': {season: {'version': file_hash, 'routes': {}} for season, file_hash in seasons.items()}
+    }
+    errors = []
+    raw_bytes = 0
+    for result in results:
+        manifest['seasons'][result['season']]['routes'].update(result['routes'])
+        errors += result['errors']
+        raw_bytes += result['raw_bytes']
+
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    files = os.listdir(os.path.join(output_dir, 'files'))
+    stats = {
+        'routes': sum(len(entry['routes']) for entry in manifest['seasons'].values()),
+        'files': len(files),
+        'raw_bytes': raw_bytes,
+        'written_bytes': sum(os.path.getsize(os.path.join(output_dir, 'files', name)) for name in files),
+        'workers': workers
+    }
+    logger.info(f"静态数据包导出完成: {len(seasons)} 个赛季，{stats['routes']} 个接口，{stats['files']} 个文件，使用 {workers} 个进程")
+    return {**manifest, 'errors': errors, 'stats': stats}
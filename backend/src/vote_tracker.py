@@ -2,17 +2,28 @@ import os
 import sys
 import re
 import math
+import importlib.util
+import warnings
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import logging
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 from config.seasons_rounds import (
     NON_VOTE_COLUMNS,
+    CHARACTER_COLUMNS,
     get_season_rounds,
+    get_season_schema,
     get_wildcard_rounds,
-    get_eliminated_characters
+    get_eliminated_characters,
+    get_round_stage
 )
+from config import settings
 from .logger import logger
+from .ranking import rank, rank_order, ranks_from_order
+from .rollup_cube import RollupCube
 
 # 将项目根目录添加到 Python 路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,6 +37,16 @@ if current_dir not in sys.path:
 
 _skipped_votes = set()  # 用集合来存储被跳过的轮次和角色
 
+# 最多缓存的投票视图数，超过时丢弃最久未使用的视图（视图中缓存的排序、统计等随之释放）
+MAX_CACHED_VIEWS = 16
+
+# 轮次统计的默认百分位数和前 k 名占比中的 k，只有默认参数的统计结果会缓存
+ROUND_STATS_PERCENTILES = (10, 25, 50, 75, 90)
+ROUND_STATS_TOP_K = 5
+
+# 剩余轮次模拟的默认参数（模拟次数、随机数种子、名次数），只有默认参数的结果会缓存
+PROJECTION_DEFAULTS = (10000, 0, 16)
+
 def safe_float_convert(value) -> Optional[float]:
     """
     安全地转换浮点数，处理空值、无穷大和非数字值
@@ -69,6 +90,55 @@ def safe_float_convert(value) -> Optional[float]:
         logger.warning(f"转换值 '{value}' 失败: {str(e)}")
         return None
 
+# 安装了 pyarrow 时使用多线程的 pyarrow 解析器
+CSV_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c'
+
+
+def _round_votes(numbers: np.ndarray) -> np.ndarray:
+    """保留两位小数，无穷大记为 NaN"""
+    numbers = numbers.astype(np.float64)
+    numbers[~np.isfinite(numbers)] = np.nan
+    rounded = np.round(numbers, 2)
+    # np.round 对 .xx5 这样的中间值按"银行家舍入"处理，这些少数值改用内置 round 以保持与逐个转换一致
+    scaled = numbers * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    rounded[ties] = [round(float(value), 2) for value in numbers[ties]]
+    return rounded
+
+
+def parse_vote_column(values: pd.Series) -> np.ndarray:
+    """
+    向量化地解析一列票数，规则与 safe_float_convert 相同：
+    空值和无效值记为 NaN，包含 '/' 的值为斜线前后数值的总和
+    
+    解析器已识别为数值的列直接取整；只有包含 "a/b" 等非数值内容的列才按字符串处理
+    
+    :param values: read_csv 读取的票数列
+    :return: float32 数组
+    """
+    if values.dtype != object:
+        return _round_votes(values.to_numpy(dtype=np.float64)).astype(np.float32)
+
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    result = _round_votes(numbers)
+    # 只对无法直接转换的单元格做字符串处理
+    pending = np.flatnonzero(np.isnan(numbers) & values.notna().to_numpy())
+    if len(pending):
+        text = values.iloc[pending].astype(str).str.strip()
+        has_slash = text.str.contains('/', regex=False).to_numpy()
+        if has_slash.any():
+            parts = text[has_slash].str.split('/', expand=True)
+            part_numbers = _round_votes(parts.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64))
+            result[pending[has_slash]] = pd.DataFrame(part_numbers).sum(axis=1, min_count=1).to_numpy()
+
+        invalid = ~has_slash & (text != '').to_numpy() & ~text.str.lower().isin(['nan', 'inf', '-inf', 'infinity', '-infinity']).to_numpy()
+        if invalid.any():
+            logger.warning(f"列 {values.name} 中有 {int(invalid.sum())} 个无法转换的值，已按空值处理: "
+                           f"{text[invalid].head(5).tolist()}")
+
+    return result.astype(np.float32)
+
+
 class VoteTracker:
     def __init__(self, csv_path: str, original_filename: str = None):
         """
@@ -83,9 +153,17 @@ class VoteTracker:
         self.wildcard_rounds = None
         self.season = None
         self.csv_path = csv_path
+        self.version = None  # 数据集版本（文件内容哈希），由调用方设置
+        self.characters = []
+        self.series = []
+        self._votes = None  # 角色 × 全部轮次 的票数矩阵，空值为 NaN
+        self._view_cache = {}  # 按数据集缓存的派生数据（前缀和、名次、索引等），键的数量有限
+        self._views = OrderedDict()  # 按过滤后的轮次缓存的投票视图（LRU，最多 MAX_CACHED_VIEWS 个）
+        self._views_lock = threading.Lock()
         
         if csv_path:
             self.load_csv(csv_path, original_filename)
+            self._build_vote_matrix()
         else:
             raise ValueError("必须提供CSV文件路径")
 
@@ -103,12 +181,6 @@ class VoteTracker:
                 logger.error(f"数据文件不存在: {csv_path}")
                 raise FileNotFoundError(f"数据文件不存在: {csv_path}")
             
-            # 读取CSV文件
-            self.data = pd.read_csv(csv_path)
-            
-            # 清理列名中的所有空格
-            self.data.columns = [col.replace(' ', '') for col in self.data.columns]
-            
             # 获取赛季信息
             filename = original_filename or os.path.basename(csv_path)
             self.season = self.get_season_from_filename(filename)
@@ -118,18 +190,38 @@ class VoteTracker:
             expected_vote_columns = get_season_rounds(self.season)
             self.wildcard_rounds = get_wildcard_rounds(self.season)
             
-            # 获取CSV文件中的投票列
-            csv_vote_columns = [col for col in self.data.columns if col not in NON_VOTE_COLUMNS]
+            # 先只读表头，建立清理空格后的列名到原始列名的映射
+            header = pd.read_csv(csv_path, nrows=0).columns
+            raw_columns = {col.replace(' ', ''): col for col in header}
             
             # 检查CSV文件中的列名是否完全匹配配置
-            missing_columns = [col for col in expected_vote_columns if col not in csv_vote_columns]
-            extra_columns = [col for col in csv_vote_columns if col not in expected_vote_columns]
+            missing_character_columns = [col for col, required in CHARACTER_COLUMNS.items() if required and col not in raw_columns]
+            missing_columns = [col for col in expected_vote_columns if col not in raw_columns]
+            extra_columns = [
+                col for col in raw_columns
+                if col not in expected_vote_columns and col not in NON_VOTE_COLUMNS and col not in CHARACTER_COLUMNS
+            ]
+            
+            if missing_character_columns:
+                raise ValueError(f"CSV文件缺少以下必需的列: {missing_character_columns}")
             
             if missing_columns:
                 raise ValueError(f"CSV文件缺少以下必需的投票列: {missing_columns}")
             
             if extra_columns:
-                logger.warning(f"CSV文件包含以下额外的投票列: {extra_columns}")
+                logger.warning(f"CSV文件包含以下额外的列，已忽略: {extra_columns}")
+            
+            # 只读取配置中的列：角色信息列直接解析为分类类型，
+            # 票数列可能包含 "a/b" 形式的值，由解析器推断类型后再向量化转换为 float32
+            schema = {col: dtype for col, dtype in get_season_schema(self.season).items() if col in raw_columns}
+            dtypes = {raw_columns[col]: 'category' for col, dtype in schema.items() if dtype == 'category'}
+            data = pd.read_csv(csv_path, usecols=[raw_columns[col] for col in schema], dtype=dtypes, engine=CSV_ENGINE)
+            data.columns = [col.replace(' ', '') for col in data.columns]
+            
+            for col, dtype in schema.items():
+                if dtype == 'float32':
+                    data[col] = parse_vote_column(data[col])
+            self.data = data[list(schema)]
             
             # 使用配置中的投票列，保持原有顺序
             self.vote_columns = expected_vote_columns
@@ -140,7 +232,8 @@ class VoteTracker:
             logger.error(f"加载CSV文件失败: {str(e)}")
             raise
 
-    def get_season_from_filename(self, filename: str) -> str:
+    @staticmethod
+    def get_season_from_filename(filename: str) -> str:
         """从文件名中提取赛季信息"""
         season_match = re.search(r'(\d{4})_season', filename)
         if not season_match:
@@ -171,11 +264,7 @@ class VoteTracker:
         if excluded_columns is None:
             excluded_columns = []
             
-        # 获取所有列（轮次）
-        all_columns = [col.replace(' ', '') for col in self.data.columns.tolist()]
-        
-        # 过滤出投票列
-        vote_columns = [col for col in all_columns if col not in NON_VOTE_COLUMNS]
+        vote_columns = self.vote_columns
         
         # 排除指定的列
         vote_columns = [col for col in vote_columns if col not in excluded_columns]
@@ -188,67 +277,6 @@ class VoteTracker:
 
         return vote_columns
 
-    def get_vote_data(self, vote_rounds, exclude_ranking=False):
-        """
-        获取投票数据
-        
-        Args:
-            vote_rounds: 投票轮次列表
-            exclude_ranking: 是否排除排位赛
-            
-        Returns:
-            list: 投票数据列表
-        """
-        if not vote_rounds:
-            return []
-            
-        votes_data = []
-        eliminated_info = {}  # 用于收集淘汰信息
-        
-        for idx, row in self.data.iterrows():
-            character_name = row['角色']
-            series_name = row['作品']
-            
-            # 收集每个轮次的投票数据
-            votes = []
-            for col in vote_rounds:
-                # 使用原始列名从数据中获取值
-                original_col = next(c for c in self.data.columns if c.replace(' ', '') == col)
-                vote = safe_float_convert(row[original_col])
-                votes.append(vote)
-            
-            # 如果需要排除排位赛，才查找角色被淘汰的轮次
-            eliminated_round = None
-            if exclude_ranking:
-                for round_name in vote_rounds:
-                    if get_eliminated_characters(self.season, round_name):
-                        eliminated_chars = get_eliminated_characters(self.season, round_name)
-                        for char in eliminated_chars:
-                            if char['character'] == character_name and char['series'] == series_name:
-                                eliminated_round = round_name
-                                eliminated_info[round_name] = eliminated_info.get(round_name, [])
-                                eliminated_info[round_name].append(f"{character_name}（{series_name}）")
-                                break
-                    if eliminated_round:
-                        break
-            
-                # 如果角色已被淘汰，排除当前轮次和后续轮次的数据
-                if eliminated_round:
-                    for i, col in enumerate(vote_rounds):
-                        # 如果是淘汰赛，则包含当前轮次；否则不包含
-                        is_elimination_round = '淘汰赛' in col
-                        if (not is_elimination_round and i >= vote_rounds.index(eliminated_round)) or \
-                           (is_elimination_round and i > vote_rounds.index(eliminated_round)):
-                            votes[i] = None
-            
-            votes_data.append({
-                'character': character_name,
-                'series': series_name,  
-                'votes': votes
-            })
-                
-        return votes_data
-
     def get_participating_counts(self, vote_rounds, votes_data):
         """
         获取每轮参与的角色数量，只统计未被淘汰的角色
@@ -297,6 +325,611 @@ class VoteTracker:
         
         return participating_counts
 
+    def _build_vote_matrix(self):
+        """
+        将投票列转换为 角色 × 轮次 的 float32 矩阵，只在加载时执行一次
+        转换后 self.data 只保留角色信息列，票数只在矩阵中保存一份
+        """
+        self.characters = self.data['角色'].tolist()
+        self.series = self.data['作品'].tolist()
+        self._votes = self.data[self.vote_columns].to_numpy(dtype=np.float32)
+        self.data = self.data.drop(columns=self.vote_columns)
+        # 角色名的字典序，用作同票时的次级排序键
+        self._name_order = np.argsort(np.argsort(np.array(self.characters, dtype=str), kind='stable'), kind='stable')
+        self._view_cache = {}
+        self._views = OrderedDict()
+
+    def _get_ranking_mask(self) -> np.ndarray:
+        """
+        获取排除排位赛时需要置空的单元格掩码
+        被淘汰的角色：非淘汰赛轮次从淘汰轮次起置空，淘汰赛轮次从淘汰轮次之后置空
+        """
+        all_vote_rounds = self.vote_columns
+        eliminated_index = {}
+        for round_index, round_name in enumerate(all_vote_rounds):
+            for char in get_eliminated_characters(self.season, round_name):
+                eliminated_index.setdefault((char['character'], char['series']), round_index)
+
+        elimination_rounds = np.array([
+            eliminated_index.get((character, series), -1)
+            for character, series in zip(self.characters, self.series)
+        ])
+        round_positions = np.arange(len(all_vote_rounds))
+        is_knockout = np.array(['淘汰赛' in round_name for round_name in all_vote_rounds])
+        threshold = elimination_rounds[:, None] + is_knockout[None, :]
+        return (elimination_rounds[:, None] >= 0) & (round_positions[None, :] >= threshold)
+
+    def get_vote_view(self, excluded_columns=None, exclude_wildcard=False, exclude_ranking=False) -> Dict[str, Any]:
+        """
+        获取指定过滤条件下的投票视图（带缓存）
+        
+        视图包含过滤后的轮次、票数矩阵、累计票数矩阵和参与人数，
+        排序结果在首次使用时计算并缓存在视图中。
+        缓存按过滤后的轮次和是否排除排位赛区分（不存在的列名不影响缓存键），
+        最多保留 MAX_CACHED_VIEWS 个，超过时丢弃最久未使用的视图。
+        
+        Args:
+            excluded_columns: 要排除的列名列表
+            exclude_wildcard: 是否排除外卡赛
+            exclude_ranking: 是否排除排位赛
+            
+        Returns:
+            dict: 投票视图
+        """
+        excluded = set(excluded_columns or []) | (set(self.wildcard_rounds or []) if exclude_wildcard else set())
+        cache_key = (tuple(round_name for round_name in self.vote_columns if round_name not in excluded), bool(exclude_ranking))
+        with self._views_lock:
+            if cache_key in self._views:
+                self._views.move_to_end(cache_key)
+                return self._views[cache_key]
+
+        vote_rounds = self.get_filtered_vote_rounds(excluded_columns, exclude_wildcard)
+        round_indices = [self.vote_columns.index(round_name) for round_name in vote_rounds]
+
+        # 视图使用 float64 计算，并还原为两位小数，保证累计票数与逐个相加的结果一致
+        votes = np.round(self._votes[:, round_indices].astype(np.float64), 2)
+        if exclude_ranking:
+            votes[self._get_ranking_mask()[:, round_indices]] = np.nan
+
+        all_participating_counts = self._get_all_participating_counts()
+        view = {
+            'vote_rounds': vote_rounds,
+            'votes': votes,
+            'cumulative': np.cumsum(np.nan_to_num(votes, nan=0.0), axis=1),
+            'participating_counts': {round_name: all_participating_counts[round_name] for round_name in vote_rounds}
+        }
+        with self._views_lock:
+            # 并发构建同一视图时保留先放入缓存的一个，保证调用方拿到同一个视图对象
+            view = self._views.setdefault(cache_key, view)
+            self._views.move_to_end(cache_key)
+            while len(self._views) > MAX_CACHED_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+    def _get_all_participating_counts(self) -> Dict[str, int]:
+        """获取全部轮次的参与人数（与过滤条件无关，只计算一次）"""
+        if '_participating_counts' not in self._view_cache:
+            votes_data = [
+                {'character': character, 'series': series}
+                for character, series in zip(self.characters, self.series)
+            ]
+            self._view_cache['_participating_counts'] = self.get_participating_counts(self.vote_columns, votes_data)
+        return self._view_cache['_participating_counts']
+
+    def get_round_orderings(self, view: Dict[str, Any], order_by: str = 'cumulative') -> np.ndarray:
+        """
+        获取视图中每一轮的角色排序（带缓存）
+        
+        按票数降序排列，同票时按角色名排序，当轮无票的角色排在最后。
+        
+        Args:
+            view: get_vote_view 返回的视图
+            order_by: 'cumulative' 按累计票数，'round' 按当轮票数
+            
+        Returns:
+            np.ndarray: 形状为 (轮次数, 角色数) 的行号矩阵，第 r 行为第 r 轮的名次顺序
+        """
+        if order_by not in ('cumulative', 'round'):
+            raise ValueError(f"不支持的排序方式: {order_by}")
+
+        cache_key = f'{order_by}_order'
+        if cache_key not in view:
+            values = view['cumulative'] if order_by == 'cumulative' else view['votes']
+            view[cache_key] = rank_order(values.T, tie_breakers=(self._name_order,)).astype(np.int32)
+        return view[cache_key]
+
+    def get_rank_matrix(self, view: Dict[str, Any], order_by: str = 'cumulative', tie_method: str = 'competition') -> np.ndarray:
+        """
+        获取视图中每个角色每一轮的名次矩阵（带缓存）
+        
+        默认采用竞争排名（1224）：同票角色名次相同，后续名次跳过并列人数。
+        按当轮票数排名时，当轮无票的角色名次为 0。
+        
+        Args:
+            view: get_vote_view 返回的视图
+            order_by: 'cumulative' 按累计票数，'round' 按当轮票数
+            tie_method: 并列处理方式，competition / dense / ordinal（见 ranking.TIE_METHODS）
+            
+        Returns:
+            np.ndarray: 形状为 (角色数, 轮次数) 的整数名次矩阵
+        """
+        cache_key = f'{order_by}_ranks' if tie_method == 'competition' else f'{order_by}_{tie_method}_ranks'
+        if cache_key in view:
+            return view[cache_key]
+
+        order = self.get_round_orderings(view, order_by)
+        values = (view['cumulative'] if order_by == 'cumulative' else view['votes']).T
+        rank_dtype = np.int16 if len(self.characters) < np.iinfo(np.int16).max else np.int32
+        ranks = ranks_from_order(values, order, tie_method)
+
+        view[cache_key] = ranks.T.astype(rank_dtype)
+        return view[cache_key]
+
+    def get_round_stats(self, view: Dict[str, Any], percentiles=ROUND_STATS_PERCENTILES,
+                        top_k: int = ROUND_STATS_TOP_K) -> Dict[str, Dict[str, Any]]:
+        """
+        获取视图中每一轮的票数分布统计
+        
+        只统计当轮得票数大于 0 的角色，与图表的统计口径一致。
+        前 k 名占比按票数最高的 k 个角色计算（不足 k 个时为全部角色）。
+        只缓存默认参数的结果，其他百分位数 / k 的组合每次重新计算，避免任意参数把视图缓存撑大。
+        
+        Args:
+            view: get_vote_view 返回的视图
+            percentiles: 需要计算的百分位数
+            top_k: 前 k 名占比中的 k
+            
+        Returns:
+            dict: 轮次名称到统计结果的字典
+        """
+        percentiles = tuple(sorted(set(float(q) for q in percentiles)))
+        is_default = percentiles == tuple(float(q) for q in ROUND_STATS_PERCENTILES) and top_k == ROUND_STATS_TOP_K
+        if is_default and 'stats' in view:
+            return view['stats']
+
+        votes = view['votes']
+        valid = np.nan_to_num(votes, nan=0.0) > 0
+        valid_votes = np.where(valid, votes, np.nan)
+        voted_counts = valid.sum(axis=0)
+        totals = np.where(valid, votes, 0.0).sum(axis=0)
+
+        with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means = totals / voted_counts
+            medians = np.nanmedian(valid_votes, axis=0) if votes.size else np.full(votes.shape[1], np.nan)
+            percentile_values = (
+                np.nanpercentile(valid_votes, percentiles, axis=0)
+                if votes.size and percentiles else np.full((len(percentiles), votes.shape[1]), np.nan)
+            )
+
+            # 基尼系数：升序排列后 G = 2·Σ(i·x_i) / (n·Σx) - (n+1)/n，NaN 排在末尾不参与计算
+            ascending = np.sort(valid_votes, axis=0)
+            positions = np.arange(1, votes.shape[0] + 1)[:, None]
+            weighted = np.nansum(positions * ascending, axis=0)
+            gini = 2 * weighted / (voted_counts * totals) - (voted_counts + 1) / voted_counts
+
+            # 票数最高的 k 个角色的票数占比
+            descending = -np.sort(-np.nan_to_num(valid_votes, nan=-np.inf), axis=0)[:top_k]
+            in_top_k = np.isfinite(descending)
+            top_k_counts = in_top_k.sum(axis=0)
+            top_k_share = np.where(in_top_k, descending, 0.0).sum(axis=0) / totals * 100
+
+        def to_number(value):
+            return None if np.isnan(value) else round(float(value), 2)
+
+        stats = {}
+        for j, round_name in enumerate(view['vote_rounds']):
+            has_votes = voted_counts[j] > 0
+            stats[round_name] = {
+                'participating_count': view['participating_counts'][round_name],
+                'voted_count': int(voted_counts[j]),
+                'total': round(float(totals[j]), 2),
+                'mean': to_number(means[j]) if has_votes else None,
+                'median': to_number(medians[j]) if has_votes else None,
+                'percentiles': {
+                    f'p{q:g}': to_number(percentile_values[i, j]) if has_votes else None
+                    for i, q in enumerate(percentiles)
+                },
+                'gini': round(float(gini[j]), 4) if has_votes else None,
+                'top_k': top_k,
+                'top_k_count': int(top_k_counts[j]),
+                'top_k_share': to_number(top_k_share[j]) if has_votes else None
+            }
+
+        if is_default:
+            view['stats'] = stats
+        return stats
+
+    def get_rank_trajectories(self, view: Dict[str, Any], rows: np.ndarray, order_by: str = 'cumulative',
+                              tie_method: str = 'competition') -> List[Dict[str, Any]]:
+        """
+        获取指定角色的名次轨迹和名次变化
+        
+        名次变化为上一轮名次减本轮名次，正数表示上升；
+        第一轮或任一轮无名次时，名次变化为 None。
+        
+        Args:
+            view: get_vote_view 返回的视图
+            rows: 角色行号
+            order_by: 'cumulative' 按累计票数，'round' 按当轮票数
+            tie_method: 并列处理方式
+            
+        Returns:
+            list: [{'character', 'series', 'ranks', 'deltas'}, ...]
+        """
+        ranks = self.get_rank_matrix(view, order_by, tie_method)[rows].astype(np.int32)
+        deltas = np.zeros(ranks.shape, dtype=np.int32)
+        deltas[:, 1:] = ranks[:, :-1] - ranks[:, 1:]
+        missing_delta = np.ones(ranks.shape, dtype=bool)
+        missing_delta[:, 1:] = (ranks[:, :-1] == 0) | (ranks[:, 1:] == 0)
+
+        trajectories = []
+        for row, row_ranks, row_deltas, row_missing in zip(rows.tolist(), ranks.tolist(), deltas.tolist(), missing_delta.tolist()):
+            trajectories.append({
+                'character': self.characters[row],
+                'series': self.series[row],
+                'ranks': [position or None for position in row_ranks],
+                'deltas': [None if missing else delta for delta, missing in zip(row_deltas, row_missing)]
+            })
+        return trajectories
+
+    def _get_prefix_sums(self, exclude_ranking: bool = False) -> Dict[str, np.ndarray]:
+        """
+        获取全部轮次上的前缀和（带缓存）
+        
+        空值按 0 计入票数前缀和，同时单独记录有票轮次数的前缀和；
+        外卡赛轮次另外保留一份前缀和，排除外卡赛时从区间结果中减去。
+        各矩阵形状为 (角色数, 轮次数 + 1)，第 0 列为 0。
+        """
+        cache_key = ('_prefix_sums', bool(exclude_ranking))
+        if cache_key in self._view_cache:
+            return self._view_cache[cache_key]
+
+        votes = np.round(self._votes.astype(np.float64), 2)
+        if exclude_ranking:
+            votes[self._get_ranking_mask()] = np.nan
+        has_votes = ~np.isnan(votes)
+        filled = np.where(has_votes, votes, 0.0)
+        is_wildcard = np.array([round_name in (self.wildcard_rounds or []) for round_name in self.vote_columns])
+
+        def prefix(values, dtype):
+            result = np.zeros((values.shape[0], values.shape[1] + 1), dtype=dtype)
+            np.cumsum(values, axis=1, out=result[:, 1:])
+            return result
+
+        count_dtype = np.int16 if len(self.vote_columns) < np.iinfo(np.int16).max else np.int32
+        prefix_sums = {
+            'votes': prefix(filled, np.float64),
+            'counts': prefix(has_votes, count_dtype),
+            'wildcard_votes': prefix(filled * is_wildcard, np.float64),
+            'wildcard_counts': prefix(has_votes & is_wildcard, count_dtype)
+        }
+        self._view_cache[cache_key] = prefix_sums
+        return prefix_sums
+
+    def get_round_range(self, start_round: str, end_round: str, exclude_wildcard: bool = False,
+                        exclude_ranking: bool = False, tie_method: str = 'competition') -> Dict[str, Any]:
+        """
+        获取 [start_round, end_round] 区间内每个角色的得票合计、有票轮次数和名次
+        
+        基于前缀和计算，任意区间只需 O(角色数)。名次按区间合计降序、同票按角色名排序，
+        默认采用竞争排名（1224），区间内没有任何票数的角色名次为 0。
+        
+        Args:
+            start_round: 起始轮次（包含）
+            end_round: 结束轮次（包含）
+            exclude_wildcard: 是否排除外卡赛
+            exclude_ranking: 是否排除排位赛
+            tie_method: 并列处理方式
+            
+        Returns:
+            dict: {'rounds': 区间内计入的轮次, 'totals', 'counts', 'ranks': 按行排列的数组, 'order': 按名次排列的行号}
+            
+        Raises:
+            ValueError: 轮次不存在、起始轮次晚于结束轮次或不支持的并列处理方式
+        """
+        for round_name in (start_round, end_round):
+            if round_name not in self.vote_columns:
+                raise ValueError(f"轮次不存在: {round_name}")
+        start = self.vote_columns.index(start_round)
+        end = self.vote_columns.index(end_round) + 1
+        if start >= end:
+            raise ValueError(f"起始轮次 {start_round} 晚于结束轮次 {end_round}")
+
+        prefix_sums = self._get_prefix_sums(exclude_ranking)
+        totals = prefix_sums['votes'][:, end] - prefix_sums['votes'][:, start]
+        counts = prefix_sums['counts'][:, end] - prefix_sums['counts'][:, start]
+        rounds = self.vote_columns[start:end]
+        if exclude_wildcard:
+            totals = totals - (prefix_sums['wildcard_votes'][:, end] - prefix_sums['wildcard_votes'][:, start])
+            counts = counts - (prefix_sums['wildcard_counts'][:, end] - prefix_sums['wildcard_counts'][:, start])
+            rounds = [round_name for round_name in rounds if round_name not in (self.wildcard_rounds or [])]
+        # 前缀和相减会带来浮点误差，还原为两位小数
+        totals = np.round(totals, 2)
+
+        ranks, order = rank(np.where(counts > 0, totals, np.nan), tie_method, tie_breakers=(self._name_order,))
+
+        return {'rounds': rounds, 'totals': totals, 'counts': counts, 'ranks': ranks, 'order': order}
+
+    def get_elimination_rounds(self) -> np.ndarray:
+        """
+        根据赛季配置的淘汰名单获取每个角色被淘汰的轮次（带缓存）
+        
+        Returns:
+            np.ndarray: 按行排列的轮次下标（对应 vote_columns），仍未被淘汰的角色为轮次数
+        """
+        if '_elimination_rounds' in self._view_cache:
+            return self._view_cache['_elimination_rounds']
+
+        index = self.get_character_index()
+        eliminated_at = np.full(len(self.characters), len(self.vote_columns), dtype=np.int32)
+        for round_index, round_name in enumerate(self.vote_columns):
+            try:
+                eliminated = get_eliminated_characters(self.season, round_name)
+            except KeyError:
+                eliminated = []
+            for char in eliminated:
+                row = index.get(self.character_key(char['character'], char['series']))
+                if row is not None and eliminated_at[row] == len(self.vote_columns):
+                    eliminated_at[row] = round_index
+
+        self._view_cache['_elimination_rounds'] = eliminated_at
+        return eliminated_at
+
+    def get_final_ranks(self, tie_method: str = 'competition') -> np.ndarray:
+        """
+        根据赛季配置的淘汰名单计算最终名次（带缓存）
+        
+        依次按被淘汰的轮次（越晚越靠前）、排位票数、累计得票排名，都相同时按角色名排序。
+        同一轮被淘汰的角色之间按排位赛决定名次：排位票数取被淘汰那一轮及之后最后一个有票数的轮次
+        （淘汰赛中被淘汰的角色之后还会参加排位赛，没有排位赛时即为被淘汰那一轮的票数）。
+        仍未被淘汰的角色排在所有被淘汰的角色之前；多于 1 个时他们之间的名次尚未决出，名次为 0。
+        赛季有官方最终排名时应优先使用官方排名（见 main.get_official_rankings）。
+        
+        Args:
+            tie_method: 并列处理方式
+            
+        Returns:
+            np.ndarray: 按行排列的名次数组，0 表示名次未定
+        """
+        cache_key = ('_final_ranks', tie_method)
+        if cache_key in self._view_cache:
+            return self._view_cache[cache_key]
+
+        view = self.get_vote_view()
+        eliminated_at = self.get_elimination_rounds()
+        survivors = eliminated_at == len(self.vote_columns)
+        votes = view['votes']
+        after_elimination = np.arange(votes.shape[1])[None, :] >= eliminated_at[:, None]
+        has_votes = after_elimination & ~np.isnan(votes)
+        last_round = votes.shape[1] - 1 - np.argmax(has_votes[:, ::-1], axis=1)
+        placement_votes = np.full(len(self.characters), np.nan)
+        placed_rows = np.flatnonzero(has_votes.any(axis=1))
+        placement_votes[placed_rows] = votes[placed_rows, last_round[placed_rows]]
+
+        cumulative = view['cumulative'][:, -1] if self.vote_columns else np.zeros(len(self.characters))
+        ranks, _ = rank([eliminated_at.astype(np.float64), placement_votes, cumulative], tie_method,
+                        tie_breakers=(self._name_order,))
+        if survivors.sum() > 1:
+            ranks[survivors] = 0
+
+        self._view_cache[cache_key] = ranks
+        return ranks
+
+    def get_rollup_cube(self, exclude_wildcard: bool = False, exclude_ranking: bool = False) -> RollupCube:
+        """
+        获取 阶段 × 作品 × CV 的预聚合立方体（带缓存，每个过滤组合只构建一次）
+        
+        阶段由轮次名称得出（预选赛、第一/二/三阶段、淘汰赛），作品和 CV 取自 CSV。
+        
+        Args:
+            exclude_wildcard: 是否排除外卡赛
+            exclude_ranking: 是否排除排位赛
+        """
+        cache_key = ('_rollup_cube', bool(exclude_wildcard), bool(exclude_ranking))
+        if cache_key not in self._view_cache:
+            view = self.get_vote_view(exclude_wildcard=exclude_wildcard, exclude_ranking=exclude_ranking)
+            cvs = self.data['CV'].tolist() if 'CV' in self.data.columns else [None] * len(self.characters)
+            self._view_cache[cache_key] = RollupCube(
+                view['votes'], [get_round_stage(round_name) for round_name in view['vote_rounds']], self.series, cvs
+            )
+        return self._view_cache[cache_key]
+
+    def get_projection(self, as_of_round: Optional[str] = None, simulations: int = 10000, seed: int = 0,
+                       max_positions: int = 16) -> Dict[str, Any]:
+        """
+        蒙特卡洛模拟剩余轮次，估计最终名次分布
+        
+        只缓存默认参数（PROJECTION_DEFAULTS）的结果，每个数据集至多每轮一项；其他参数组合每次重新模拟，
+        避免任意种子把缓存撑大。
+        
+        Args:
+            as_of_round: 从该轮结束时开始模拟，默认为最后一个有票数的轮次
+            simulations: 模拟次数
+            seed: 随机数种子
+            max_positions: 返回前多少个名次的概率
+            
+        Returns:
+            dict: 见 simulation.project_finishing_positions
+        """
+        from .simulation import project_finishing_positions
+
+        workers = settings.SIMULATION_WORKERS or None
+        if (simulations, seed, max_positions) != PROJECTION_DEFAULTS:
+            return project_finishing_positions(self, as_of_round, simulations, seed, max_positions, workers)
+
+        cache_key = ('_projection', as_of_round)
+        if cache_key not in self._view_cache:
+            self._view_cache[cache_key] = project_finishing_positions(
+                self, as_of_round, simulations, seed, max_positions, workers
+            )
+        return self._view_cache[cache_key]
+
+    def find_character_rows(self, characters: Optional[List[str]] = None) -> np.ndarray:
+        """
+        按角色名查找行号，不指定时返回全部行
+        
+        :param characters: 角色名列表
+        :return: 行号数组（保持数据中的原始顺序）
+        """
+        if not characters:
+            return np.arange(len(self.characters), dtype=np.int32)
+        return np.flatnonzero(np.isin(np.array(self.characters, dtype=str), list(characters))).astype(np.int32)
+
+    @staticmethod
+    def character_key(character: str, series: str) -> str:
+        """角色的规范键：角色名@作品名（与 characters-data.json 的键相同），同名角色按作品区分"""
+        return f"{character}@{series}"
+
+    def get_character_index(self) -> Dict[str, int]:
+        """
+        角色规范键到行号的哈希索引（带缓存，每个数据集只构建一次）
+        
+        同一个键出现多次时取第一行。
+        """
+        if '_character_index' not in self._view_cache:
+            index = {}
+            for row, (character, series) in enumerate(zip(self.characters, self.series)):
+                index.setdefault(self.character_key(character, series), row)
+            self._view_cache['_character_index'] = index
+        return self._view_cache['_character_index']
+
+    def get_character_detail(self, row: int, view: Dict[str, Any], tie_method: str = 'competition') -> Dict[str, Any]:
+        """
+        获取单个角色在视图中的详细数据
+        
+        只读取该角色在缓存矩阵中的一行（名次矩阵、最终名次和淘汰轮次在首次使用时按数据集 / 视图计算并缓存），
+        耗时与角色总数无关。
+        
+        Args:
+            row: 角色行号（见 get_character_index）
+            view: get_vote_view 返回的视图
+            tie_method: 并列处理方式
+            
+        Returns:
+            dict: {
+                'character', 'series', 'metadata': CSV 中的角色信息列,
+                'votes' / 'cumulative': 每轮票数 / 累计票数（无票为 None）,
+                'round_ranks' / 'cumulative_ranks': 每轮按当轮 / 累计票数的名次（当轮无票为 None）,
+                'total': 累计票数, 'rank': 最后一轮的累计名次,
+                'percentile': 最后一轮累计票数不高于该角色的角色占比（%）,
+                'eliminated_round': 被淘汰的轮次（未被淘汰为 None）, 'final_rank': 最终名次（未定为 None）
+            }
+        """
+        metadata = {
+            column: (None if pd.isna(value) else value.item() if isinstance(value, np.generic) else value)
+            for column, value in self.data.iloc[row].items()
+        }
+        round_ranks = self.get_rank_matrix(view, 'round', tie_method)[row].tolist()
+        cumulative_ranks = self.get_rank_matrix(view, 'cumulative', tie_method)[row].tolist()
+        votes, cumulative = self.serialize_votes(np.stack([view['votes'][row], view['cumulative'][row]]))
+
+        percentile = None
+        if view['vote_rounds']:
+            # 竞争排名的名次 - 1 即累计票数高于该角色的人数
+            ahead = int(self.get_rank_matrix(view, 'cumulative')[row, -1]) - 1
+            percentile = round(100 * (len(self.characters) - ahead) / len(self.characters), 2)
+
+        eliminated_at = int(self.get_elimination_rounds()[row])
+        final_rank = int(self.get_final_ranks(tie_method)[row])
+        return {
+            'character': self.characters[row],
+            'series': self.series[row],
+            'metadata': metadata,
+            'votes': votes,
+            'cumulative': cumulative,
+            'round_ranks': [rank_value or None for rank_value in round_ranks],
+            'cumulative_ranks': cumulative_ranks,
+            'total': cumulative[-1] if cumulative else 0.0,
+            'rank': cumulative_ranks[-1] if cumulative_ranks else None,
+            'percentile': percentile,
+            'eliminated_round': self.vote_columns[eliminated_at] if eliminated_at < len(self.vote_columns) else None,
+            'final_rank': final_rank or None
+        }
+
+    def select_characters(self, view: Dict[str, Any], order_by: Optional[str] = None, as_of_round: Optional[str] = None,
+                          characters: Optional[List[str]] = None, top_k: Optional[int] = None,
+                          offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        从视图中选取角色行号
+        
+        Args:
+            view: get_vote_view 返回的视图
+            order_by: 排序方式，为 None 时保持原始顺序
+            as_of_round: 排序依据的轮次，默认为最后一轮
+            characters: 只保留这些角色
+            top_k: 只保留前 k 名
+            offset: 分页起始位置
+            limit: 每页数量
+            
+        Returns:
+            dict: {'rows': 行号数组, 'total': 分页前的总数}
+        """
+        vote_rounds = view['vote_rounds']
+        if order_by and vote_rounds:
+            if as_of_round is None:
+                round_index = len(vote_rounds) - 1
+            elif as_of_round in vote_rounds:
+                round_index = vote_rounds.index(as_of_round)
+            else:
+                raise ValueError(f"轮次不存在或已被排除: {as_of_round}")
+            rows = self.get_round_orderings(view, order_by)[round_index]
+        else:
+            rows = np.arange(len(self.characters), dtype=np.int32)
+
+        if characters:
+            wanted = set(characters)
+            rows = rows[np.fromiter((self.characters[row] in wanted for row in rows), dtype=bool, count=len(rows))]
+
+        if top_k is not None:
+            rows = rows[:max(top_k, 0)]
+
+        total = len(rows)
+        end = None if limit is None else offset + max(limit, 0)
+        return {'rows': rows[offset:end], 'total': total}
+
+    @staticmethod
+    def serialize_votes(votes: np.ndarray) -> List[List[Optional[float]]]:
+        """将票数矩阵转换为 JSON 可序列化的列表，NaN 转为 None"""
+        result = np.round(votes, 2).astype(object)
+        result[np.isnan(votes)] = None
+        return result.tolist()
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """
+        估算该数据集占用的内存
+        
+        :return: {
+            'data_bytes': 角色信息 DataFrame,
+            'votes_bytes': 票数矩阵,
+            'index_bytes': 角色名 / 作品名列表和排序键,
+            'views': [{'key': 缓存键, 'bytes': 字节数}, ...]（按占用从大到小）,
+            'view_cache_bytes': 视图缓存合计,
+            'total_bytes': 合计
+        }
+        """
+        from .memory_usage import estimate_size
+
+        # 共享 seen 集合，视图中引用的同一个数组只计算一次
+        seen = set()
+        usage = {
+            'data_bytes': estimate_size(self.data, seen),
+            'votes_bytes': estimate_size(self._votes, seen),
+            # 角色名 / 作品名字符串与 DataFrame 的分类值共享，只计算列表本身
+            'index_bytes': sys.getsizeof(self.characters) + sys.getsizeof(self.series) + estimate_size(self._name_order, seen)
+        }
+        # 视图中引用的角色名也是同一批字符串，已计入 DataFrame
+        seen.update(map(id, self.characters))
+        seen.update(map(id, self.series))
+        views = [
+            {'key': str(key), 'bytes': estimate_size(view, seen)}
+            for key, view in list(self._views.items()) + list(self._view_cache.items())
+        ]
+        usage['views'] = sorted(views, key=lambda item: item['bytes'], reverse=True)
+        usage['view_cache_bytes'] = sum(item['bytes'] for item in views)
+        usage['total_bytes'] = usage['data_bytes'] + usage['votes_bytes'] + usage['index_bytes'] + usage['view_cache_bytes']
+        return usage
+
     def get_votes_by_rounds(self, excluded_columns=None, exclude_wildcard=False, exclude_ranking=False):
         """
         获取每个轮次的投票数据。
@@ -324,29 +957,12 @@ class VoteTracker:
                     'participating_counts': {}
                 }
             
-            # 获取所有轮次（包括被排除的轮次）
-            all_vote_rounds = self.get_vote_rounds()
-            all_votes_data = self.get_vote_data(all_vote_rounds, exclude_ranking)
-            
-            # 使用所有轮次来计算参与人数
-            all_participating_counts = self.get_participating_counts(all_vote_rounds, all_votes_data)
-            
-            # 只返回过滤后的轮次的数据
-            filtered_votes_data = []
-            for vote_data in all_votes_data:
-                filtered_votes = []
-                for round_name in vote_rounds:
-                    round_index = all_vote_rounds.index(round_name)
-                    filtered_votes.append(vote_data['votes'][round_index])
-                filtered_votes_data.append({
-                    'character': vote_data['character'],
-                    'series': vote_data['series'],
-                    'votes': filtered_votes
-                })
-            
-            # 只返回过滤后的轮次的参与人数
-            participating_counts = {round_name: all_participating_counts[round_name] 
-                                 for round_name in vote_rounds}
+            view = self.get_vote_view(excluded_columns, exclude_wildcard, exclude_ranking)
+            filtered_votes_data = [
+                {'character': character, 'series': series, 'votes': votes}
+                for character, series, votes in zip(self.characters, self.series, self.serialize_votes(view['votes']))
+            ]
+            participating_counts = view['participating_counts']
             
             return {
                 'votes_data': filtered_votes_data,
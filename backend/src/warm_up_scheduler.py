@@ -0,0 +1,140 @@
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Tuple, Dict, Any
+from .logger import logger
+
+# 预热任务列表：[(任务名, 无参函数), ...]
+WarmUpTasks = List[Tuple[str, Callable[[], Any]]]
+
+
+class WarmUpScheduler:
+    """
+    低优先级的后台预热
+
+    预热任务在单独的后台线程中逐个执行，每个任务开始前等待没有进行中的请求，
+    且距离最后一个请求结束至少 idle_seconds，正在处理的请求不会与预热争抢 CPU。
+    请求通过 live_request() 登记（由中间件统一处理）。
+
+    新的预热（如上传了新的数据集）会取代尚未完成的预热，旧的任务在下一个任务开始前放弃。
+    """
+
+    def __init__(self, idle_seconds: float = 0.05):
+        self.idle_seconds = idle_seconds
+        self._condition = threading.Condition()
+        self._live_requests = 0
+        self._last_request_end = 0.0
+        self._generation = 0
+        self._pending = None  # (代数, 名称, 生成任务列表的函数)
+        self._worker = None
+        self._progress = {'status': 'idle'}
+
+    @contextmanager
+    def live_request(self):
+        """在处理请求期间暂停预热"""
+        with self._condition:
+            self._live_requests += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._live_requests -= 1
+                self._last_request_end = time.monotonic()
+                self._condition.notify_all()
+
+    def schedule(self, name: str, build_tasks: Callable[[], WarmUpTasks]):
+        """
+        安排一次预热，取代尚未完成的预热
+
+        :param name: 预热名称（用于进度和日志）
+        :param build_tasks: 在后台线程中调用，返回要执行的任务列表
+        """
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, name, build_tasks)
+            self._progress = {'status': 'pending', 'name': name}
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="warm-up-scheduler", daemon=True)
+                self._worker.start()
+            self._condition.notify_all()
+
+    def _wait_until_idle(self, generation: int, progress: Dict[str, Any]) -> bool:
+        """等待没有进行中的请求；预热被取代时返回 False"""
+        waited = False
+        with self._condition:
+            while True:
+                if generation != self._generation:
+                    return False
+                idle_for = time.monotonic() - self._last_request_end
+                if self._live_requests == 0 and idle_for >= self.idle_seconds:
+                    break
+                if not waited:
+                    progress['yielded'] += 1
+                    waited = True
+                self._condition.wait(self.idle_seconds if self._live_requests == 0 else None)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._pending is None:
+                    self._worker = None
+                    return
+                generation, name, build_tasks = self._pending
+                self._pending = None
+                self._progress = {
+                    'status': 'running', 'name': name, 'current': None, 'completed': 0, 'total': None,
+                    'yielded': 0, 'errors': [], 'started_at': datetime.now().isoformat(), 'finished_at': None
+                }
+            progress = self._progress
+            start = time.perf_counter()
+
+            try:
+                if not self._wait_until_idle(generation, progress):
+                    continue
+                tasks = build_tasks()
+            except Exception as e:
+                logger.error(f"预热 {name} 失败: {str(e)}")
+                progress.update(status='failed', errors=[str(e)], finished_at=datetime.now().isoformat())
+                continue
+            progress['total'] = len(tasks)
+
+            for task_name, task in tasks:
+                if not self._wait_until_idle(generation, progress):
+                    break
+                progress['current'] = task_name
+                try:
+                    task()
+                except Exception as e:
+                    logger.error(f"预热任务 {task_name} 失败: {str(e)}")
+                    progress['errors'].append(f"{task_name}: {str(e)}")
+                progress['completed'] += 1
+            else:
+                progress.update(status='done', current=None, finished_at=datetime.now().isoformat())
+                logger.info(f"预热 {name} 完成：{len(tasks)} 个任务，耗时 {time.perf_counter() - start:.2f}s，"
+                            f"让出 {progress['yielded']} 次")
+
+    def get_progress(self) -> Dict[str, Any]:
+        with self._condition:
+            return {**self._progress, 'live_requests': self._live_requests}
+
+
+class PauseWarmUpMiddleware:
+    """
+    ASGI 中间件：处理 HTTP 请求期间暂停预热
+
+    excluded_paths 开头的路径（如 SSE 长连接、就绪检查轮询）不登记，避免预热一直被挂起。
+    """
+
+    def __init__(self, app, scheduler: WarmUpScheduler, excluded_paths: Tuple[str, ...] = ()):
+        self.app = app
+        self.scheduler = scheduler
+        self.excluded_paths = tuple(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+        with self.scheduler.live_request():
+            await self.app(scope, receive, send)
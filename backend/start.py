@@ -1,9 +1,16 @@
+import argparse
 import uvicorn
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="启动后端服务")
+    parser.add_argument("--prod", action="store_true", help="生产模式：关闭自动重载，数据在后台预热")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
     uvicorn.run(
         "src.main:app", 
-        host="0.0.0.0", 
-        port=8000, 
-        reload=True
+        host=args.host, 
+        port=args.port, 
+        reload=not args.prod
     )
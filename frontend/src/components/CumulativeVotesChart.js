@@ -7,6 +7,15 @@ import globalChartConfig from '../config/globalChartConfig.json';
 import seasonsConfig from '../config/seasonsConfig.json';
 import { chartAnimation, milestoneAnimation } from '../config/animationConfig';
 import MilestonesOverlay from './MilestonesOverlay';
+import { getMilestones } from '../services/api';
+
+// 后端 milestone_detector 能检测的记录类别（与其生成的 character 字段对应）
+const DETECTED_RECORD_CATEGORIES = [
+  /^赛季记录-本赛季单轮.+高得票$/,
+  /^赛季记录-本赛季首位累计得票突破.+票$/,
+  /^赛季记录-本赛季单场.+小票差$/,
+  /^赛季记录-本赛季单场.+大倍杀$/
+];
 
 const CumulativeVotesChart = ({
   data, 
@@ -26,11 +35,40 @@ const CumulativeVotesChart = ({
   const [currentMilestone, setCurrentMilestone] = useState(null);
   const [isChartDrawn, setIsChartDrawn] = useState(false);
 
-  // 获取当前赛季的里程碑数据
-  const seasonMilestones = useMemo(() => {
-    return seasonsConfig.seasons[currentSeason]?.milestones || {};
+  const [detectedMilestones, setDetectedMilestones] = useState(null);
+
+  // 获取后端自动检测的赛季记录
+  useEffect(() => {
+    getMilestones()
+      .then(setDetectedMilestones)
+      .catch(() => setDetectedMilestones(null));
   }, [currentSeason]);
 
+  // 获取当前赛季的里程碑数据：自动检测结果中出现的记录类别以检测结果为准，
+  // 配置中只去掉这些类别的手写记录，检测不到的类别（如没有对阵数据时的票差、倍杀）仍使用配置
+  const seasonMilestones = useMemo(() => {
+    const configuredMilestones = seasonsConfig.seasons[currentSeason]?.milestones || {};
+    if (!detectedMilestones) {
+      return configuredMilestones;
+    }
+
+    const detectedCategories = DETECTED_RECORD_CATEGORIES.filter(pattern =>
+      Object.values(detectedMilestones).some(milestones =>
+        milestones.some(milestone => pattern.test(milestone.character))
+      )
+    );
+    const isDetected = (milestone) => detectedCategories.some(pattern => pattern.test(milestone.character));
+
+    const rounds = new Set([...Object.keys(detectedMilestones), ...Object.keys(configuredMilestones)]);
+    return Object.fromEntries([...rounds].map(round => [
+      round,
+      [
+        ...(detectedMilestones[round] || []),
+        ...(configuredMilestones[round] || []).filter(milestone => !isDetected(milestone))
+      ]
+    ]));
+  }, [currentSeason, detectedMilestones]);
+
   // 处理图表数据并计算累积票数
   const processChartData = (data, voteRounds) => {
     // 如果数据或轮次为空，返回空数组
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef, useCallback, useMemo } from 'react';
 import { useLocation } from 'react-router-dom';
 import { createPortal } from 'react-dom';
-import { getCharactersInfo, getCurrentSeason, getVotesByRounds } from '../services/api';
+import { getBootstrap, getVotesByRounds, subscribeDatasetUpdates, applyDatasetDelta } from '../services/api';
 import CumulativeVotesChart from '../components/CumulativeVotesChart';
 import '../styles/cumulative-votes-chart.css';
 import { chartAnimation, countdownAnimation } from '../config/animationConfig';
@@ -15,6 +15,7 @@ const CumulativeVotesPage = () => {
   const [votesData, setVotesData] = useState(state.votesData);
   const [voteRounds, setVoteRounds] = useState(state.voteRounds);
   const [participatingCounts, setParticipatingCounts] = useState(state.participatingCounts);
+  const [dataVersion, setDataVersion] = useState(state.version);
   
   // 过滤选项
   const filterOptions = useMemo(() => ({
@@ -102,25 +103,25 @@ const CumulativeVotesPage = () => {
         setLoading(true);
         setError(null);
         
-        // 如果路由状态中没有数据，就重新获取
+        // 首页已经通过 /bootstrap 获取了全部数据；直接打开页面时用一次请求重新获取
         let currentVotesData = location.state?.votesData;
         let currentVoteRounds = location.state?.voteRounds;
         let currentParticipatingCounts = location.state?.participatingCounts;
+        let season = location.state?.season;
+        let charactersResponse = location.state?.charactersInfo;
+        let version = location.state?.version;
 
-        if (!currentVotesData || !currentVoteRounds) {
-          const votesResponse = await getVotesByRounds(filterOptions);
-          console.log('【fetchAllData】后端返回的数据:', votesResponse);
-          currentVotesData = votesResponse.votes_data;
-          currentVoteRounds = votesResponse.vote_rounds;
-          currentParticipatingCounts = votesResponse.participating_counts;
+        if (!currentVotesData || !currentVoteRounds || !season || !charactersResponse) {
+          const bootstrap = await getBootstrap(filterOptions);
+          console.log('【fetchAllData】后端返回的数据:', bootstrap);
+          currentVotesData = bootstrap.votes_data;
+          currentVoteRounds = bootstrap.vote_rounds;
+          currentParticipatingCounts = bootstrap.participating_counts;
+          season = bootstrap.season;
+          charactersResponse = bootstrap.characters_info;
+          version = bootstrap.version;
         }
 
-        // 获取其他必要数据
-        const [season, charactersResponse] = await Promise.all([
-          getCurrentSeason(),
-          getCharactersInfo()
-        ]);
-
         // 从角色信息中提取排名
         const finalRanks = {};
         charactersResponse.forEach(({ character, rank }) => {
@@ -136,6 +137,7 @@ const CumulativeVotesPage = () => {
         setVotesData(currentVotesData);
         setVoteRounds(currentVoteRounds);
         setParticipatingCounts(currentParticipatingCounts || {});
+        setDataVersion(version);
         
         // 重置动画状态
         setNextRoundProgress(100);
@@ -151,6 +153,55 @@ const CumulativeVotesPage = () => {
     fetchAllData();
   }, []); // 移除所有依赖，只在组件首次挂载时执行
 
+  // 接收数据集更新推送：能直接应用增量时只更新变化的票数，否则重新获取完整数据
+  const latestDataRef = useRef(null);
+  latestDataRef.current = {
+    votes_data: votesData,
+    vote_rounds: voteRounds,
+    participating_counts: participatingCounts,
+    version: dataVersion
+  };
+
+  useEffect(() => {
+    // 带上已有数据的版本，服务端仍保留该版本时只返回增量
+    const refetch = async () => {
+      const current = latestDataRef.current;
+      const votesResponse = await getVotesByRounds({
+        ...filterOptions,
+        base: current.votes_data && current.vote_rounds ? current : null
+      });
+      setVotesData(votesResponse.votes_data);
+      setVoteRounds(votesResponse.vote_rounds);
+      setParticipatingCounts(votesResponse.participating_counts || {});
+      setDataVersion(votesResponse.version);
+    };
+
+    return subscribeDatasetUpdates({
+      onDataset: (delta) => {
+        const current = latestDataRef.current;
+        // 排除排位赛时被淘汰角色的部分票数会被置空，增量无法直接套用
+        const updated = current.votes_data && current.vote_rounds && !filterOptions.excludeRanking
+          ? applyDatasetDelta(current, delta)
+          : null;
+        if (!updated) {
+          refetch();
+          return;
+        }
+        setVotesData(updated.votes_data);
+        setParticipatingCounts(updated.participating_counts);
+        setDataVersion(updated.version);
+      },
+      onResync: refetch,
+      // 重连后服务端的版本与已有数据不同：断线期间错过了推送
+      onHello: ({ version }) => {
+        const current = latestDataRef.current;
+        if (current.version && version !== current.version) {
+          refetch();
+        }
+      }
+    });
+  }, [filterOptions]);
+
   useEffect(() => {
     const container = document.createElement('div');
     container.className = 'cumulative-votes-chart-container';
@@ -7,7 +7,7 @@ import ConfirmationModal from '../components/ConfirmationModal';
 import ExcludeSpecialRoundsModal from '../components/ExcludeSpecialRoundsModal';
 import CumulativeVotesChart from '../components/CumulativeVotesChart';
 import RecordVideoModal from '../components/RecordVideoModal';
-import { getVotesByRounds } from '../services/api';
+import { getBootstrap } from '../services/api';
 import '../styles/global.css';
 
 const HomePage = () => {
@@ -44,7 +44,7 @@ const HomePage = () => {
       setShowColumnExclusionModal(true);
     } else {
       try {
-        const data = await getVotesByRounds({});
+        const data = await getBootstrap({});
         
         if (!data.votes_data || !data.vote_rounds) {
           throw new Error('获取的数据不完整');
@@ -53,6 +53,9 @@ const HomePage = () => {
           votesData: data.votes_data,
           voteRounds: data.vote_rounds,
           participatingCounts: data.participating_counts || {}, 
+          season: data.season,
+          charactersInfo: data.characters_info,
+          version: data.version
         };
         navigateToChart(navigationState);
       } catch (error) {
@@ -97,8 +100,8 @@ const HomePage = () => {
         excludeRanking
       };
       
-      // 获取投票数据
-      const data = await getVotesByRounds(filterOptions);
+      // 获取投票数据、赛季和角色信息
+      const data = await getBootstrap(filterOptions);
       
       if (!data.votes_data || !data.vote_rounds) {
         throw new Error('获取的数据不完整');
@@ -109,6 +112,9 @@ const HomePage = () => {
         votesData: data.votes_data,
         voteRounds: data.vote_rounds,
         participatingCounts: data.participating_counts || {},
+        season: data.season,
+        charactersInfo: data.characters_info,
+        version: data.version,
         filterOptions
       };
       
@@ -128,8 +134,8 @@ const HomePage = () => {
         excludeRanking
       };
       
-      // 获取投票数据
-      const data = await getVotesByRounds(filterOptions);
+      // 获取投票数据、赛季和角色信息
+      const data = await getBootstrap(filterOptions);
       
       if (!data.votes_data || !data.vote_rounds) {
         throw new Error('获取的数据不完整');
@@ -140,6 +146,9 @@ const HomePage = () => {
         votesData: data.votes_data,
         voteRounds: data.vote_rounds,
         participatingCounts: data.participating_counts || {},
+        season: data.season,
+        charactersInfo: data.characters_info,
+        version: data.version,
         filterOptions
       };
       
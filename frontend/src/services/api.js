@@ -10,12 +10,181 @@ const api = axios.create({
   }
 });
 
+// 超过该大小的文件使用分块上传
+const RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024;
+const UPLOAD_CHUNK_SIZE = 1024 * 1024;
+const UPLOAD_CHUNK_RETRIES = 3;
+
+// 静态数据包地址（backend/scripts/export_static.py 的输出目录）
+// 设置后只读接口从数据包读取，不需要运行后端；赛季由页面地址的 ?season= 参数指定
+const STATIC_BUNDLE_URL = process.env.REACT_APP_STATIC_BUNDLE_URL?.replace(/\/+$/, '');
+let staticManifestPromise = null;
+
+/**
+ * 生成数据包清单中的路由键，规则与 static_export.route_key 相同
+ * 值为 null / false / 空字符串 / 空数组的参数省略，其余按参数名排序，数组展开为多个同名参数
+ * @param {string} path - 接口路径，如 '/votes-by-rounds'
+ * @param {Object} params - 查询参数
+ * @returns {string} 路由键
+ */
+function staticRouteKey(path, params) {
+  const parts = [];
+  Object.keys(params).sort().forEach(name => {
+    const value = params[name];
+    if (value === null || value === undefined || value === false || value === '' ||
+        (Array.isArray(value) && value.length === 0)) {
+      return;
+    }
+    (Array.isArray(value) ? value : [value]).forEach(item => parts.push(`${name}=${item}`));
+  });
+  const key = path.replace(/^\//, '');
+  return parts.length > 0 ? `${key}?${parts.join('&')}` : key;
+}
+
+/**
+ * 从静态数据包读取接口响应
+ * @param {string} path - 接口路径
+ * @param {Object} params - 查询参数
+ * @returns {Promise<any>} 响应内容
+ */
+async function staticGet(path, params = {}) {
+  if (!staticManifestPromise) {
+    staticManifestPromise = fetch(`${STATIC_BUNDLE_URL}/manifest.json`).then(response => {
+      if (!response.ok) {
+        throw new Error(`读取静态数据包清单失败: ${response.status}`);
+      }
+      return response.json();
+    });
+    staticManifestPromise.catch(() => { staticManifestPromise = null; });
+  }
+  const manifest = await staticManifestPromise;
+
+  const season = new URLSearchParams(window.location.search).get('season') || manifest.default_season;
+  const routes = manifest.seasons[season]?.routes;
+  if (!routes) {
+    throw new Error(`静态数据包中没有 ${season} 赛季`);
+  }
+  const file = routes[staticRouteKey(path, params)];
+  if (!file) {
+    throw new Error(`静态数据包中没有该数据: ${staticRouteKey(path, params)}`);
+  }
+
+  const response = await fetch(`${STATIC_BUNDLE_URL}/${file}`);
+  if (!response.ok) {
+    throw new Error(`读取静态数据失败: ${response.status}`);
+  }
+  // 服务器以 Content-Encoding: gzip 提供文件时浏览器已经解压
+  if (manifest.encoding === 'gzip' && response.headers.get('Content-Encoding') !== 'gzip') {
+    return new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json();
+  }
+  return response.json();
+}
+
+/**
+ * 读取只读接口：配置了静态数据包时从数据包读取，否则请求后端
+ * @param {string} path - 接口路径
+ * @param {Object} params - 查询参数
+ * @returns {Promise<any>} 响应内容
+ */
+async function readApi(path, params = {}) {
+  if (STATIC_BUNDLE_URL) {
+    return staticGet(path, params);
+  }
+  const response = await api.get(path, { params });
+  return response.data;
+}
+
+/**
+ * 静态数据包模式下不能修改数据
+ */
+function assertWritable() {
+  if (STATIC_BUNDLE_URL) {
+    throw new Error('静态数据包模式下不能上传数据');
+  }
+}
+
+/**
+ * 计算数据的 SHA-256 十六进制字符串
+ * @param {ArrayBuffer} buffer - 数据
+ * @returns {Promise<string>} 哈希值
+ */
+async function sha256Hex(buffer) {
+  const digest = await crypto.subtle.digest('SHA-256', buffer);
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+/**
+ * 可续传的分块上传
+ * 传入之前的 uploadId 时只上传服务端缺失的分块，单个分块失败只重试该分块
+ * @param {File} file - 要上传的文件
+ * @param {Object} options - 选项对象
+ * @param {string} options.uploadId - 要续传的会话 ID
+ * @param {Function} options.onProgress - 进度回调，参数为 0-1 之间的比例
+ * @returns {Promise} 上传结果
+ */
+export async function uploadFileResumable(file, { uploadId = null, onProgress = null } = {}) {
+  assertWritable();
+  try {
+    let status;
+    if (uploadId) {
+      status = (await api.get(`/uploads/${uploadId}`)).data;
+    } else {
+      status = (await api.post('/uploads', {
+        filename: file.name,
+        total_size: file.size,
+        chunk_size: UPLOAD_CHUNK_SIZE
+      })).data;
+    }
+
+    // PUT 只返回进度计数，分块列表和分块大小取自会话状态
+    for (const index of status.missing_chunks) {
+      const start = index * status.chunk_size;
+      const chunk = await file.slice(start, start + status.chunk_size).arrayBuffer();
+      const chunkHash = await sha256Hex(chunk);
+
+      let progress;
+      for (let attempt = 1; ; attempt++) {
+        try {
+          progress = (await api.put(`/uploads/${status.upload_id}/chunks/${index}`, chunk, {
+            headers: {
+              'Content-Type': 'application/octet-stream',
+              'X-Chunk-SHA256': chunkHash
+            }
+          })).data;
+          break;
+        } catch (error) {
+          if (attempt >= UPLOAD_CHUNK_RETRIES) {
+            error.uploadId = status.upload_id;
+            throw error;
+          }
+        }
+      }
+
+      if (onProgress) {
+        onProgress(progress.received_bytes / progress.total_size);
+      }
+    }
+
+    const response = await api.post(`/uploads/${status.upload_id}/complete`);
+    return response.data;
+  } catch (error) {
+    console.error('分块上传文件失败:', error);
+    throw error;
+  }
+}
+
 /**
  * 上传文件
  * @param {File} file - 要上传的文件
  * @returns {Promise} 上传结果
  */
 export async function uploadFile(file) {
+  assertWritable();
+  // 大文件使用可续传的分块上传
+  if (file.size > RESUMABLE_UPLOAD_THRESHOLD) {
+    return uploadFileResumable(file);
+  }
+
   try {
     const formData = new FormData();
     formData.append('file', file);
@@ -40,8 +209,7 @@ export async function uploadFile(file) {
  */
 export async function getCharactersInfo() {
   try {
-    const response = await api.get('/characters-info');
-    return response.data;
+    return await readApi('/characters-info');
   } catch (error) {
     console.error('获取角色信息失败:', error);
     throw error;
@@ -54,8 +222,7 @@ export async function getCharactersInfo() {
  */
 export async function getCurrentSeason() {
   try {
-    const response = await api.get('/current-season');
-    return response.data;
+    return await readApi('/current-season');
   } catch (error) {
     console.error('获取当前赛季失败:', error);
     throw error;
@@ -68,8 +235,7 @@ export async function getCurrentSeason() {
  */
 export async function getVoteRounds() {
   try {
-    const response = await api.get('/vote-rounds');
-    return response.data;
+    return await readApi('/vote-rounds');
   } catch (error) {
     console.error('获取投票轮次失败:', error);
     throw error;
@@ -82,16 +248,32 @@ export async function getVoteRounds() {
  * @param {string[]} options.excludedColumns - 要排除的列
  * @param {boolean} options.excludeWildcard - 是否排除外卡赛
  * @param {boolean} options.excludeRanking - 是否排除排位赛
- * @returns {Promise<Object>} 包含投票数据的对象
+ * @param {Object} options.base - 已有的投票数据（之前的返回值）；服务端仍保留该版本时只传输增量
+ * @returns {Promise<Object>} 包含投票数据和数据集版本（version）的对象
  */
-export async function getVotesByRounds({ excludedColumns = [], excludeWildcard = false, excludeRanking = false } = {}) {
+export async function getVotesByRounds({ excludedColumns = [], excludeWildcard = false, excludeRanking = false, base = null } = {}) {
   try {
+    // 静态数据包的内容不会变化，没有增量
+    if (STATIC_BUNDLE_URL) {
+      return await staticGet('/votes-by-rounds', {
+        excluded_columns: excludedColumns,
+        exclude_wildcard: excludeWildcard,
+        exclude_ranking: excludeRanking
+      });
+    }
+
     const response = await api.post('/votes-by-rounds', {
       excluded_columns: excludedColumns,
       exclude_wildcard: excludeWildcard,
-      exclude_ranking: excludeRanking
+      exclude_ranking: excludeRanking,
+      ...(base?.version ? { base_version: base.version } : {})
     });
 
+    // 服务端返回增量时应用到已有数据上；无法直接应用时重新获取完整数据
+    if (response.data?.delta) {
+      const updated = applyDatasetDelta(base, response.data);
+      return updated || getVotesByRounds({ excludedColumns, excludeWildcard, excludeRanking });
+    }
 
     // 如果没有数据，返回默认结构
     if (!response.data || !response.data.votes_data || response.data.votes_data.length === 0) {
@@ -109,3 +291,149 @@ export async function getVotesByRounds({ excludedColumns = [], excludeWildcard =
     throw error;
   }
 }
+
+/**
+ * 一次性获取页面首次渲染需要的数据（赛季、轮次、角色信息和投票数据）
+ * @param {Object} options - 选项对象
+ * @param {string[]} options.excludedColumns - 要排除的列
+ * @param {boolean} options.excludeWildcard - 是否排除外卡赛
+ * @param {boolean} options.excludeRanking - 是否排除排位赛
+ * @returns {Promise<Object>} 包含 season、all_vote_rounds、characters_info、votes_data、vote_rounds、participating_counts 的对象
+ */
+export async function getBootstrap({ excludedColumns = [], excludeWildcard = false, excludeRanking = false } = {}) {
+  try {
+    return await readApi('/bootstrap', {
+      excluded_columns: excludedColumns,
+      exclude_wildcard: excludeWildcard,
+      exclude_ranking: excludeRanking
+    });
+  } catch (error) {
+    console.error('获取初始化数据失败:', error);
+    throw error;
+  }
+}
+
+/**
+ * 获取自动检测的赛季记录和里程碑
+ * @returns {Promise<Object>} 轮次名称到里程碑列表的映射，格式与 seasonsConfig.json 中的 milestones 相同
+ */
+export async function getMilestones() {
+  try {
+    return await readApi('/milestones');
+  } catch (error) {
+    console.error('获取里程碑失败:', error);
+    throw error;
+  }
+}
+
+/**
+ * 获取两个轮次之间（包含两端）每个角色的得票合计和名次
+ * @param {Object} options - 选项对象
+ * @param {string} options.startRound - 起始轮次
+ * @param {string} options.endRound - 结束轮次
+ * @param {boolean} options.excludeWildcard - 是否排除外卡赛
+ * @param {boolean} options.excludeRanking - 是否排除排位赛
+ * @param {number} options.topK - 只返回前 k 名
+ * @returns {Promise<Object>} 包含 rounds 和按名次排序的 characters 的对象
+ */
+export async function getRoundRange({ startRound, endRound, excludeWildcard = false, excludeRanking = false, topK = null }) {
+  try {
+    return await readApi('/round-range', {
+      start_round: startRound,
+      end_round: endRound,
+      exclude_wildcard: excludeWildcard,
+      exclude_ranking: excludeRanking,
+      ...(topK ? { top_k: topK } : {})
+    });
+  } catch (error) {
+    console.error('获取区间票数失败:', error);
+    throw error;
+  }
+}
+
+/**
+ * 订阅数据集更新推送（Server-Sent Events）
+ * @param {Object} handlers - 事件回调
+ * @param {Function} handlers.onDataset - 发布新版本时调用，参数为增量（见 applyDatasetDelta）
+ * @param {Function} handlers.onResync - 推送积压被丢弃时调用，此时应重新获取完整数据
+ * @param {Function} handlers.onHello - 每次连接（包括自动重连）时调用，参数为 { version: 服务端当前的数据集版本 }；
+ *   与已有数据的版本不同说明断线期间错过了推送，应重新获取
+ * @returns {Function} 取消订阅的函数
+ */
+export function subscribeDatasetUpdates({ onDataset, onResync, onHello } = {}) {
+  // 静态数据包不会更新
+  if (STATIC_BUNDLE_URL) {
+    return () => {};
+  }
+
+  const source = new EventSource(`${BASE_URL}/events`);
+
+  source.addEventListener('hello', (event) => {
+    if (onHello) {
+      onHello(JSON.parse(event.data));
+    }
+  });
+  source.addEventListener('dataset', (event) => {
+    if (onDataset) {
+      onDataset(JSON.parse(event.data));
+    }
+  });
+  source.addEventListener('resync', (event) => {
+    if (onResync) {
+      onResync(JSON.parse(event.data));
+    }
+  });
+  source.onerror = () => {
+    // EventSource 会自动重连，这里只记录
+    console.warn('数据集更新推送连接中断，正在重连');
+  };
+
+  return () => source.close();
+}
+
+/**
+ * 将增量（推送的 dataset 事件或 /votes-by-rounds 的增量响应）应用到 getVotesByRounds 返回的数据上
+ * @param {Object} data - 包含 votes_data、vote_rounds、participating_counts 和 version 的对象
+ * @param {Object} delta - dataset 事件的内容
+ * @returns {Object|null} 更新后的新对象；增量无法直接应用时返回 null，此时应重新获取完整数据
+ */
+export function applyDatasetDelta(data, delta) {
+  // 增量只能应用在它的基准版本上：错过了中间的推送（断线重连、连续上传）时已有数据不是基准版本
+  if (!data?.version || delta.base_version !== data.version) {
+    return null;
+  }
+  if (delta.full_refresh || delta.added_characters.length > 0 || delta.removed_characters.length > 0) {
+    return null;
+  }
+
+  // 与后端一样按 (角色, 作品) 匹配：不同作品可能有同名角色，votes_data 中的角色名还去掉了 " (...)" 后缀
+  // 旧版本服务端返回的数据没有作品名，无法可靠匹配，重新获取
+  if (data.votes_data.some(item => item.series === undefined)) {
+    return null;
+  }
+  const characterKey = (character, series) => `${character.split(' (')[0]}\u0000${series}`;
+  const changes = new Map(delta.changes.map(change => [characterKey(change.character, change.series), change.votes]));
+
+  const votesData = data.votes_data.map(item => {
+    const changedVotes = changes.get(characterKey(item.character, item.series));
+    if (!changedVotes) {
+      return item;
+    }
+    const rounds = { ...item.rounds };
+    Object.entries(changedVotes).forEach(([round, vote]) => {
+      if (round in rounds) {
+        rounds[round] = vote;
+      }
+    });
+    return { ...item, rounds };
+  });
+
+  const participatingCounts = { ...data.participating_counts };
+  Object.entries(delta.participating_counts).forEach(([round, count]) => {
+    if (round in participatingCounts) {
+      participatingCounts[round] = count;
+    }
+  });
+
+  return { ...data, votes_data: votesData, participating_counts: participatingCounts, version: delta.version };
+}